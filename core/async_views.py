@@ -0,0 +1,53 @@
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.views import APIView
+
+from core import renderers
+
+
+class AsyncReadView(View):
+    """GET은 async ORM으로 처리하고 그 밖의 메서드는 sync_view_class(같은 API의 DRF view)에 넘기는 view.
+
+    DRF는 async view를 지원하지 않으므로 GET 응답은 DRF 시리얼라이저로 만든 data를 DRF와 같은 형식의 JSON으로 반환한다.
+    gym.asgi_urls에서 같은 경로의 DRF view보다 앞에 등록한다.
+    """
+    sync_view_class: type[APIView] = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super(AsyncReadView, cls).as_view(**initkwargs)
+        # 쓰기 요청의 CSRF 검사는 sync_view_class(DRF)가 한다.
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD'):
+            sync_view = self.sync_view_class.as_view()
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        try:
+            return await self.get(request, *args, **kwargs)
+        except APIException as exc:
+            data: Any = exc.detail if isinstance(exc, ValidationError) else {'detail': exc.detail}
+            return self.json_response(data, status=exc.status_code)
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        raise NotImplementedError
+
+    @staticmethod
+    def json_response(data: Any, status: int = 200) -> HttpResponse:
+        return HttpResponse(renderers.dumps(data), status=status, content_type='application/json')
+
+
+def set_prefetched(instance, name: str, objects: list) -> None:
+    """Django 4.1의 async 반복은 prefetch_related를 지원하지 않으므로, 따로 읽은 객체를 prefetch 결과처럼 붙인다."""
+    queryset = getattr(instance, name).get_queryset()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
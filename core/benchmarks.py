@@ -0,0 +1,42 @@
+import datetime
+import statistics
+import time
+from typing import Callable
+
+from credit.models import Credit, CreditType
+from lesson.models import Lesson, Reservation
+from user.models import CustomUser
+
+
+def percentile(values: list[float], percent: int) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """func를 repeat번 실행한 시간(ms)의 중앙값."""
+    durations: list[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def create_benchmark_rows(rows: int) -> CustomUser:
+    """유저 한 명과 수업 rows개, 그 수업마다 예약과 사용 크레딧을 만든다. 트랜잭션 안에서 만들고 롤백해서 쓴다."""
+    user: CustomUser = CustomUser.objects.create(username=f'benchmark-{time.time_ns()}')
+    start_date = datetime.date(2000, 1, 1)
+    lessons: list[Lesson] = Lesson.objects.bulk_create([
+        Lesson(credit_count=10, max_capacity=20, reserved_count=1, start_date=start_date + datetime.timedelta(index),
+               start_time=datetime.time(9), end_time=datetime.time(10))
+        for index in range(rows)
+    ], batch_size=500)
+    reservations: list[Reservation] = Reservation.objects.bulk_create(
+        [Reservation(user=user, lesson=lesson) for lesson in lessons], batch_size=500)
+    Credit.objects.bulk_create([
+        Credit(user=user, reservation=reservation, type=CreditType.USE, count=-10, start_date=start_date,
+               message='수업 예약')
+        for reservation in reservations
+    ], batch_size=500)
+    return user
@@ -0,0 +1,111 @@
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+from core.routers import is_reading_replica
+
+
+class VersionedCache:
+    """namespace마다 버전 번호를 두고, 버전을 올려서 namespace의 캐시를 한 번에 무효화한다.
+
+    값은 '{prefix}:{namespace}:{version}:{key}'에 저장되므로 버전을 올리면 이전 값은 더 이상 읽히지 않고
+    timeout이 지나면 사라진다. 적중/실패 횟수는 캐시에 함께 기록해 get_stats로 확인한다.
+    """
+    instances: dict[str, 'VersionedCache'] = {}
+
+    def __init__(self, prefix: str, timeout: int | None = DEFAULT_TIMEOUT):
+        self.prefix = prefix
+        self.timeout = timeout
+        VersionedCache.instances[prefix] = self
+
+    def get_timeout(self) -> int | None:
+        """replica에서 읽은 값은 복제 지연으로 이전 데이터일 수 있으므로 REPLICA_PIN_SECONDS보다 오래 두지 않는다."""
+        if not is_reading_replica():
+            return self.timeout
+        timeout: int | None = cache.default_timeout if self.timeout is DEFAULT_TIMEOUT else self.timeout
+        return settings.REPLICA_PIN_SECONDS if timeout is None else min(timeout, settings.REPLICA_PIN_SECONDS)
+
+    def _version_key(self, namespace: str) -> str:
+        return f'{self.prefix}:{namespace}:version'
+
+    def _stats_key(self, name: str) -> str:
+        return f'{self.prefix}:stats:{name}'
+
+    def get_version(self, namespace: str) -> int:
+        version_key: str = self._version_key(namespace)
+        version: int | None = cache.get(version_key)
+        if version is None:
+            # 버전 키가 지워져도 이전 버전 값과 겹치지 않도록 시간으로 새 버전을 시작한다.
+            cache.add(version_key, time.time_ns(), None)
+            version = cache.get(version_key)
+        return version
+
+    def get_or_set(self, namespace: str, key: str, default: Callable[[], Any]) -> Any:
+        digest: str = hashlib.md5(key.encode()).hexdigest()
+        value_key: str = f'{self.prefix}:{namespace}:{self.get_version(namespace)}:{digest}'
+        value: Any = cache.get(value_key)
+        if value is not None:
+            self._incr('hits')
+            return value
+
+        self._incr('misses')
+        value = default()
+        cache.set(value_key, value, self.get_timeout())
+        return value
+
+    async def aget_version(self, namespace: str) -> int:
+        version_key: str = self._version_key(namespace)
+        version: int | None = await cache.aget(version_key)
+        if version is None:
+            await cache.aadd(version_key, time.time_ns(), None)
+            version = await cache.aget(version_key)
+        return version
+
+    async def aget_or_set(self, namespace: str, key: str, default: Callable[[], Awaitable[Any]]) -> Any:
+        digest: str = hashlib.md5(key.encode()).hexdigest()
+        value_key: str = f'{self.prefix}:{namespace}:{await self.aget_version(namespace)}:{digest}'
+        value: Any = await cache.aget(value_key)
+        if value is not None:
+            await self._aincr('hits')
+            return value
+
+        await self._aincr('misses')
+        value = await default()
+        await cache.aset(value_key, value, self.get_timeout())
+        return value
+
+    def bump(self, *namespaces: str) -> None:
+        self._bump(namespaces)
+        # 커밋 전에 다른 요청이 이전 값을 다시 캐시할 수 있으므로 커밋 후에 한 번 더 올린다.
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._bump(namespaces))
+
+    def _bump(self, namespaces: tuple[str, ...]) -> None:
+        for namespace in namespaces:
+            try:
+                cache.incr(self._version_key(namespace))
+            except ValueError:
+                self.get_version(namespace)
+
+    def _incr(self, name: str) -> None:
+        try:
+            cache.incr(self._stats_key(name))
+        except ValueError:
+            if not cache.add(self._stats_key(name), 1, None):
+                cache.incr(self._stats_key(name))
+
+    async def _aincr(self, name: str) -> None:
+        try:
+            await cache.aincr(self._stats_key(name))
+        except ValueError:
+            if not await cache.aadd(self._stats_key(name), 1, None):
+                await cache.aincr(self._stats_key(name))
+
+    def get_stats(self) -> dict[str, int]:
+        stats: dict[str, int] = cache.get_many([self._stats_key('hits'), self._stats_key('misses')])
+        return {name: stats.get(self._stats_key(name), 0) for name in ('hits', 'misses')}
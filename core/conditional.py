@@ -0,0 +1,72 @@
+import datetime
+import hashlib
+from typing import Awaitable, Callable
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+Version = tuple
+
+
+def get_etag(request, version: Version | None) -> str | None:
+    if version is None:
+        return None
+    source: str = ':'.join([str(value) for value in version] + [request.get_full_path()])
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def get_last_modified(version: Version | None) -> datetime.datetime | None:
+    if version is None or version[0] is None:
+        return None
+    last_modified: datetime.datetime = version[0]
+    if timezone.is_naive(last_modified):
+        last_modified = timezone.make_aware(last_modified)
+    return last_modified
+
+
+def conditional_get(get_version: Callable[..., Version | None]):
+    """get_version(request, *args, **kwargs)가 돌려준 값으로 ETag/Last-Modified를 만들어 304 응답을 처리하는 view 메서드 데코레이터.
+
+    get_version은 (가장 최근 modified, 그 밖에 응답을 바꾸는 값...) 튜플을 반환하고, 대상이 없으면 None을 반환한다.
+    ETag에는 요청 경로와 쿼리스트링이 함께 들어가므로 쿼리스트링별로 다른 응답도 구분된다.
+    """
+    def get_cached_version(request, *args, **kwargs) -> Version | None:
+        if not hasattr(request, '_conditional_version'):
+            request._conditional_version = get_version(request, *args, **kwargs)
+        return request._conditional_version
+
+    def etag_func(request, *args, **kwargs) -> str | None:
+        return get_etag(request, get_cached_version(request, *args, **kwargs))
+
+    def last_modified_func(request, *args, **kwargs) -> datetime.datetime | None:
+        return get_last_modified(get_cached_version(request, *args, **kwargs))
+
+    return method_decorator(condition(etag_func=etag_func, last_modified_func=last_modified_func))
+
+
+async def aconditional_get(request, version: Version | None,
+                           get_response: Callable[[], Awaitable[HttpResponse]]) -> HttpResponse:
+    """conditional_get의 async view용. Django 4.1의 condition 데코레이터는 async view를 지원하지 않는다."""
+    etag: str | None = get_etag(request, version)
+    etag = quote_etag(etag) if etag else None
+    last_modified: datetime.datetime | None = get_last_modified(version)
+    timestamp: int | None = int(last_modified.timestamp()) if last_modified else None
+
+    response: HttpResponse | None = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await get_response()
+
+    if timestamp and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(timestamp)
+    if etag:
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+def latest(*values: datetime.datetime | None) -> datetime.datetime | None:
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
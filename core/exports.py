@@ -0,0 +1,68 @@
+import csv
+import datetime
+import json
+from typing import Any, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+
+class ExportFormat(models.TextChoices):
+    CSV = 'csv', 'CSV'
+    NDJSON = 'ndjson', 'NDJSON'
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=ExportFormat.choices, default=ExportFormat.NDJSON, label="내보내기 형식")
+    after = serializers.IntegerField(min_value=0, default=0, label="마지막으로 받은 id (이어받기)")
+
+
+class _Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+class RowExporter:
+    content_types = {
+        ExportFormat.CSV: 'text/csv; charset=utf-8',
+        ExportFormat.NDJSON: 'application/x-ndjson',
+    }
+
+    def __init__(self, queryset: QuerySet, fields: tuple[str, ...], export_format: str = ExportFormat.NDJSON,
+                 after: int = 0, chunk_size: int = 2000):
+        assert 'id' in fields, "fields must include id"
+        self.queryset = queryset.filter(id__gt=after).order_by('id')
+        self.fields = fields
+        self.export_format = export_format
+        self.after = after
+        self.chunk_size = chunk_size
+        self.last_id = after
+
+    def __iter__(self) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        if self.export_format == ExportFormat.CSV and self.after == 0:
+            yield writer.writerow(self.fields)
+
+        for row in self.queryset.values(*self.fields).iterator(chunk_size=self.chunk_size):
+            self.last_id = row['id']
+            if self.export_format == ExportFormat.CSV:
+                yield writer.writerow([self.to_csv_value(row[field]) for field in self.fields])
+            else:
+                yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def to_csv_value(value: Any) -> Any:
+        if value is None:
+            return ''
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def as_response(self, filename: str) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(self, content_type=self.content_types[self.export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{self.export_format}"'
+        return response
@@ -0,0 +1,179 @@
+import datetime
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import requests
+from django.utils import timezone
+
+from core.benchmarks import percentile
+
+LOADTEST_USERNAME_PREFIX = 'loadtest-'
+LOADTEST_PASSWORD = 'loadtest'
+
+
+def get_lesson_dates(days: int) -> list[datetime.date]:
+    # 당일 수업은 취소할 수 없으므로 내일부터 예약한다.
+    tomorrow: datetime.date = timezone.now().date() + datetime.timedelta(days=1)
+    return [tomorrow + datetime.timedelta(days=day) for day in range(days)]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, response: requests.Response, duration: float) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(duration * 1000)
+            self.statuses[endpoint][response.status_code] += 1
+
+    def summary(self, elapsed: float) -> dict[str, dict[str, Any]]:
+        return {
+            endpoint: {
+                'count': len(latencies),
+                'errors': sum(count for code, count in self.statuses[endpoint].items() if code >= 400),
+                'statuses': {str(code): count for code, count in sorted(self.statuses[endpoint].items())},
+                'throughput': round(len(latencies) / elapsed, 2),
+                'mean': round(statistics.mean(latencies), 2),
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+            }
+            for endpoint, latencies in sorted(self.latencies.items())
+        }
+
+
+class VirtualUser:
+    """세션 로그인 후 크레딧 구매 → 수업 목록 → 예약 → 취소 → 유저 상세 조회를 반복하는 가상 사용자."""
+
+    def __init__(self, base_url: str, username: str, recorder: LatencyRecorder, lesson_dates: list[datetime.date]):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.recorder = recorder
+        self.lesson_dates = lesson_dates
+        self.session = requests.Session()
+
+    def request(self, endpoint: str, method: str, path: str, **kwargs) -> requests.Response:
+        headers: dict[str, str] = {'X-CSRFToken': self.session.cookies.get('csrftoken', '')}
+        start: float = time.perf_counter()
+        response: requests.Response = self.session.request(
+            method, f'{self.base_url}{path}', headers=headers, allow_redirects=False, **kwargs)
+        self.recorder.record(endpoint, response, time.perf_counter() - start)
+        return response
+
+    def login(self) -> None:
+        login_url: str = f'{self.base_url}/accounts/login/'
+        self.session.get(login_url).raise_for_status()
+        response: requests.Response = self.session.post(login_url, allow_redirects=False, data={
+            'username': self.username,
+            'password': LOADTEST_PASSWORD,
+            'csrfmiddlewaretoken': self.session.cookies.get('csrftoken'),
+        }, headers={'Referer': login_url})
+        if response.status_code != 302:
+            raise RuntimeError(f'{self.username} login failed ({response.status_code})')
+
+    def run(self, price_policy_id: int) -> None:
+        response = self.request('POST /credit/', 'post', '/credit/', json={
+            'start_date': str(timezone.now().date()), 'price_policy': price_policy_id})
+        if response.status_code >= 400:
+            return
+        user_id: int = response.json()['user']['id']
+
+        lesson_date: str = str(random.choice(self.lesson_dates))
+        response = self.request('GET /lesson/', 'get', '/lesson/', params={
+            'start_date_from': lesson_date, 'start_date_to': lesson_date, 'page_size': 100})
+        lessons: list[dict] = [
+            lesson for lesson in response.json().get('results', []) if lesson['available_seats'] > 0
+        ] if response.status_code < 400 else []
+
+        if lessons:
+            lesson_id: int = random.choice(lessons)['id']
+            response = self.request('POST /lesson/{pk}/reservation/', 'post', f'/lesson/{lesson_id}/reservation/')
+            if response.status_code < 400:
+                self.request('DELETE /lesson/reservation/{pk}/', 'delete',
+                             f'/lesson/reservation/{response.json()["id"]}/')
+
+        self.request('GET /user/{pk}/', 'get', f'/user/{user_id}/')
+
+
+def get_price_policy_id(base_url: str) -> int:
+    response: requests.Response = requests.get(f'{base_url.rstrip("/")}/credit/price-policy/')
+    response.raise_for_status()
+    price_policies: list[dict] = response.json()
+    if not price_policies:
+        raise RuntimeError('no price policy. run seed_loadtest first')
+    return price_policies[0]['id']
+
+
+def run_workload(base_url: str, usernames: list[str], iterations: int, concurrency: int,
+                 lesson_dates: list[datetime.date]) -> dict[str, Any]:
+    recorder = LatencyRecorder()
+    price_policy_id: int = get_price_policy_id(base_url)
+    virtual_users: list[VirtualUser] = [
+        VirtualUser(base_url, username, recorder, lesson_dates) for username in usernames]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(VirtualUser.login, virtual_users))
+
+    def run_virtual_user(virtual_user: VirtualUser) -> None:
+        for _ in range(iterations):
+            virtual_user.run(price_policy_id)
+
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_virtual_user, virtual_users))
+    elapsed: float = time.perf_counter() - start
+
+    endpoints: dict[str, dict[str, Any]] = recorder.summary(elapsed)
+    return {
+        'commit': get_commit(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'base_url': base_url,
+        'users': len(usernames),
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'elapsed': round(elapsed, 2),
+        'throughput': round(sum(endpoint['count'] for endpoint in endpoints.values()) / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_result(result: dict[str, Any], output_dir: str) -> Path:
+    path = Path(output_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    path = path / f'{result["created"].replace(":", "")}-{result["commit"]}.json'
+    path.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    return path
+
+
+def compare_results(result: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    def change(current: float, previous: float) -> str:
+        return f'{(current - previous) / previous * 100:+.1f}%' if previous else '-'
+
+    lines: list[str] = [f'{baseline["commit"]} -> {result["commit"]}']
+    for endpoint, stats in result['endpoints'].items():
+        previous: dict[str, Any] | None = baseline['endpoints'].get(endpoint)
+        if previous is None:
+            continue
+        lines.append(
+            f'{endpoint}: p50 {change(stats["p50"], previous["p50"])}, p95 {change(stats["p95"], previous["p95"])}, '
+            f'p99 {change(stats["p99"], previous["p99"])}, '
+            f'throughput {change(stats["throughput"], previous["throughput"])}')
+    lines.append(f'total throughput: {change(result["throughput"], baseline["throughput"])}')
+    return lines
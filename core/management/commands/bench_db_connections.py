@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = 'DB 연결을 매번 새로 여는 경우(CONN_MAX_AGE=0)와 연결을 다시 쓰는 경우의 쿼리 시간을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **kwargs):
+        connection = connections[kwargs['database']]
+        iterations: int = kwargs['iterations']
+        settings_dict: dict = connection.settings_dict
+        self.stdout.write(
+            f'{connection.vendor} {settings_dict["HOST"] or "-"}:{settings_dict["PORT"] or "-"} '
+            f'(CONN_MAX_AGE={settings_dict["CONN_MAX_AGE"]}), {iterations} iterations')
+
+        results: dict[str, list[float]] = {
+            'new connection': self.measure(connection, iterations, reconnect=True),
+            'persistent': self.measure(connection, iterations, reconnect=False),
+        }
+        for name, durations in results.items():
+            self.stdout.write(f'{name}: mean {statistics.mean(durations):.3f}ms, '
+                              f'p50 {percentile(durations, 50):.3f}ms, '
+                              f'p95 {percentile(durations, 95):.3f}ms')
+
+        overhead: float = statistics.mean(results['new connection']) - statistics.mean(results['persistent'])
+        self.stdout.write(self.style.SUCCESS(f'connection setup: {overhead:.3f}ms per request'))
+
+    @staticmethod
+    def measure(connection, iterations: int, reconnect: bool) -> list[float]:
+        durations: list[float] = []
+        connection.ensure_connection()
+        for _ in range(iterations):
+            if reconnect:
+                connection.close()
+            start: float = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            durations.append((time.perf_counter() - start) * 1000)
+        return durations
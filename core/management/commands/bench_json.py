@@ -0,0 +1,45 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import create_benchmark_rows, measure
+from core.renderers import FastJSONRenderer, FastJSONParser, orjson
+from credit.models import Credit
+from credit.serializers import CreditSerializer
+from lesson.models import Lesson
+from lesson.serializers import LessonSerializer
+
+
+class Command(BaseCommand):
+    help = ('수업 목록과 크레딧 목록 응답 데이터를 JSONRenderer/JSONParser와 FastJSONRenderer/FastJSONParser로 '
+            '처리하는 시간을 비교합니다. 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000])
+        parser.add_argument('--repeat', type=int, default=20, help='측정 반복 횟수(중앙값 사용)')
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(f'orjson {orjson.__version__}' if orjson else 'orjson not installed (stdlib fallback)')
+        for rows in kwargs['rows']:
+            with transaction.atomic():
+                user = create_benchmark_rows(rows)
+                payloads: dict[str, list] = {
+                    'lessons': LessonSerializer(Lesson.objects.order_by('id'), many=True).data,
+                    'credits': CreditSerializer(
+                        Credit.objects.filter(user=user).select_related('user').order_by('id'), many=True).data,
+                }
+                transaction.set_rollback(True)
+
+            for name, payload in payloads.items():
+                content: bytes = JSONRenderer().render(payload)
+                render_ms: float = measure(lambda: JSONRenderer().render(payload), kwargs['repeat'])
+                fast_render_ms: float = measure(lambda: FastJSONRenderer().render(payload), kwargs['repeat'])
+                parse_ms: float = measure(lambda: JSONParser().parse(BytesIO(content)), kwargs['repeat'])
+                fast_parse_ms: float = measure(lambda: FastJSONParser().parse(BytesIO(content)), kwargs['repeat'])
+                self.stdout.write(
+                    f'{name} x {rows} ({len(content)} bytes): '
+                    f'render {render_ms:.2f}ms -> {fast_render_ms:.2f}ms ({render_ms / fast_render_ms:.1f}x), '
+                    f'parse {parse_ms:.2f}ms -> {fast_parse_ms:.2f}ms ({parse_ms / fast_parse_ms:.1f}x)')
@@ -0,0 +1,49 @@
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.benchmarks import create_benchmark_rows, measure
+from credit.models import Credit
+from lesson.models import Lesson, Reservation
+from lesson.serializers import LessonSerializer, lesson_values_serializer
+from user.models import CustomUser
+from user.serializers import UserReservationSerializer, user_detail_values_serializer
+
+
+class Command(BaseCommand):
+    help = ('수업 목록과 유저 예약 목록을 DRF ModelSerializer와 .values() 읽기 경로(ValuesSerializer)로 만드는 시간을 '
+            '비교합니다. 데이터는 트랜잭션 안에서 만들고 끝나면 롤백합니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3, help='측정 반복 횟수(중앙값 사용)')
+
+    def handle(self, *args, **kwargs):
+        for rows in kwargs['rows']:
+            with transaction.atomic():
+                user: CustomUser = create_benchmark_rows(rows)
+                lessons = Lesson.objects.order_by('id')
+                reservations = (Reservation.objects
+                                .filter(user=user)
+                                .order_by('id')
+                                .select_related('lesson')
+                                .prefetch_related(Prefetch('credits', queryset=Credit.objects.order_by('id'))))
+                benchmarks: dict[str, tuple[Callable, Callable]] = {
+                    'lessons': (
+                        lambda: LessonSerializer(lessons, many=True).data,
+                        lambda: lesson_values_serializer.to_representation_many(
+                            lessons.values(*lesson_values_serializer.value_fields))),
+                    'user reservations': (
+                        lambda: UserReservationSerializer(reservations, many=True).data,
+                        lambda: user_detail_values_serializer.to_representation(
+                            user, 0, list(user_detail_values_serializer.get_reservation_queryset(user)),
+                            list(user_detail_values_serializer.get_credit_queryset(user)))),
+                }
+                for name, (serializer, values_serializer) in benchmarks.items():
+                    serializer_ms: float = measure(serializer, kwargs['repeat'])
+                    values_ms: float = measure(values_serializer, kwargs['repeat'])
+                    self.stdout.write(f'{name} x {rows}: serializer {serializer_ms:.1f}ms, values {values_ms:.1f}ms '
+                                      f'({serializer_ms / values_ms:.1f}x)')
+                transaction.set_rollback(True)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import VersionedCache
+
+
+class Command(BaseCommand):
+    help = '캐시별 적중/실패 횟수와 적중률을 출력합니다.'
+
+    def handle(self, *args, **kwargs):
+        for prefix, versioned_cache in sorted(VersionedCache.instances.items()):
+            stats: dict[str, int] = versioned_cache.get_stats()
+            total: int = stats['hits'] + stats['misses']
+            hit_rate: float = stats['hits'] / total * 100 if total else 0
+            self.stdout.write(f'{prefix}: {stats["hits"]} hits, {stats["misses"]} misses ({hit_rate:.1f}%)')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core.exports import ExportFormat, RowExporter
+from credit.models import Credit
+from credit.views import CreditLedgerExportAPIView
+from lesson.models import Reservation
+from lesson.views import ReservationExportAPIView
+
+
+class Command(BaseCommand):
+    help = '크레딧 원장 또는 예약 내역을 id 순서로 CSV/NDJSON 파일에 스트리밍합니다.'
+    targets = {
+        'credit': (Credit, CreditLedgerExportAPIView.fields),
+        'reservation': (Reservation, ReservationExportAPIView.fields),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=self.targets.keys())
+        parser.add_argument('--format', dest='export_format', choices=ExportFormat.values, default=ExportFormat.NDJSON)
+        parser.add_argument('--after', type=int, default=0, help='이 id 이후부터 내보냅니다(이어받기).')
+        parser.add_argument('--output', help='결과 파일 경로. --after가 있으면 이어서 씁니다. 기본값은 표준출력')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        model, fields = self.targets[kwargs['target']]
+        exporter = RowExporter(
+            model.objects.all(), fields, export_format=kwargs['export_format'], after=kwargs['after'],
+            chunk_size=kwargs['chunk_size'])
+
+        output_path: str = kwargs['output']
+        if output_path:
+            with open(output_path, 'a' if kwargs['after'] else 'w', encoding='utf-8', newline='') as output:
+                output.writelines(exporter)
+        else:
+            for line in exporter:
+                self.stdout.write(line, ending='')
+
+        self.stderr.write(f'last id: {exporter.last_id}')
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.loadtest import LOADTEST_USERNAME_PREFIX, run_workload, save_result, compare_results, get_lesson_dates
+
+
+class Command(BaseCommand):
+    help = ('실행 중인 서버에 크레딧 구매 → 수업 목록 → 예약 → 취소 → 유저 상세 조회 시나리오로 부하를 주고 '
+            'API별 p50/p95/p99 응답 시간과 처리량을 출력합니다. 먼저 seed_loadtest로 데이터를 만드세요.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--users', type=int, default=20, help='동시에 시나리오를 실행할 가상 사용자 수')
+        parser.add_argument('--iterations', type=int, default=10, help='가상 사용자별 시나리오 반복 횟수')
+        parser.add_argument('--concurrency', type=int, help='동시 요청 스레드 수. 기본값은 --users')
+        parser.add_argument('--days', type=int, default=7, help='seed_loadtest의 --days와 같은 값')
+        parser.add_argument('--output-dir', default='loadtest-results', help='결과 JSON을 저장할 디렉터리')
+        parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일')
+
+    def handle(self, *args, **kwargs):
+        result: dict = run_workload(
+            kwargs['base_url'], [f'{LOADTEST_USERNAME_PREFIX}{index}' for index in range(kwargs['users'])],
+            iterations=kwargs['iterations'], concurrency=kwargs['concurrency'] or kwargs['users'],
+            lesson_dates=get_lesson_dates(kwargs['days']))
+
+        self.stdout.write(f'{result["commit"]} {result["base_url"]}: {result["users"]} users x '
+                          f'{result["iterations"]} iterations in {result["elapsed"]}s, '
+                          f'{result["throughput"]} req/s')
+        for endpoint, stats in result['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint}: {stats["count"]} requests, {stats["errors"]} errors {stats["statuses"]}, '
+                f'{stats["throughput"]} req/s, '
+                f'p50 {stats["p50"]}ms, p95 {stats["p95"]}ms, p99 {stats["p99"]}ms')
+
+        if kwargs['output_dir']:
+            self.stdout.write(self.style.SUCCESS(f'saved {save_result(result, kwargs["output_dir"])}'))
+
+        if kwargs['compare']:
+            with open(kwargs['compare']) as file:
+                for line in compare_results(result, json.load(file)):
+                    self.stdout.write(line)
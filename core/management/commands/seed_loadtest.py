@@ -0,0 +1,62 @@
+import datetime
+import itertools
+import math
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.loadtest import LOADTEST_USERNAME_PREFIX, LOADTEST_PASSWORD, get_lesson_dates
+from credit.models import PricePolicy
+from lesson.models import Lesson, Gym, LessonType
+from user.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = '부하 테스트용 유저, 수업, 크레딧 구매 데이터를 만듭니다. 여러 번 실행해도 이미 있는 유저와 수업은 건너뜁니다.'
+    start_times: list[datetime.time] = [datetime.time(hour) for hour in range(6, 22)]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--lessons', type=int, default=500)
+        parser.add_argument('--purchases', type=int, default=100, help='유저들에게 나누어 만드는 크레딧 구매 수')
+        parser.add_argument('--days', type=int, default=7, help='내일부터 며칠 동안 수업을 나누어 만들지')
+        parser.add_argument('--max-capacity', type=int, default=20)
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        lesson_dates: list[datetime.date] = get_lesson_dates(kwargs['days'])
+        lessons_per_day: int = math.ceil(kwargs['lessons'] / len(lesson_dates))
+        slots_per_day: int = len(Gym.values) * len(LessonType.values) * len(self.start_times)
+        if lessons_per_day > slots_per_day:
+            raise CommandError(f'하루에 만들 수 있는 수업은 {slots_per_day}개입니다. --days를 늘려 주세요.')
+
+        password: str = make_password(LOADTEST_PASSWORD)
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'{LOADTEST_USERNAME_PREFIX}{index}', password=password, phone_number='01000000000')
+            for index in range(kwargs['users'])
+        ], ignore_conflicts=True)
+        users: list[CustomUser] = list(CustomUser.objects.filter(
+            username__in=[f'{LOADTEST_USERNAME_PREFIX}{index}' for index in range(kwargs['users'])]).order_by('id'))
+
+        lessons: list[Lesson] = [
+            Lesson(gym=gym, type=lesson_type, start_date=lesson_date, start_time=start_time,
+                   end_time=start_time.replace(hour=start_time.hour + 1), credit_count=10,
+                   max_capacity=kwargs['max_capacity'])
+            for lesson_date in lesson_dates
+            for gym, lesson_type, start_time in itertools.islice(
+                itertools.product(Gym.values, LessonType.values, self.start_times), lessons_per_day)
+        ][:kwargs['lessons']]
+        lessons, conflicts = Lesson.objects.bulk_create_without_conflicts(lessons)
+
+        price_policy, _ = PricePolicy.objects.get_or_create(
+            name='부하 테스트 1000 크레딧', defaults={'price': 100000, 'credit_count': 1000, 'period': 30})
+        today: datetime.date = timezone.now().date()
+        for index in range(kwargs['purchases'] if users else 0):
+            users[index % len(users)].buy_credit(price_policy, today)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} user(s), {len(lessons)} lesson(s) created, {len(conflicts)} skipped, '
+            f'{kwargs["purchases"] if users else 0} purchase(s) '
+            f'({lesson_dates[0]} ~ {lesson_dates[-1]}, password: {LOADTEST_PASSWORD})'))
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.routers import current_read_database, choose_replica, primary_pinned
+
+logger = logging.getLogger('gym.queries')
+
+
+class QueryStats:
+    def __init__(self):
+        self.count: int = 0
+        self.duration: float = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[sql] += 1
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @staticmethod
+    def fingerprint(sql: str) -> str:
+        return hashlib.md5(sql.encode()).hexdigest()[:12]
+
+    def server_timing(self) -> str:
+        return f'db;desc="{self.count} queries";dur={self.duration * 1000:.2f}'
+
+    def describe(self) -> str:
+        lines: list[str] = [f'{self.count} queries in {self.duration * 1000:.2f}ms']
+        lines += [f'{count}x {sql}' for sql, count in self.duplicates.items()]
+        return '\n'.join(lines)
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar('current_query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    query_stats: QueryStats | None = current_query_stats.get()
+    if query_stats is None:
+        return execute(sql, params, many, context)
+    return query_stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created 시그널 receiver. async view의 ORM 호출은 다른 스레드의 connection을 쓰므로
+    모든 connection에 record_query를 걸어 두고, 요청별 QueryStats는 context 변수로 찾는다."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryCountMiddleware:
+    """요청마다 SQL 개수, 총 시간, 중복 쿼리를 기록하고 Server-Timing 헤더와 로그로 남긴다.
+
+    view 클래스에 query_budget(숫자 또는 {'GET': 3} 같은 메서드별 dict)을 선언하면
+    예산을 넘긴 요청을 경고로 기록하고, 테스트에서는 BaseTest.assertWithinQueryBudget으로 검사한다.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Django MiddlewareMixin과 같은 방식으로 ASGI에서 async 미들웨어로 동작한다.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        query_stats = QueryStats()
+        token = current_query_stats.set(query_stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self.record(request, response, query_stats)
+
+    async def __acall__(self, request):
+        query_stats = QueryStats()
+        token = current_query_stats.set(query_stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self.record(request, response, query_stats)
+
+    @staticmethod
+    def record(request, response, query_stats: QueryStats):
+        query_budget: int | None = getattr(request, 'query_budget', None)
+        response.query_stats = query_stats
+        response.query_budget = query_budget
+        response['Server-Timing'] = query_stats.server_timing()
+
+        over_budget: bool = query_budget is not None and query_stats.count > query_budget
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'query_count': query_stats.count,
+            'query_budget': query_budget,
+            'query_ms': round(query_stats.duration * 1000, 2),
+            'duplicate_queries': {
+                query_stats.fingerprint(sql): count for sql, count in query_stats.duplicates.items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        query_budget: int | dict[str, int] | None = getattr(view_class, 'query_budget', None)
+        if isinstance(query_budget, dict):
+            query_budget = query_budget.get(request.method)
+        request.query_budget = query_budget
+
+
+class ReplicaRoutingMiddleware:
+    """read_from_replica = True인 view의 조회 요청을 replica에서 읽게 한다.
+
+    쓰기 요청이 성공하면 REPLICA_PIN_SECONDS 동안 쿠키를 남겨, 방금 쓴 데이터를 복제 지연 없이
+    default에서 다시 읽도록 한다. 조회 중 크레딧 만료처럼 default에 쓴 요청(pin_primary)도 같다.
+    replica가 설정되지 않았으면 아무것도 하지 않는다.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        token, pinned_token = current_read_database.set(None), primary_pinned.set(False)
+        try:
+            return self.pin(request, self.get_response(request))
+        finally:
+            current_read_database.reset(token)
+            primary_pinned.reset(pinned_token)
+
+    async def __acall__(self, request):
+        token, pinned_token = current_read_database.set(None), primary_pinned.set(False)
+        try:
+            return self.pin(request, await self.get_response(request))
+        finally:
+            current_read_database.reset(token)
+            primary_pinned.reset(pinned_token)
+
+    @staticmethod
+    def pin(request, response):
+        wrote: bool = request.method not in SAFE_METHODS or primary_pinned.get()
+        if settings.REPLICA_DATABASES and wrote and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if (getattr(view_class, 'read_from_replica', False) and request.method in SAFE_METHODS
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES):
+            current_read_database.set(choose_replica())
@@ -0,0 +1,79 @@
+import json
+from typing import Any
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """ordering의 모든 필드 값을 커서에 담아 (a, b, id) > (x, y, z) 순서 비교로 다음 페이지를 읽는 CursorPagination.
+
+    CursorPagination은 ordering[0] 값과 offset으로 커서를 만들어, 첫 필드 값이 같은 행이 많으면 offset만큼 건너뛰며 읽는다.
+    ordering의 마지막 필드는 id처럼 유일해야 하며, 그러면 위치가 행마다 달라 offset 없이 인덱스 범위만 읽는다.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse: bool = self.cursor is not None and self.cursor.reverse
+        current_position: str | None = self.cursor.position if self.cursor is not None else None
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.decode_position(current_position), reverse))
+
+        results: list = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position: str | None = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next, self.has_previous = current_position is not None, following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next, self.has_previous = following_position is not None, current_position is not None
+            self.next_position, self.previous_position = following_position, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, values: list[str], reverse: bool) -> Q:
+        """ordering 순서(reverse면 반대 순서)로 values 다음에 오는 행. 첫 필드 범위 조건을 함께 넣어 인덱스 범위를 좁힌다."""
+        keyset_filter: Q | None = None
+        equal = Q()
+        for order, value in zip(self.ordering, values):
+            field_name: str = order.lstrip('-')
+            lookup: str = 'lt' if order.startswith('-') != reverse else 'gt'
+            after = equal & Q(**{f'{field_name}__{lookup}': value})
+            keyset_filter = after if keyset_filter is None else keyset_filter | after
+            equal &= Q(**{field_name: value})
+        first_field: str = self.ordering[0].lstrip('-')
+        first_lookup: str = 'lte' if self.ordering[0].startswith('-') != reverse else 'gte'
+        return Q(**{f'{first_field}__{first_lookup}': values[0]}) & keyset_filter
+
+    def decode_position(self, position: str) -> list[str]:
+        try:
+            values: Any = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(values, list) or len(values) != len(self.ordering)
+                or not all(isinstance(value, str) for value in values)):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering) -> str:
+        values: list[str] = []
+        for order in ordering:
+            field_name: str = order.lstrip('-')
+            value: Any = instance[field_name] if isinstance(instance, dict) else getattr(instance, field_name)
+            values.append(str(value))
+        return json.dumps(values, separators=(',', ':'))
@@ -0,0 +1,62 @@
+from typing import Any
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 DRF 기본 JSONRenderer/JSONParser와 같은 stdlib json으로 처리한다.
+    orjson = None
+
+# orjson이 직접 처리하지 못하는 값(Decimal, UUID, lazy 번역 문자열 등)은 DRF JSONEncoder로 바꾼다.
+_encoder = JSONEncoder()
+
+
+def dumps(data: Any) -> bytes:
+    """DRF JSONRenderer의 기본 출력(compact, ensure_ascii=False)과 같은 JSON을 만든다."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    content: bytes = orjson.dumps(
+        data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    # JSONRenderer처럼 U+2028/U+2029를 이스케이프해서 JavaScript에서도 그대로 읽을 수 있게 한다.
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """orjson이 설치되어 있으면 orjson으로 렌더링하는 JSONRenderer.
+
+    date/time/datetime은 JSONRenderer와 같은 ISO 8601 문자열이 된다.
+    NaN/Infinity만은 다르게 처리한다. JSONRenderer는 STRICT_JSON(기본값)이면 ValueError를 내고 아니면 NaN을 그대로 쓰지만,
+    orjson은 null로 쓴다. 응답마다 float를 모두 검사하지 않으려고 이 차이는 그대로 두며, 모델에 float 필드가 없어 응답에는 나오지 않는다.
+    indent를 요청했거나(BrowsableAPIRenderer 등) COMPACT_JSON/UNICODE_JSON 설정을 바꿨으면 JSONRenderer로 렌더링한다.
+    view의 renderer_classes로 JSONRenderer를 지정하면 view별로 쓰지 않을 수 있다.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """orjson이 설치되어 있으면 orjson으로 읽는 JSONParser. UTF-8이 아닌 요청은 JSONParser로 읽는다."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding: str = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super(FastJSONParser, self).parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,48 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# 요청 처리 중 읽기 쿼리를 보낼 replica alias. ReplicaRoutingMiddleware가 요청마다 정한다.
+current_read_database: ContextVar[str | None] = ContextVar('current_read_database', default=None)
+# 조회 요청 중 default에 썼는지. ReplicaRoutingMiddleware가 보고 쓰기 요청처럼 쿠키를 남긴다.
+primary_pinned: ContextVar[bool] = ContextVar('primary_pinned', default=False)
+
+
+def choose_replica() -> str | None:
+    replicas: list[str] = settings.REPLICA_DATABASES
+    return random.choice(replicas) if replicas else None
+
+
+def is_reading_replica() -> bool:
+    return current_read_database.get() is not None
+
+
+def pin_primary() -> None:
+    """조회 중 default에 쓴 뒤 부른다. 이번 요청의 남은 읽기와 REPLICA_PIN_SECONDS 동안의 다음 요청을 default에서 읽게 한다."""
+    current_read_database.set(None)
+    primary_pinned.set(True)
+
+
+class ReplicaRouter:
+    """ReplicaRoutingMiddleware가 replica를 정한 요청의 읽기 쿼리만 replica로 보내고, 나머지는 모두 default로 보낸다.
+
+    default에서 트랜잭션 중이면(크레딧 만료 등 조회 중 쓰기) 같은 트랜잭션에서 읽도록 default로 보낸다.
+    """
+
+    def db_for_read(self, model, **hints) -> str | None:
+        read_database: str | None = current_read_database.get()
+        if read_database is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return read_database
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # replica는 default와 같은 데이터이므로 어느 DB에서 읽은 객체끼리도 연결할 수 있다.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,116 @@
+from operator import itemgetter, methodcaller
+from typing import Any, Callable, Iterable, Mapping
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.fields import SerializerMethodField, ISO_8601
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# 값을 바꾸지 않고 그대로 내보내는 필드. .values()가 돌려주는 값이 이미 DRF 출력과 같다.
+IDENTITY_FIELDS = (
+    serializers.IntegerField, serializers.CharField, serializers.ChoiceField, serializers.BooleanField,
+    PrimaryKeyRelatedField,
+)
+
+
+class ValuesSerializer:
+    """ModelSerializer와 같은 읽기 응답을 모델 인스턴스 대신 .values() 행(dict)에서 바로 만든다.
+
+    필드 목록과 값을 읽는 함수는 처음 한 번만 serializer_class에서 만들어 두므로,
+    행마다 DRF 필드를 돌며 get_attribute/to_representation을 부르는 비용이 없다.
+     - 중첩 serializer(many=False)는 '<source>__<필드>' 키로 같은 행에서 읽는다.
+     - many=True 중첩 serializer와 SerializerMethodField는 to_representation(row, 이름=값)으로 넘긴다.
+     - 모델 property처럼 .values()로 읽을 수 없는 필드는 computed_values에
+       {'필드명': lambda get: ...} 형태로 다른 필드 값(get('필드명'))으로 계산하는 함수를 넘긴다.
+       중첩 serializer의 필드는 '<중첩 필드명>__<필드명>' 키로 넘긴다.
+    """
+
+    def __init__(self, serializer_class: type[serializers.Serializer], prefix: str = '',
+                 computed_values: dict[str, Callable[[Callable[[str], Any]], Any]] | None = None):
+        self.serializer_class = serializer_class
+        self.prefix = prefix
+        self.computed_values = computed_values or {}
+
+    @cached_property
+    def readable_fields(self) -> list[serializers.Field]:
+        return [field for field in self.serializer_class().fields.values() if not field.write_only]
+
+    @cached_property
+    def value_fields(self) -> list[str]:
+        """.values()에 넘길 필드 이름 목록."""
+        value_fields: list[str] = []
+        for field in self.readable_fields:
+            if self.is_passed(field) or field.field_name in self.computed_values:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                value_fields += self.nested(field).value_fields
+            else:
+                value_fields.append(self.get_key(field))
+        return value_fields
+
+    @cached_property
+    def getters(self) -> list[tuple[str, Callable[[Mapping], Any] | None]]:
+        """(필드 이름, 행에서 값을 읽는 함수) 목록. 함수가 None이면 to_representation에 넘긴 값을 쓴다."""
+        getters: list[tuple[str, Callable[[Mapping], Any] | None]] = []
+        for field in self.readable_fields:
+            name: str = field.field_name
+            if self.is_passed(field):
+                getter = None
+            elif name in self.computed_values:
+                getter = self.compute(self.computed_values[name])
+            elif isinstance(field, serializers.BaseSerializer):
+                getter = self.nested(field).to_representation
+            elif isinstance(field, IDENTITY_FIELDS):
+                getter = itemgetter(self.get_key(field))
+            else:
+                getter = self.convert(itemgetter(self.get_key(field)), self.get_converter(field))
+            getters.append((name, getter))
+        return getters
+
+    @staticmethod
+    def is_passed(field: serializers.Field) -> bool:
+        return isinstance(field, (serializers.ListSerializer, SerializerMethodField))
+
+    def nested(self, field: serializers.BaseSerializer) -> 'ValuesSerializer':
+        prefix: str = f'{field.field_name}__'
+        computed_values = {name.removeprefix(prefix): compute for name, compute in self.computed_values.items()
+                           if name.startswith(prefix)}
+        return ValuesSerializer(type(field), prefix=f'{self.prefix}{field.source}__', computed_values=computed_values)
+
+    def get_key(self, field: serializers.Field) -> str:
+        return f'{self.prefix}{field.source.replace(".", "__")}'
+
+    def compute(self, compute: Callable[[Callable[[str], Any]], Any]) -> Callable[[Mapping], Any]:
+        prefix: str = self.prefix
+        return lambda row: compute(lambda name: row[f'{prefix}{name}'])
+
+    @staticmethod
+    def convert(get_value: Callable[[Mapping], Any], converter: Callable[[Any], Any]) -> Callable[[Mapping], Any]:
+        def getter(row: Mapping) -> Any:
+            value: Any = get_value(row)
+            return None if value is None else converter(value)
+        return getter
+
+    @staticmethod
+    def get_converter(field: serializers.Field) -> Callable[[Any], Any]:
+        if isinstance(field, serializers.DateTimeField):
+            output_format: str | None = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            # USE_TZ=False면 DB 값이 naive datetime이라 DRF도 isoformat()만 한다.
+            if not settings.USE_TZ and output_format is not None and output_format.lower() == ISO_8601:
+                return methodcaller('isoformat')
+        elif isinstance(field, (serializers.DateField, serializers.TimeField)):
+            output_format: str | None = getattr(
+                field, 'format',
+                api_settings.DATE_FORMAT if isinstance(field, serializers.DateField) else api_settings.TIME_FORMAT)
+            if output_format is not None and output_format.lower() == ISO_8601:
+                return methodcaller('isoformat')
+        return field.to_representation
+
+    def to_representation(self, row: Mapping, **values: Any) -> dict[str, Any]:
+        return {name: values[name] if getter is None else getter(row) for name, getter in self.getters}
+
+    def to_representation_many(self, rows: Iterable[Mapping]) -> list[dict[str, Any]]:
+        getters = self.getters
+        return [{name: getter(row) for name, getter in getters} for row in rows]
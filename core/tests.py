@@ -1,9 +1,39 @@
 import datetime
+import decimal
+import itertools
+import json
+import logging
+import runpy
+import tempfile
+from io import StringIO, BytesIO
+from pathlib import Path
+from unittest import mock
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connections
+from django.db.models import Q
+from django.test import TestCase, LiveServerTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, URLResolver, URLPattern, get_resolver
 from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
+from core.cache import VersionedCache
+from core.loadtest import LOADTEST_USERNAME_PREFIX
+from core.middleware import QueryStats
+from core.routers import ReplicaRouter, current_read_database
+from core.renderers import FastJSONRenderer, FastJSONParser
+from credit.models import PricePolicy, PurchaseCredit, CreditBalance
+from lesson.models import Lesson, Reservation, Gym, LessonType, ReservationType, ScheduleTemplate, Waitlist
 from user.models import CustomUser
 
 
@@ -24,6 +54,17 @@ class BaseTest(TestCase):
     ten_day_later: datetime.date = today + datetime.timedelta(10)
     start_date = ten_day_ago
 
+    def setUp(self):
+        cache.clear()
+        self.lesson_minutes = itertools.count(1)
+
+    def create_lesson(self, lesson_data: dict, **fields) -> Lesson:
+        """lesson_data에 fields를 덮어써 수업을 만든다.
+        같은 장소, 수업종류, 수업날짜, 시작시간의 수업은 하나뿐이므로 lesson_data의 시작시간에서 만들 때마다 1분씩 늦춘다."""
+        start_time = datetime.datetime.combine(self.today, lesson_data['start_time']) + datetime.timedelta(
+            minutes=next(self.lesson_minutes))
+        return Lesson.objects.create(**{**lesson_data, 'start_time': start_time.time(), **fields})
+
     @classmethod
     def setUpTestData(cls):
         cls.admin: CustomUser = CustomUser.objects.create_superuser("admin")
@@ -38,3 +79,420 @@ class BaseTest(TestCase):
         cls.admin_client.login(username='admin', password='admin')
         cls.user_client = APIClient()
         cls.user_client.login(username='user', password='user')
+
+    def assertWithinQueryBudget(self, response: HttpResponse):
+        query_stats: QueryStats = response.query_stats
+        self.assertIsNotNone(response.query_budget, f'{response.request} has no query_budget')
+        self.assertLessEqual(query_stats.count, response.query_budget, query_stats.describe())
+
+    def assertIndexed(self, model, name: str, fields: list[str], condition: Q | None = None):
+        """Meta.indexes에 쿼리 조건과 정렬에 맞춘 인덱스가 있는지 본다. 실행 계획은 DB와 통계에 따라 달라서 보지 않는다."""
+        indexes: dict = {index.name: index for index in model._meta.indexes}
+        self.assertIn(name, indexes)
+        self.assertEqual(list(indexes[name].fields), fields)
+        self.assertEqual(indexes[name].condition, condition)
+
+
+class QueryBudgetTestCase(BaseTest):
+    budget_apps = ('core', 'credit', 'lesson', 'user')
+    lesson_data = {
+        'gym': Gym.SEOUL,
+        'type': LessonType.YOGA,
+        'credit_count': 100,
+        'max_capacity': 10,
+        'start_date': BaseTest.ten_day_later,
+        'start_time': datetime.time(13, 0),
+        'end_time': datetime.time(15, 0),
+    }
+
+    def _add_history(self, price_policy: PricePolicy, count: int) -> None:
+        for _ in range(count):
+            self.user.buy_credit(price_policy, self.today)
+            lesson = self.create_lesson(self.lesson_data)
+            Reservation.objects.reserve(self.user, lesson).cancel(self.user)
+            Reservation.objects.reserve(self.user, lesson)
+
+    def test_views_declare_query_budget(self):
+        def get_views(patterns) -> list:
+            views = []
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    views += get_views(pattern.url_patterns)
+                elif isinstance(pattern, URLPattern):
+                    views.append(pattern.callback)
+            return views
+
+        views: list = get_views(get_resolver('gym.urls').url_patterns) + get_views(
+            get_resolver('gym.asgi_urls').url_patterns)
+        for view in views:
+            view_class = getattr(view, 'view_class', None) or getattr(view, 'cls', None)
+            if view_class is None or view_class.__module__.split('.')[0] not in self.budget_apps:
+                continue
+            self.assertTrue(hasattr(view_class, 'query_budget'), f'{view_class.__name__} has no query_budget')
+
+    def test_views_within_query_budget(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.admin.buy_credit(price_policy, self.today)
+        ScheduleTemplate.objects.create(
+            gym=Gym.SEOUL, type=LessonType.SWIM, weekday=self.ten_day_later.isoweekday(), credit_count=10,
+            max_capacity=5, start_time=datetime.time(9, 0), end_time=datetime.time(10, 0))
+        for history_count in (1, 10):
+            self._add_history(price_policy, history_count)
+            lesson = self.create_lesson(self.lesson_data)
+            reservation = Reservation.objects.filter(
+                user=self.user, type=ReservationType.RESERVATION, cancel_reservation__isnull=True).last()
+            bulk_lesson_ids: list[int] = [self.create_lesson(self.lesson_data).id for _ in range(2)]
+            full_lesson = self.create_lesson(self.lesson_data, max_capacity=1)
+            Reservation.objects.reserve(self.admin, full_lesson)
+            # 취소하면 대기 중인 admin이 예약된다.
+            promotion_lesson = self.create_lesson(self.lesson_data, max_capacity=1)
+            promotion_reservation = Reservation.objects.reserve(self.user, promotion_lesson)
+            Waitlist.objects.join(self.admin, promotion_lesson)
+            # 조회할 때 사용기간이 지난 크레딧을 만료 처리하는 유저
+            expiring_user: CustomUser = CustomUser.objects.create_user(f'expiring{history_count}', password='member')
+            expiring_user.buy_credit(price_policy, self.today - datetime.timedelta(days=price_policy.period + 1))
+            lesson_data: dict = {**self.lesson_data, 'start_date': str(self.ten_day_later),
+                                 'start_time': f'{history_count:02d}:00:00'}
+            requests = [
+                ('get', reverse('price-policy'), {}),
+                ('post', reverse('price-policy'), self.policy_data),
+                ('get', reverse('credit'), {}),
+                ('post', reverse('credit'), {'start_date': str(self.today), 'price_policy': price_policy.id}),
+                ('get', reverse('credit-ledger'), {}),
+                ('get', reverse('credit-ledger-export'), {}),
+                ('get', reverse('lesson'), {}),
+                ('post', reverse('lesson'), lesson_data),
+                ('post', reverse('lesson-bulk'), {'lessons': [lesson_data] * 2}),
+                ('post', reverse('lesson-schedule-generate'), {
+                    'start_date': str(self.ten_day_later), 'end_date': str(self.ten_day_later + datetime.timedelta(13))}),
+                ('get', reverse('lesson-detail', kwargs={'pk': lesson.id}), {}),
+                ('post', reverse('reservation', kwargs={'pk': lesson.id}), {}),
+                ('post', reverse('reservation-bulk'), {'lesson_ids': bulk_lesson_ids}),
+                ('post', reverse('waitlist', kwargs={'pk': full_lesson.id}), {}),
+                ('get', reverse('waitlist', kwargs={'pk': full_lesson.id}), {}),
+                ('delete', reverse('waitlist', kwargs={'pk': full_lesson.id}), {}),
+                ('delete', reverse('reservation-detail', kwargs={'pk': reservation.id}), {}),
+                ('delete', reverse('reservation-detail', kwargs={'pk': promotion_reservation.id}), {}),
+                ('get', reverse('reservation-export'), {}),
+                ('get', reverse('user'), {}),
+                ('post', reverse('user'), {'username': f'member{history_count}', 'password': 'member', 'phone_number': '01012345678'}),
+                ('get', reverse('user-detail', kwargs={'pk': self.user.id}), {}),
+                ('get', reverse('user-detail', kwargs={'pk': expiring_user.id}), {}),
+            ]
+            for method, url, data in requests:
+                with self.subTest(method=method, url=url, history_count=history_count):
+                    response: HttpResponse = getattr(self.user_client, method)(
+                        url, data=data, **({} if method == 'get' else {'format': 'json'}))
+                    self.assertLess(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertWithinQueryBudget(response)
+                    self.assertTrue(response['Server-Timing'].startswith('db;desc='))
+            self.assertTrue(Reservation.objects.filter(
+                user=self.admin, lesson=promotion_lesson, cancel_reservation__isnull=True).exists())
+
+    def test_query_stats_log(self):
+        with self.assertLogs('gym.queries', level=logging.INFO) as logs:
+            self.user_client.get(reverse('lesson'))
+        self.assertIn('"query_count": 3', logs.output[0])
+
+
+class VersionedCacheTestCase(BaseTest):
+    def test_versioned_cache(self):
+        versioned_cache = VersionedCache('test')
+        values: list[int] = []
+
+        def load() -> int:
+            values.append(len(values))
+            return values[-1]
+
+        self.assertEqual(versioned_cache.get_or_set('a', 'key', load), 0)
+        self.assertEqual(versioned_cache.get_or_set('a', 'key', load), 0)
+        self.assertEqual(versioned_cache.get_or_set('b', 'key', load), 1)
+
+        versioned_cache.bump('a')
+        self.assertEqual(versioned_cache.get_or_set('a', 'key', load), 2)
+        self.assertEqual(versioned_cache.get_or_set('b', 'key', load), 1)
+        self.assertEqual(versioned_cache.get_stats(), {'hits': 2, 'misses': 3})
+
+        cache.delete(versioned_cache._version_key('b'))
+        self.assertEqual(versioned_cache.get_or_set('b', 'key', load), 3)
+
+    def test_versioned_cache_bump_on_commit(self):
+        versioned_cache = VersionedCache('test')
+        with self.captureOnCommitCallbacks() as callbacks:
+            version: int = versioned_cache.get_version('a')
+            versioned_cache.bump('a')
+        self.assertEqual(versioned_cache.get_version('a'), version + 1)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(versioned_cache.get_version('a'), version + 2)
+
+
+@override_settings(ROOT_URLCONF='gym.asgi_urls')
+class AsyncReadViewTestCase(BaseTest):
+    lesson_data = QueryBudgetTestCase.lesson_data
+
+    def setUp(self):
+        super(AsyncReadViewTestCase, self).setUp()
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        self.lesson = Lesson.objects.create(**self.lesson_data)
+        Reservation.objects.reserve(self.user, self.lesson)
+        self.async_client.force_login(self.user)
+
+    def get_urls(self) -> list[str]:
+        return [
+            reverse('price-policy'),
+            reverse('lesson'),
+            f"{reverse('lesson')}?start_date_from={self.ten_day_later}&start_date_to={self.ten_day_later}",
+            reverse('lesson-detail', kwargs={'pk': self.lesson.id}),
+            f"{reverse('lesson-detail', kwargs={'pk': self.lesson.id})}?reservation_limit=1",
+            reverse('user-detail', kwargs={'pk': self.user.id}),
+        ]
+
+    async def test_async_views_match_sync_views(self):
+        for url in self.get_urls():
+            with self.subTest(url=url):
+                with override_settings(ROOT_URLCONF='gym.urls'):
+                    expected: HttpResponse = await sync_to_async(self.user_client.get)(url)
+                response: HttpResponse = await self.async_client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), expected.json())
+                self.assertWithinQueryBudget(response)
+
+    async def test_async_views_not_modified(self):
+        for url in self.get_urls()[3:]:
+            with self.subTest(url=url):
+                response: HttpResponse = await self.async_client.get(url)
+                response = await self.async_client.get(url, **{'If-None-Match': response['ETag']})
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_views_not_found(self):
+        for url in (reverse('lesson-detail', kwargs={'pk': 0}), reverse('user-detail', kwargs={'pk': 0})):
+            with self.subTest(url=url):
+                response: HttpResponse = await self.async_client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_views_pass_writes_to_sync_views(self):
+        response: HttpResponse = await self.async_client.post(
+            reverse('lesson'), data={**self.lesson_data, 'start_date': str(self.ten_day_later), 'start_time': '14:00:00'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertWithinQueryBudget(response)
+
+
+class HealthCheckTestCase(BaseTest):
+    def test_liveness(self):
+        response: HttpResponse = self.client.get(reverse('health-live'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.query_stats.count, 0)
+
+    def test_readiness(self):
+        response: HttpResponse = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['checks'], {'database': True, 'cache': True})
+        self.assertWithinQueryBudget(response)
+
+        with mock.patch('core.views.ReadinessAPIView.check_database', return_value=False):
+            response = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()['status'], 'unavailable')
+
+
+class GunicornConfigTestCase(BaseTest):
+    def test_db_connection_check(self):
+        config: dict = runpy.run_path(str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'))
+        get_db_connection_count = config['get_db_connection_count']
+        databases: dict = {'default': {'CONN_MAX_AGE': 60}, 'replica1': {'CONN_MAX_AGE': 60}}
+        self.assertEqual(get_db_connection_count(9, 4, databases, pgbouncer=False), 72)
+        self.assertIsNone(get_db_connection_count(9, 4, databases, pgbouncer=True))
+        self.assertIsNone(get_db_connection_count(9, 4, {'default': {'CONN_MAX_AGE': 0}}, pgbouncer=False))
+
+        server = mock.Mock()
+        server.cfg.workers, server.cfg.threads = 9, 4
+        with override_settings(SQL_PGBOUNCER=False), \
+                mock.patch.dict(settings.DATABASES['default'], {'CONN_MAX_AGE': 60}), \
+                mock.patch.dict('os.environ', {'SQL_MAX_CONNECTIONS': '30'}):
+            config['when_ready'](server)
+        server.log.warning.assert_called_once()
+
+
+class BenchDbConnectionsTestCase(BaseTest):
+    def test_bench_db_connections(self):
+        out = StringIO()
+        call_command('bench_db_connections', iterations=5, stdout=out)
+        self.assertIn('new connection: mean', out.getvalue())
+        self.assertIn('persistent: mean', out.getvalue())
+        self.assertIn('connection setup:', out.getvalue())
+
+
+class LoadTestTestCase(LiveServerTestCase):
+    def test_seed_loadtest(self):
+        call_command('seed_loadtest', users=3, lessons=20, purchases=6, days=2, stdout=StringIO())
+        call_command('seed_loadtest', users=3, lessons=20, purchases=0, days=2, stdout=StringIO())
+        self.assertEqual(CustomUser.objects.filter(username__startswith=LOADTEST_USERNAME_PREFIX).count(), 3)
+        self.assertEqual(Lesson.objects.count(), 20)
+        self.assertEqual(Lesson.objects.values('start_date').distinct().count(), 2)
+        self.assertEqual(PricePolicy.objects.count(), 1)
+        self.assertEqual(PurchaseCredit.objects.count(), 6)
+
+    def test_loadtest(self):
+        call_command('seed_loadtest', users=2, lessons=10, purchases=0, days=1, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command('loadtest', base_url=self.live_server_url, users=2, iterations=2, concurrency=1, days=1,
+                         output_dir=output_dir, stdout=StringIO())
+            result_paths: list[Path] = list(Path(output_dir).glob('*.json'))
+            self.assertEqual(len(result_paths), 1)
+            result: dict = json.loads(result_paths[0].read_text())
+
+            out = StringIO()
+            call_command('loadtest', base_url=self.live_server_url, users=2, iterations=1, concurrency=1, days=1,
+                         output_dir='', compare=str(result_paths[0]), stdout=out)
+            self.assertIn('total throughput:', out.getvalue())
+
+        self.assertEqual(set(result['endpoints']), {
+            'POST /credit/', 'GET /lesson/', 'POST /lesson/{pk}/reservation/', 'DELETE /lesson/reservation/{pk}/',
+            'GET /user/{pk}/'})
+        for endpoint, stats in result['endpoints'].items():
+            self.assertEqual(stats['count'], 4, endpoint)
+            self.assertEqual(stats['errors'], 0, endpoint)
+            self.assertLessEqual(stats['p50'], stats['p95'])
+            self.assertLessEqual(stats['p95'], stats['p99'])
+
+
+class FastJSONRendererTestCase(BaseTest):
+    data = {
+        'date': datetime.date(2022, 10, 1),
+        'time': datetime.time(13, 30),
+        'datetime': datetime.datetime(2022, 10, 1, 13, 30, 15, 123456),
+        'decimal': decimal.Decimal('10.50'),
+        'lazy': gettext_lazy('수업'),
+        'text': '예약 취소',
+        1: [None, True, 1.5],
+    }
+
+    def test_render_same_as_json_renderer(self):
+        expected: bytes = JSONRenderer().render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        with mock.patch('core.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+        self.assertEqual(FastJSONRenderer().render(self.data, 'application/json; indent=4'),
+                         JSONRenderer().render(self.data, 'application/json; indent=4'))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_render_non_finite_float_as_null(self):
+        data = {'nan': float('nan'), 'inf': float('inf')}
+        self.assertRaises(ValueError, JSONRenderer().render, data)
+        self.assertEqual(FastJSONRenderer().render(data), b'{"nan":null,"inf":null}')
+        with mock.patch('core.renderers.orjson', None):
+            self.assertRaises(ValueError, FastJSONRenderer().render, data)
+
+    def test_parse(self):
+        content: bytes = '{"name": "요가", "count": 1, "items": [1.5, null]}'.encode()
+        self.assertEqual(FastJSONParser().parse(BytesIO(content)), JSONParser().parse(BytesIO(content)))
+        self.assertRaises(ParseError, FastJSONParser().parse, BytesIO(b'{"name": '))
+        self.assertRaises(ParseError, FastJSONParser().parse, BytesIO(b'{"count": NaN}'))
+
+    def test_views_render_with_fast_renderer(self):
+        Lesson.objects.create(**QueryBudgetTestCase.lesson_data)
+        response: HttpResponse = self.user_client.get(reverse('lesson'))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.json()['results'][0]['start_time'], '13:00:00')
+
+    def test_bench_json(self):
+        out = StringIO()
+        call_command('bench_json', rows=[10], repeat=1, stdout=out)
+        self.assertIn('lessons x 10', out.getvalue())
+        self.assertIn('credits x 10', out.getvalue())
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """replica는 default 테스트 DB를 그대로 읽는 alias로 만든다.
+    TestCase는 테스트 전체가 트랜잭션 안이라 라우터가 항상 default를 고르므로 TransactionTestCase를 쓴다."""
+    replica = 'replica_test'
+
+    def setUp(self):
+        cache.clear()
+        connections.settings[self.replica] = {**connections['default'].settings_dict}
+        self.addCleanup(self.remove_replica)
+        replica_settings = override_settings(REPLICA_DATABASES=[self.replica])
+        replica_settings.enable()
+        self.addCleanup(replica_settings.disable)
+
+        self.user: CustomUser = CustomUser.objects.create_user('user', password='user')
+        PricePolicy.objects.create(**BaseTest.policy_data)
+        Lesson.objects.create(**QueryBudgetTestCase.lesson_data)
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def remove_replica(self):
+        connections[self.replica].close()
+        del connections[self.replica]
+        del connections.settings[self.replica]
+
+    def test_reads_from_replica(self):
+        for url in (reverse('price-policy'), reverse('lesson'), reverse('user-detail', kwargs={'pk': self.user.id})):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connections['default']) as default_queries, \
+                        CaptureQueriesContext(connections[self.replica]) as replica_queries:
+                    response: HttpResponse = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertGreater(len(replica_queries), 0)
+                # 세션/인증 조회는 replica 대상 view가 정해지기 전에 default에서 읽는다.
+                self.assertNotIn(Lesson._meta.db_table, ' '.join(query['sql'] for query in default_queries))
+        self.assertIsNone(current_read_database.get())
+
+    @override_settings(ROOT_URLCONF='gym.asgi_urls')
+    async def test_async_reads_from_replica(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        read_databases: list[str | None] = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record_db_for_read(router, model, **hints):
+            read_databases.append(db_for_read(router, model, **hints))
+            return read_databases[-1]
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record_db_for_read):
+            response: HttpResponse = await self.async_client.get(reverse('lesson'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(self.replica, read_databases)
+
+    def test_writes_pin_to_primary(self):
+        with CaptureQueriesContext(connections[self.replica]) as replica_queries:
+            response: HttpResponse = self.client.post(
+                reverse('lesson'), data={**QueryBudgetTestCase.lesson_data, 'start_date': str(BaseTest.today)},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        with CaptureQueriesContext(connections[self.replica]) as replica_queries:
+            response = self.client.get(reverse('lesson'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica_queries), 0)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_credit_expiry_pins_to_primary(self):
+        price_policy: PricePolicy = PricePolicy.objects.get()
+        self.user.buy_credit(price_policy, BaseTest.today - datetime.timedelta(days=price_policy.period + 1))
+        with CaptureQueriesContext(connections[self.replica]) as replica_queries:
+            response: HttpResponse = self.client.get(reverse('user-detail', kwargs={'pk': self.user.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['credit_count'], 0)
+        # 만료로 default에 쓴 뒤에는 잔고를 replica에서 읽지 않고, 다음 요청도 default에서 읽게 한다.
+        balance_column: str = f'"{CreditBalance._meta.db_table}"."count"'
+        self.assertNotIn(balance_column, ' '.join(query['sql'] for query in replica_queries))
+        self.assertEqual(response.cookies[settings.REPLICA_PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertIsNone(current_read_database.get())
+
+        response = self.client.get(reverse('price-policy'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_cache_timeout_capped_on_replica(self):
+        versioned_cache = VersionedCache('test', timeout=None)
+        self.assertIsNone(versioned_cache.get_timeout())
+        token = current_read_database.set(self.replica)
+        try:
+            self.assertEqual(versioned_cache.get_timeout(), settings.REPLICA_PIN_SECONDS)
+            self.assertEqual(VersionedCache('test', timeout=1).get_timeout(), 1)
+        finally:
+            current_read_database.reset(token)
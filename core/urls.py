@@ -0,0 +1,8 @@
+from django.urls import path
+
+from core import views
+
+urlpatterns = [
+    path('live/', views.LivenessAPIView.as_view(), name='health-live'),
+    path('ready/', views.ReadinessAPIView.as_view(), name='health-ready'),
+]
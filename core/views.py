@@ -1,3 +1,56 @@
-from django.shortcuts import render
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+
+class LivenessAPIView(APIView):
+    query_budget = 0
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="프로세스 동작 확인(liveness)",
+        operation_description="DB나 캐시를 확인하지 않습니다. 실패하면 컨테이너를 재시작하세요.",
+    )
+    def get(self, request: Request):
+        return Response(status=status.HTTP_200_OK, data={'status': 'ok'})
+
+
+class ReadinessAPIView(APIView):
+    query_budget = 1
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="요청 처리 가능 여부 확인(readiness)",
+        operation_description="DB와 캐시에 연결할 수 있으면 200, 아니면 503을 반환합니다. "
+                              "503인 동안에는 로드밸런서에서 제외하세요.",
+    )
+    def get(self, request: Request):
+        checks: dict[str, bool] = {'database': self.check_database(), 'cache': self.check_cache()}
+        ready: bool = all(checks.values())
+        return Response(status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+                        data={'status': 'ok' if ready else 'unavailable', 'checks': checks})
+
+    @staticmethod
+    def check_database() -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except DatabaseError:
+            return False
+        return True
+
+    @staticmethod
+    def check_cache() -> bool:
+        try:
+            cache.set('health:ready', 1, 10)
+            return cache.get('health:ready') == 1
+        except Exception:
+            return False
@@ -1,16 +1,44 @@
 from django.contrib import admin
 
-from credit.models import PricePolicy, Credit
+from credit.models import PricePolicy, Credit, CreditArchive, CreditBalance, CreditExpiryWatermark
 
-models = [PricePolicy]
+models = [PricePolicy, CreditBalance, CreditExpiryWatermark]
 for model in models:
     admin.site.register(model)
 
 
 @admin.register(Credit)
 class CreditAdmin(admin.ModelAdmin):
+    """원장은 추가만 하므로 조회만 한다. 어긋난 잔고는 rebuild_credit_balance로 바로잡는다."""
     list_filter = (
         ('reservation__lesson', admin.RelatedOnlyFieldListFilter),
         ('reservation', admin.RelatedOnlyFieldListFilter),
         ('user', admin.RelatedOnlyFieldListFilter),
     )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CreditArchive)
+class CreditArchiveAdmin(admin.ModelAdmin):
+    """원장에서 지운 내역의 유일한 사본이고 archived_count 검증에 쓰이므로 조회만 한다."""
+    list_filter = (
+        ('user', admin.RelatedOnlyFieldListFilter),
+        'type',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+
+from core.async_views import AsyncReadView
+from credit.models import PricePolicy, price_policy_cache
+from credit.serializers import PricePolicySerializer
+from credit.views import PricePolicyAPIView
+
+
+class PricePolicyAsyncView(AsyncReadView):
+    query_budget = PricePolicyAPIView.query_budget
+    read_from_replica = PricePolicyAPIView.read_from_replica
+    sync_view_class = PricePolicyAPIView
+
+    async def get(self, request) -> HttpResponse:
+        async def get_price_policies() -> list:
+            price_policies: list[PricePolicy] = [price_policy async for price_policy in PricePolicy.objects.all()]
+            return list(PricePolicySerializer(price_policies, many=True).data)
+
+        data: list = await price_policy_cache.aget_or_set('list', 'list', get_price_policies)
+        return self.json_response(data)
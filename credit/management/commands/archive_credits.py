@@ -0,0 +1,36 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from credit.models import PurchaseCredit, CreditArchive
+
+
+class Command(BaseCommand):
+    help = '끝난 구매 크레딧과 그 사용/환불/만료 내역을 원장(Credit)에서 보관 테이블(CreditArchive)로 옮깁니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='종료일이 이 일수보다 오래된 구매 크레딧만 보관')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='한 트랜잭션에서 보관할 구매 크레딧 수')
+
+    def handle(self, *args, **kwargs):
+        chunk_size: int = kwargs['chunk_size']
+        end_date_before: datetime.date = timezone.now().date() - datetime.timedelta(kwargs['days'])
+        self.stdout.write(f'archiving credits ended before {end_date_before} ...')
+
+        archived_count: int = 0
+        last_id: int = 0
+        while True:
+            purchase_credit_ids: list[int] = list(
+                PurchaseCredit.objects
+                .get_queryset()
+                .closed(end_date_before)
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size])
+            if not purchase_credit_ids:
+                break
+            archived_count += CreditArchive.objects.archive(purchase_credit_ids, end_date_before)
+            last_id = purchase_credit_ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'{archived_count} credit(s) archived'))
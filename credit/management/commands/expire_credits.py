@@ -0,0 +1,38 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from credit.models import PurchaseCredit, CreditExpiryWatermark
+
+
+class Command(BaseCommand):
+    help = '사용기간이 지난 구매 크레딧을 모든 사용자에 대해 일괄 만료 처리합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='한 트랜잭션에서 만료 처리할 크레딧 수')
+
+    def handle(self, *args, **kwargs):
+        chunk_size: int = kwargs['chunk_size']
+        today: datetime.date = timezone.now().date()
+        self.stdout.write(f'expiring credits ended before {today} ...')
+
+        expired_count: int = 0
+        after = Q()
+        while True:
+            # credit_expiry_due_idx(end_date, id) 순서로 읽고, 마지막으로 읽은 (end_date, id) 다음부터 이어 읽는다.
+            expired_credits: list[tuple[int, datetime.date]] = list(
+                PurchaseCredit.objects
+                .filter(after, is_expired=False, end_date__lt=today)
+                .order_by('end_date', 'id')
+                .values_list('id', 'end_date')[:chunk_size])
+            if not expired_credits:
+                break
+            expired_count += PurchaseCredit.objects.filter(
+                id__in=[credit_id for credit_id, _ in expired_credits], is_expired=False, end_date__lt=today).expire()
+            last_id, last_end_date = expired_credits[-1]
+            after = Q(end_date__gt=last_end_date) | Q(end_date=last_end_date, id__gt=last_id)
+
+        CreditExpiryWatermark.objects.advance(today)
+        self.stdout.write(self.style.SUCCESS(f'{expired_count} credit(s) expired'))
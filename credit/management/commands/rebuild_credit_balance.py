@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from credit.models import CreditBalance, PurchaseCredit
+
+
+class Command(BaseCommand):
+    help = ('크레딧 원장(Credit)과 보관된 크레딧(CreditArchive)으로 사용자별 크레딧 잔고와 '
+            '구매 크레딧의 남은 개수를 검증하고 재계산합니다. 원장을 직접 고치거나 지운 뒤 잔고를 바로잡을 때 씁니다.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='수정하지 않고 원장과 비교만 합니다.')
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        self.stdout.write('checking archived credits ...')
+        archive_mismatches: list[tuple[int, int, int]] = self.get_archive_mismatches()
+        for user_id, archived_count, archive_count in archive_mismatches:
+            self.stdout.write(f'user {user_id}: archived {archived_count} != archive {archive_count}')
+        if not kwargs['verify']:
+            # 잔고 검증은 archived_count를 원장 합계에 더하므로 먼저 바로잡는다.
+            self.rebuild_archived_counts(archive_mismatches)
+
+        self.stdout.write('checking credit balance ...')
+        balance_mismatches: list[tuple[int, int, int]] = self.get_balance_mismatches()
+        for user_id, balance_count, ledger_count in balance_mismatches:
+            self.stdout.write(f'user {user_id}: balance {balance_count} != ledger {ledger_count}')
+
+        remaining_mismatches: list[PurchaseCredit] = self.get_remaining_mismatches()
+        for purchase_credit in remaining_mismatches:
+            self.stdout.write(f'credit {purchase_credit.id}: remaining {purchase_credit.remaining_count} '
+                              f'!= ledger {purchase_credit.ledger_remaining_count}')
+
+        if kwargs['verify']:
+            if archive_mismatches or balance_mismatches or remaining_mismatches:
+                raise CommandError(f'{len(archive_mismatches)} archived count(s), {len(balance_mismatches)} balance(s) '
+                                   f'and {len(remaining_mismatches)} remaining count(s) differ from the ledger')
+            self.stdout.write(self.style.SUCCESS('balances match the ledger'))
+            return
+
+        self.rebuild_balances(balance_mismatches)
+        for purchase_credit in remaining_mismatches:
+            purchase_credit.remaining_count = purchase_credit.ledger_remaining_count
+        PurchaseCredit.objects.bulk_update(remaining_mismatches, ['remaining_count'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(archive_mismatches)} archived count(s), {len(balance_mismatches)} balance(s) '
+            f'and {len(remaining_mismatches)} remaining count(s) rebuilt'))
+
+    @staticmethod
+    def get_archive_mismatches() -> list[tuple[int, int, int]]:
+        archive_counts: dict[int, int] = CreditBalance.objects.get_archive_counts()
+        archived_counts: dict[int, int] = dict(
+            CreditBalance.objects.select_for_update().values_list('user_id', 'archived_count'))
+
+        mismatches: list[tuple[int, int, int]] = []
+        for user_id in archive_counts.keys() | archived_counts.keys():
+            archive_count: int = archive_counts.get(user_id, 0)
+            archived_count: int = archived_counts.get(user_id, 0)
+            if archive_count != archived_count:
+                mismatches.append((user_id, archived_count, archive_count))
+        return mismatches
+
+    @staticmethod
+    def get_balance_mismatches() -> list[tuple[int, int, int]]:
+        ledger_counts: dict[int, int] = CreditBalance.objects.get_ledger_counts()
+        balance_counts: dict[int, int] = dict(
+            CreditBalance.objects.select_for_update().values_list('user_id', 'count'))
+
+        mismatches: list[tuple[int, int, int]] = []
+        for user_id in ledger_counts.keys() | balance_counts.keys():
+            ledger_count: int = ledger_counts.get(user_id, 0)
+            balance_count: int = balance_counts.get(user_id, 0)
+            if ledger_count != balance_count:
+                mismatches.append((user_id, balance_count, ledger_count))
+        return mismatches
+
+    @staticmethod
+    def get_remaining_mismatches() -> list[PurchaseCredit]:
+        return list(PurchaseCredit.objects
+                    .select_for_update()
+                    .filter(is_expired=False, expired_credit__isnull=True)
+                    .annotate_ledger_remaining_count()
+                    .exclude(remaining_count=F('ledger_remaining_count')))
+
+    @staticmethod
+    def rebuild_balances(mismatches: list[tuple[int, int, int]]) -> None:
+        for user_id, balance_count, ledger_count in mismatches:
+            CreditBalance.objects.update_or_create(user_id=user_id, defaults={'count': ledger_count})
+
+    @staticmethod
+    def rebuild_archived_counts(mismatches: list[tuple[int, int, int]]) -> None:
+        for user_id, archived_count, archive_count in mismatches:
+            CreditBalance.objects.update_or_create(user_id=user_id, defaults={'archived_count': archive_count})
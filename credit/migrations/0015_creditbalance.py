@@ -0,0 +1,41 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_credit_balance(apps, schema_editor):
+    Credit = apps.get_model('credit', 'Credit')
+    CreditBalance = apps.get_model('credit', 'CreditBalance')
+    ledger_counts = Credit.objects.values('user').annotate(count_sum=Sum('count')).order_by()
+    CreditBalance.objects.bulk_create([
+        CreditBalance(user_id=ledger_count['user'], count=ledger_count['count_sum'])
+        for ledger_count in ledger_counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('credit', '0014_refundcredit_alter_credit_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='생성시간')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='수정시간')),
+                ('count', models.IntegerField(default=0, verbose_name='크레딧 잔고')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='credit_balance', to=settings.AUTH_USER_MODEL, verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name': '크레딧 잔고',
+            },
+        ),
+        migrations.RunPython(fill_credit_balance, migrations.RunPython.noop),
+    ]
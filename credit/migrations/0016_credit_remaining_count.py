@@ -0,0 +1,38 @@
+# Generated by Django 4.1.1 on 2026-10-18 10:30
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_remaining_count(apps, schema_editor):
+    Credit = apps.get_model('credit', 'Credit')
+    used_counts = (Credit.objects
+                   .filter(purchased_credit__isnull=False)
+                   .values('purchased_credit')
+                   .annotate(count_sum=Sum('count'))
+                   .order_by())
+    used_counts = {used_count['purchased_credit']: used_count['count_sum'] for used_count in used_counts}
+    purchase_credits = list(Credit.objects.filter(type='구매', is_expired=False, expired_credit__isnull=True))
+    for purchase_credit in purchase_credits:
+        purchase_credit.remaining_count = purchase_credit.count + used_counts.get(purchase_credit.id, 0)
+    Credit.objects.bulk_update(purchase_credits, ['remaining_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0015_creditbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credit',
+            name='remaining_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='남은 크레딧 개수'),
+        ),
+        migrations.RunPython(fill_remaining_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(condition=models.Q(('is_expired', False), ('remaining_count__gt', 0), ('type', '구매')), fields=['user', 'start_date'], name='credit_open_purchase_idx'),
+        ),
+    ]
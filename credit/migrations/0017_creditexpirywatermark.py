@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+def mark_expired_credit_type(apps, schema_editor):
+    Credit = apps.get_model('credit', 'Credit')
+    Credit.objects.filter(expired_credit__isnull=False).update(type='만료', remaining_count=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0016_credit_remaining_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditExpiryWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='생성시간')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='수정시간')),
+                ('expired_until', models.DateField(help_text='이 날짜 이전에 종료된 크레딧은 모두 만료 처리됨', verbose_name='만료 처리 기준일')),
+            ],
+            options={
+                'verbose_name': '크레딧 만료 처리 기록',
+            },
+        ),
+        migrations.RunPython(mark_expired_credit_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0017_creditexpirywatermark'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(fields=['user', 'created', 'id'], name='credit_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.1 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credit', '0018_credit_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(condition=models.Q(('is_expired', False), ('type', '구매')), fields=['user', 'end_date'], name='credit_unexpired_purchase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='credit',
+            index=models.Index(condition=models.Q(('is_expired', False), ('type', '구매')), fields=['end_date', 'id'], name='credit_expiry_due_idx'),
+        ),
+    ]
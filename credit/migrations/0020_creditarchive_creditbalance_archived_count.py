@@ -0,0 +1,51 @@
+# Generated by Django 4.1.1 on 2026-10-18 16:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0011_reservation_active_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('credit', '0019_credit_unexpired_purchase_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditbalance',
+            name='archived_count',
+            field=models.IntegerField(default=0, help_text='CreditArchive로 옮긴 크레딧 개수의 합', verbose_name='보관된 크레딧 합계'),
+        ),
+        migrations.CreateModel(
+            name='CreditArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('count', models.IntegerField(verbose_name='크레딧 개수')),
+                ('type', models.CharField(choices=[('구매', '구매한 크레딧'), ('사용', '사용한 크레딧'), ('만료', '만료된 크레딧'), ('환불', '환불된 크레딧')], max_length=8, verbose_name='크레딧 종류')),
+                ('start_date', models.DateField(verbose_name='시작일')),
+                ('period', models.PositiveIntegerField(blank=True, null=True, verbose_name='사용기간(일)')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='종료일')),
+                ('is_expired', models.BooleanField(default=False)),
+                ('message', models.CharField(max_length=64)),
+                ('remaining_count', models.IntegerField(default=0, verbose_name='남은 크레딧 개수')),
+                ('created', models.DateTimeField(verbose_name='생성시간')),
+                ('modified', models.DateTimeField(verbose_name='수정시간')),
+                ('archived', models.DateTimeField(verbose_name='보관시간')),
+                ('expired_credit', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='credit.creditarchive', verbose_name='만료된 크레딧')),
+                ('price_policy', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='credit.pricepolicy', verbose_name='가격 정책')),
+                ('purchased_credit', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='credit.creditarchive', verbose_name='구매된 크레딧')),
+                ('reservation', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='lesson.reservation', verbose_name='예약')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_credits', to=settings.AUTH_USER_MODEL, verbose_name='사용자')),
+            ],
+            options={
+                'verbose_name': '보관된 크레딧',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='creditarchive',
+            index=models.Index(fields=['user', 'created', 'id'], name='credit_archive_user_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.1 on 2026-10-18 17:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0011_reservation_active_idx'),
+        ('credit', '0020_creditarchive_creditbalance_archived_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='credit',
+            name='reservation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='credits', to='lesson.reservation', verbose_name='예약'),
+        ),
+    ]
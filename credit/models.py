@@ -1,12 +1,17 @@
 import datetime
 
-from django.db import models
-from django.db.models import QuerySet, Sum
+from django.core.cache import cache
+from django.db import connections, models, router, transaction
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, Sum, Case, When, Value, IntegerField, Max, Count, \
+    Exists
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from gym import settings
+from core.cache import VersionedCache
 from core.models import TimeStampedModel
+from core.routers import pin_primary
 from lesson.models import Reservation
 
 
@@ -17,21 +22,71 @@ class CreditType(models.TextChoices):
     REFUND = '환불', _('환불된 크레딧')
 
 
+price_policy_cache = VersionedCache('price-policy')
+
+
 class PurchaseCreditQuerySet(QuerySet):
+    # 잔고 차감 쿼리가 id를 두 번 넘기므로 SQLite 변수 한도(999)보다 작게 둔다.
+    expire_batch_size = 400
+
     def filter(self, *args, **kwargs):
         return super(PurchaseCreditQuerySet, self).filter(*args, **kwargs, type=CreditType.PURCHASE)
 
-    def expire(self):
-        expired_credits: list[PurchaseCredit] = [
-            PurchaseCredit(
-                user=expired_credit.user,
-                count=-expired_credit.remaining_count,
-                start_date=timezone.now().date(),
-                expired_credit=expired_credit,
-                message=expired_credit.message
-            ) for expired_credit in self]
-        self.bulk_create(expired_credits)
-        self.update(is_expired=True)
+    def remaining(self):
+        return self.filter(is_expired=False, remaining_count__gt=0)
+
+    def annotate_ledger_remaining_count(self):
+        used_credit_count = (Credit.objects
+                             .filter(purchased_credit=OuterRef('pk'))
+                             .values('purchased_credit')
+                             .annotate(count_sum=Sum('count'))
+                             .values('count_sum'))
+        return self.annotate(ledger_remaining_count=F('count') + Coalesce(Subquery(used_credit_count), 0))
+
+    def closed(self, end_date_before: datetime.date):
+        """더 이상 바뀌지 않는 구매 크레딧. 만료되었거나 모두 사용했고, 쓰인 예약의 수업이 모두 오늘 전에 시작해 취소(환불)할 수 없다.
+
+        예약을 함께 결제한 다른 구매 크레딧이 끝났는지는 CreditArchiveManager.archive가 본다.
+        """
+        cancelable_use = Credit.objects.filter(
+            purchased_credit=OuterRef('pk'), reservation__lesson__start_date__gte=timezone.now().date())
+        return (self.filter(end_date__lt=end_date_before)
+                .filter(Q(is_expired=True) | Q(remaining_count=0))
+                .exclude(Exists(cancelable_use)))
+
+    def expire(self) -> int:
+        # select_for_update()의 db는 쓰기용 DB이므로 읽기 요청이 replica로 라우팅되어도 primary에서 만료 처리한다.
+        locked_credits: 'PurchaseCreditQuerySet' = self.select_for_update()
+        db: str = locked_credits.db
+        with transaction.atomic(using=db):
+            expired_credit_ids: list[int] = list(locked_credits.values_list('id', flat=True))
+            if not expired_credit_ids:
+                return 0
+
+            connection = connections[db]
+            now: datetime.datetime = timezone.now()
+            credit_table: str = connection.ops.quote_name(Credit._meta.db_table)
+            # SQLite(3.32 미만)는 쿼리 하나에 변수를 999개까지만 받으므로 id를 나눠서 처리한다.
+            for start in range(0, len(expired_credit_ids), self.expire_batch_size):
+                credit_ids: list[int] = expired_credit_ids[start:start + self.expire_batch_size]
+                placeholders: str = ', '.join(['%s'] * len(credit_ids))
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'INSERT INTO {credit_table} '
+                        f'(created, modified, user_id, count, type, start_date, is_expired, expired_credit_id, '
+                        f'message, remaining_count) '
+                        f'SELECT %s, %s, user_id, -remaining_count, %s, %s, %s, id, message, 0 '
+                        f'FROM {credit_table} WHERE id IN ({placeholders}) AND remaining_count <> 0',
+                        [connection.ops.adapt_datetimefield_value(now), connection.ops.adapt_datetimefield_value(now),
+                         CreditType.EXPIRED, connection.ops.adapt_datefield_value(now.date()), False,
+                         *credit_ids])
+
+                CreditBalance.objects.db_manager(db).subtract_remaining_counts(credit_ids)
+                Credit.objects.using(db).filter(id__in=credit_ids).update(
+                    is_expired=True, remaining_count=0, modified=now)
+        # 만료 전 잔고가 남아 있을 수 있는 replica 대신 이후 잔고 조회는 default에서 읽는다.
+        pin_primary()
+        return len(expired_credit_ids)
 
 
 class PurchaseCreditManager(models.Manager):
@@ -45,13 +100,11 @@ class PurchaseCreditManager(models.Manager):
 
         assert end_date is None, "end_date must be None"
         kwargs['end_date'] = start_date + datetime.timedelta(price_policy.period)
+        kwargs['remaining_count'] = kwargs['count']
         return super().create(**kwargs, type=CreditType.PURCHASE)
 
     def get_remaining_credits(self, user) -> list['PurchaseCredit']:
-        queryset = PurchaseCredit.objects.filter(user=user, is_expired=False)
-        remaining_credits: list[PurchaseCredit] = [purchase_credit for purchase_credit in queryset if
-                                                   purchase_credit.remaining_count > 0]
-        return remaining_credits
+        return list(self.get_queryset().remaining().filter(user=user))
 
 
 class UseCreditManager(models.Manager):
@@ -61,6 +114,28 @@ class UseCreditManager(models.Manager):
     def create(self, **kwargs):
         return super().create(**kwargs, type=CreditType.USE)
 
+    def bulk_create(self, objs, *args, **kwargs) -> list['UseCredit']:
+        for use_credit in objs:
+            use_credit.type = CreditType.USE
+
+        remaining_counts: dict[int, int] = {}
+        balance_counts: dict[int, int] = {}
+        for use_credit in objs:
+            remaining_counts[use_credit.purchased_credit_id] = (
+                    remaining_counts.get(use_credit.purchased_credit_id, 0) + use_credit.count)
+            balance_counts[use_credit.user_id] = balance_counts.get(use_credit.user_id, 0) + use_credit.count
+
+        db: str = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=db):
+            use_credits: list[UseCredit] = super().bulk_create(objs, *args, **kwargs)
+            Credit.objects.using(db).filter(pk__in=remaining_counts).update(
+                remaining_count=F('remaining_count') + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in remaining_counts.items()],
+                    default=Value(0), output_field=IntegerField()))
+            for user_id, count in balance_counts.items():
+                CreditBalance.objects.db_manager(db).add(user_id, count)
+        return use_credits
+
 
 class RefundCreditManager(models.Manager):
     def get_queryset(self):
@@ -70,6 +145,142 @@ class RefundCreditManager(models.Manager):
         return super().create(**kwargs, type=CreditType.REFUND)
 
 
+class CreditManager(models.Manager):
+    def get_ledger_version(self, user) -> tuple:
+        version: dict = self.filter(user=user).aggregate(latest_modified=Max('modified'), credit_count=Count('id'))
+        return version['latest_modified'], version['credit_count']
+
+
+class CreditBalanceManager(models.Manager):
+    def add(self, user_id: int, count: int) -> None:
+        if not count:
+            return
+        updated: int = self.filter(user_id=user_id).update(
+            count=F('count') + count, modified=timezone.now())
+        if not updated:
+            balance, created = self.get_or_create(user_id=user_id, defaults={'count': count})
+            if not created:
+                self.filter(user_id=user_id).update(count=F('count') + count, modified=timezone.now())
+
+    def subtract_remaining_counts(self, purchase_credit_ids: list[int]) -> None:
+        remaining_count = (Credit.objects
+                           .filter(user=OuterRef('user'), id__in=purchase_credit_ids)
+                           .values('user')
+                           .annotate(count_sum=Sum('remaining_count'))
+                           .values('count_sum'))
+        self.filter(user__in=Credit.objects.filter(id__in=purchase_credit_ids).values('user')).update(
+            count=F('count') - Coalesce(Subquery(remaining_count), 0), modified=timezone.now())
+
+    def get_count(self, user) -> int:
+        count: int = self.filter(user=user).values_list('count', flat=True).first()
+        return count if count else 0
+
+    async def aget_count(self, user) -> int:
+        count: int = await self.filter(user=user).values_list('count', flat=True).afirst()
+        return count if count else 0
+
+    def get_ledger_counts(self) -> dict[int, int]:
+        ledger_counts: dict[int, int] = {
+            ledger_count['user']: ledger_count['count_sum']
+            for ledger_count in Credit.objects.values('user').annotate(count_sum=Sum('count')).order_by()}
+        # 보관된 크레딧은 원장에서 빠지고 archived_count에 합계로 남는다.
+        for user_id, archived_count in self.exclude(archived_count=0).values_list('user_id', 'archived_count'):
+            ledger_counts[user_id] = ledger_counts.get(user_id, 0) + archived_count
+        return ledger_counts
+
+    def get_archive_counts(self) -> dict[int, int]:
+        archive_counts = CreditArchive.objects.values('user').annotate(count_sum=Sum('count')).order_by()
+        return {archive_count['user']: archive_count['count_sum'] for archive_count in archive_counts}
+
+
+class CreditExpiryWatermarkManager(models.Manager):
+    cache_key = 'credit:expiry-watermark'
+    cache_timeout = 60 * 5
+
+    def get_expired_until(self) -> datetime.date | None:
+        expired_until: datetime.date | None = cache.get(self.cache_key)
+        if expired_until is None:
+            expired_until = self.values_list('expired_until', flat=True).first()
+            cache.set(self.cache_key, expired_until, self.cache_timeout)
+        return expired_until
+
+    def is_current(self) -> bool:
+        expired_until: datetime.date | None = self.get_expired_until()
+        return expired_until is not None and expired_until >= timezone.now().date()
+
+    def advance(self, expired_until: datetime.date) -> None:
+        self.update_or_create(pk=1, defaults={'expired_until': expired_until})
+        cache.set(self.cache_key, expired_until, self.cache_timeout)
+
+
+class CreditArchiveManager(models.Manager):
+    archived_fields: tuple[str, ...] = (
+        'id', 'user_id', 'count', 'type', 'start_date', 'period', 'end_date', 'price_policy_id', 'reservation_id',
+        'is_expired', 'expired_credit_id', 'purchased_credit_id', 'message', 'remaining_count', 'created', 'modified',
+    )
+
+    def archive(self, purchase_credit_ids: list[int], end_date_before: datetime.date) -> int:
+        """구매 크레딧과 그 크레딧의 사용/환불/만료 내역을 CreditArchive로 옮기고 원장(Credit)에서 지운다.
+
+        예약 하나를 여러 구매 크레딧으로 결제했으면 그 구매 크레딧들을 함께 옮기고, 그중 하나라도
+        끝나지 않았으면(closed가 아니면) 모두 남겨 예약의 사용 내역이 원장과 보관 테이블로 나뉘지 않게 한다.
+        옮긴 크레딧 개수의 합은 사용자별 CreditBalance.archived_count에 더하므로 잔고는 바뀌지 않는다.
+        """
+        db: str = router.db_for_write(Credit)
+        with transaction.atomic(using=db):
+            purchase_credit_ids = self.get_archivable_ids(db, purchase_credit_ids, end_date_before)
+            if not purchase_credit_ids:
+                return 0
+
+            credits = Credit.objects.using(db).select_for_update().filter(
+                Q(id__in=purchase_credit_ids) | Q(purchased_credit__in=purchase_credit_ids)
+                | Q(expired_credit__in=purchase_credit_ids))
+            rows: list[dict] = list(credits.values(*self.archived_fields))
+
+            now: datetime.datetime = timezone.now()
+            self.db_manager(db).bulk_create([CreditArchive(**row, archived=now) for row in rows])
+            archived_counts: dict[int, int] = {}
+            for row in rows:
+                archived_counts[row['user_id']] = archived_counts.get(row['user_id'], 0) + row['count']
+            for user_id, count in archived_counts.items():
+                CreditBalance.objects.db_manager(db).filter(user_id=user_id).update(
+                    archived_count=F('archived_count') + count, modified=now)
+            Credit.objects.using(db).filter(id__in=[row['id'] for row in rows]).delete()
+            return len(rows)
+
+    @staticmethod
+    def get_archivable_ids(db: str, purchase_credit_ids: list[int], end_date_before: datetime.date) -> list[int]:
+        """purchase_credit_ids와 예약을 함께 결제한 구매 크레딧까지 모아, 함께 결제한 구매 크레딧이 모두 closed인 것만 고른다."""
+        purchase_ids: set[int] = set(purchase_credit_ids)
+        # (예약 id, 구매 크레딧 id). 같은 예약을 결제한 구매 크레딧끼리 묶는다.
+        payments: set[tuple[int, int]] = set()
+        new_ids: set[int] = purchase_ids
+        while new_ids:
+            reservation_ids = Credit.objects.using(db).filter(
+                purchased_credit__in=new_ids, reservation__isnull=False).values('reservation_id')
+            rows: set[tuple[int, int]] = set(
+                Credit.objects.using(db)
+                .filter(reservation__in=reservation_ids, purchased_credit__isnull=False)
+                .values_list('reservation_id', 'purchased_credit_id'))
+            payments |= rows
+            new_ids = {purchase_id for _, purchase_id in rows} - purchase_ids
+            purchase_ids |= new_ids
+
+        closed_ids: set[int] = set(
+            PurchaseCredit.objects.get_queryset().using(db)
+            .closed(end_date_before).filter(id__in=purchase_ids).values_list('id', flat=True))
+        open_ids: set[int] = purchase_ids - closed_ids
+        while True:
+            open_reservation_ids: set[int] = {
+                reservation_id for reservation_id, purchase_id in payments if purchase_id in open_ids}
+            new_open_ids: set[int] = {
+                purchase_id for reservation_id, purchase_id in payments
+                if reservation_id in open_reservation_ids} - open_ids
+            if not new_open_ids:
+                return sorted(purchase_ids - open_ids)
+            open_ids |= new_open_ids
+
+
 class PricePolicy(TimeStampedModel):
     name = models.CharField(verbose_name=_("정책명"), max_length=32)
     price = models.PositiveIntegerField(verbose_name=_("가격(원)"))
@@ -86,8 +297,16 @@ class PricePolicy(TimeStampedModel):
     def credit_message(self):
         return f'{self.name} 회원권 구매'
 
+    @staticmethod
+    def invalidate_cache() -> None:
+        price_policy_cache.bump('list')
+
 
 class Credit(TimeStampedModel):
+    """크레딧 원장. 잔고(CreditBalance)와 구매 크레딧의 remaining_count는 행을 추가할 때만 반영하므로 행을 고치거나 지우지 않는다.
+
+    원장을 직접 고쳐 값이 어긋나면 rebuild_credit_balance로 다시 계산한다.
+    """
     user = models.ForeignKey(
         verbose_name=_("사용자"), to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="credits")
     count = models.IntegerField(verbose_name=_("크레딧 개수"))
@@ -99,7 +318,7 @@ class Credit(TimeStampedModel):
     price_policy = models.ForeignKey(
         verbose_name=_("가격 정책"), to=PricePolicy, on_delete=models.SET_NULL, null=True, blank=True)
     reservation = models.ForeignKey(
-        verbose_name=_("예약"), to=Reservation, on_delete=models.CASCADE, null=True, blank=True, related_name="credits")
+        verbose_name=_("예약"), to=Reservation, on_delete=models.RESTRICT, null=True, blank=True, related_name="credits")
     is_expired = models.BooleanField(default=False)
     expired_credit = models.ForeignKey(
         verbose_name=_("만료된 크레딧"), to='self', on_delete=models.CASCADE, null=True, blank=True)
@@ -107,13 +326,55 @@ class Credit(TimeStampedModel):
         verbose_name=_("구매된 크레딧"), to='PurchaseCredit', on_delete=models.CASCADE,
         null=True, blank=True, related_name="used_credits")
     message = models.CharField(max_length=64)
+    remaining_count = models.IntegerField(verbose_name=_("남은 크레딧 개수"), default=0, editable=False)
+    objects = CreditManager()
 
     class Meta:
         verbose_name = '크레딧'
+        indexes = [
+            models.Index(fields=['user', 'created', 'id'], name='credit_user_created_idx'),
+            models.Index(
+                fields=['user', 'start_date'], name='credit_open_purchase_idx',
+                condition=Q(type=CreditType.PURCHASE, is_expired=False, remaining_count__gt=0)),
+            # 회원별 만료 처리(CustomUser.expire_credit)와 전체 만료 처리(expire_credits)는
+            # 만료되지 않은 구매 크레딧만 찾는다.
+            models.Index(
+                fields=['user', 'end_date'], name='credit_unexpired_purchase_idx',
+                condition=Q(type=CreditType.PURCHASE, is_expired=False)),
+            models.Index(
+                fields=['end_date', 'id'], name='credit_expiry_due_idx',
+                condition=Q(type=CreditType.PURCHASE, is_expired=False)),
+        ]
 
     def __str__(self):
         return f'[{self.user}] {self.message}'
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super(Credit, self).save(*args, **kwargs)
+
+        with transaction.atomic():
+            super(Credit, self).save(*args, **kwargs)
+            CreditBalance.objects.add(self.user_id, self.count)
+            if self.purchased_credit_id:
+                Credit.objects.filter(pk=self.purchased_credit_id).update(
+                    remaining_count=F('remaining_count') + self.count)
+
+
+class CreditBalance(TimeStampedModel):
+    user = models.OneToOneField(
+        verbose_name=_("사용자"), to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="credit_balance")
+    count = models.IntegerField(verbose_name=_("크레딧 잔고"), default=0)
+    archived_count = models.IntegerField(
+        verbose_name=_("보관된 크레딧 합계"), default=0, help_text=_("CreditArchive로 옮긴 크레딧 개수의 합"))
+    objects = CreditBalanceManager()
+
+    class Meta:
+        verbose_name = '크레딧 잔고'
+
+    def __str__(self):
+        return f'[{self.user}] {self.count}'
+
 
 class PurchaseCredit(Credit):
     objects = PurchaseCreditManager()
@@ -122,12 +383,6 @@ class PurchaseCredit(Credit):
         proxy = True
         ordering = ['start_date']
 
-    @property
-    def remaining_count(self) -> int:
-        used_credits: dict = self.used_credits.all().aggregate(Sum('count'))
-        used_credit_count: int = used_credits['count__sum'] if used_credits['count__sum'] else 0
-        return self.count + used_credit_count
-
 
 class UseCredit(Credit):
     objects = UseCreditManager()
@@ -141,3 +396,58 @@ class RefundCredit(Credit):
 
     class Meta:
         proxy = True
+
+
+class CreditArchive(models.Model):
+    """원장에서 옮긴 끝난 크레딧 내역. id와 각 값은 Credit에 있던 그대로이고, 감사용으로 조회만 한다.
+
+    가격 정책, 예약, 원래 크레딧이 지워져도 내역이 남도록 외래 키 제약을 두지 않는다.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        verbose_name=_("사용자"), to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name="archived_credits")
+    count = models.IntegerField(verbose_name=_("크레딧 개수"))
+    type = models.CharField(verbose_name=_("크레딧 종류"), max_length=8, choices=CreditType.choices)
+    start_date = models.DateField(verbose_name=_("시작일"))
+    period = models.PositiveIntegerField(verbose_name=_("사용기간(일)"), null=True, blank=True)
+    end_date = models.DateField(verbose_name=_("종료일"), null=True, blank=True)
+    price_policy = models.ForeignKey(
+        verbose_name=_("가격 정책"), to=PricePolicy, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="+")
+    reservation = models.ForeignKey(
+        verbose_name=_("예약"), to=Reservation, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="+")
+    is_expired = models.BooleanField(default=False)
+    expired_credit = models.ForeignKey(
+        verbose_name=_("만료된 크레딧"), to='self', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="+")
+    purchased_credit = models.ForeignKey(
+        verbose_name=_("구매된 크레딧"), to='self', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="+")
+    message = models.CharField(max_length=64)
+    remaining_count = models.IntegerField(verbose_name=_("남은 크레딧 개수"), default=0)
+    created = models.DateTimeField(verbose_name=_("생성시간"))
+    modified = models.DateTimeField(verbose_name=_("수정시간"))
+    archived = models.DateTimeField(verbose_name=_("보관시간"))
+    objects = CreditArchiveManager()
+
+    class Meta:
+        verbose_name = '보관된 크레딧'
+        indexes = [
+            models.Index(fields=['user', 'created', 'id'], name='credit_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'[{self.user}] {self.message}'
+
+
+class CreditExpiryWatermark(TimeStampedModel):
+    expired_until = models.DateField(verbose_name=_("만료 처리 기준일"), help_text=_("이 날짜 이전에 종료된 크레딧은 모두 만료 처리됨"))
+    objects = CreditExpiryWatermarkManager()
+
+    class Meta:
+        verbose_name = '크레딧 만료 처리 기록'
+
+    def __str__(self):
+        return f'{self.expired_until}'
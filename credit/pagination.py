@@ -0,0 +1,9 @@
+from core.pagination import KeysetCursorPagination
+
+
+class CreditLedgerCursorPagination(KeysetCursorPagination):
+    # credit_user_created_idx(user, created, id) 순서로 읽는다. bulk_create로 만든 사용 내역은 created가 같을 수 있다.
+    ordering = ('-created', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -1,7 +1,10 @@
+import datetime
+
 from rest_framework import serializers
 from rest_framework.relations import PrimaryKeyRelatedField
 
-from credit.models import PricePolicy, Credit, PurchaseCredit
+from core.exports import ExportQuerySerializer
+from credit.models import PricePolicy, Credit, PurchaseCredit, CreditType
 from user.models import CustomUser
 from user.serializers import UserSerializer
 
@@ -32,3 +35,34 @@ class CreditBuySerializer(serializers.ModelSerializer):
         user: CustomUser = kwargs.get('user', None)
         assert user is not None
         return user.buy_credit(**self.validated_data)
+
+
+class CreditLedgerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Credit
+        fields = ('id', 'type', 'count', 'message', 'start_date', 'end_date', 'remaining_count', 'is_expired',
+                  'price_policy', 'reservation', 'purchased_credit', 'created', )
+
+
+class CreditLedgerFilterSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=CreditType.choices, required=False, label="크레딧 종류")
+    created_from = serializers.DateField(required=False, label="생성일 시작일")
+    created_to = serializers.DateField(required=False, label="생성일 종료일")
+
+    def filter_queryset(self, queryset):
+        credit_type: str = self.validated_data.get('type')
+        created_from: datetime.date = self.validated_data.get('created_from')
+        created_to: datetime.date = self.validated_data.get('created_to')
+
+        if credit_type:
+            queryset = queryset.filter(type=credit_type)
+        if created_from:
+            queryset = queryset.filter(created__gte=datetime.datetime.combine(created_from, datetime.time.min))
+        if created_to:
+            queryset = queryset.filter(
+                created__lt=datetime.datetime.combine(created_to + datetime.timedelta(1), datetime.time.min))
+        return queryset
+
+
+class CreditLedgerExportQuerySerializer(CreditLedgerFilterSerializer, ExportQuerySerializer):
+    archived = serializers.BooleanField(default=False, label="보관된 크레딧 내역 내보내기")
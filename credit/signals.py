@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from credit.models import PricePolicy
+
+
+@receiver(post_save, sender=PricePolicy)
+@receiver(post_delete, sender=PricePolicy)
+def invalidate_price_policy_cache(sender, instance: PricePolicy, **kwargs):
+    PricePolicy.invalidate_cache()
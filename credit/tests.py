@@ -1,12 +1,27 @@
 import datetime
+import json
+from io import StringIO
+from unittest import mock, skipUnless
 
+from django.core.management import call_command, CommandError
+from django.contrib import admin
+from django.db import connection
+from django.db.models import Q, RestrictedError
+from django.test import override_settings, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.test import APIClient
 from rest_framework.response import Response
 
 from core.tests import BaseTest
-from credit.models import PricePolicy, Credit, PurchaseCredit, CreditType
+from credit.views import CreditLedgerExportAPIView
+from user.models import CustomUser
+from credit.models import PricePolicy, Credit, PurchaseCredit, CreditType, CreditBalance, CreditExpiryWatermark, \
+    CreditArchive, PurchaseCreditQuerySet
 from credit.serializers import PricePolicySerializer, CreditBuySerializer
+from lesson.models import Gym, LessonType, Lesson, Reservation
 
 
 class CreditTestCase(BaseTest):
@@ -22,6 +37,21 @@ class CreditTestCase(BaseTest):
         for key in self.policy_data:
             self.assertEqual(self.policy_data[key], data[key])
 
+    def test_price_policy_view_cache(self):
+        PricePolicy.objects.create(**self.policy_data)
+        self.user_client.get(reverse('price-policy'))
+        response: Response = self.user_client.get(reverse('price-policy'))
+        self.assertEqual(response.query_stats.count, 2)
+        self.assertEqual(len(response.data), 1)
+
+        self.user_client.post(reverse('price-policy'), data=self.policy_data)
+        response: Response = self.user_client.get(reverse('price-policy'))
+        self.assertEqual(len(response.data), 2)
+
+        PricePolicy.objects.first().delete()
+        response: Response = self.user_client.get(reverse('price-policy'))
+        self.assertEqual(len(response.data), 1)
+
     def test_credit_model(self):
         price_policy = PricePolicy.objects.create(**self.policy_data)
         credit = PurchaseCredit.objects.create(
@@ -70,4 +100,404 @@ class CreditTestCase(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         for key in data:
             self.assertEqual(response.data[key], data[key])
+        self.assertWithinQueryBudget(response)
+
+
+
+class CreditBalanceTestCase(BaseTest):
+    def test_balance_follows_ledger(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.assertEqual(CreditBalance.objects.get_count(self.user), 0)
+
+        self.user.buy_credit(price_policy, self.today)
+        self.user.buy_credit(price_policy, self.today)
+        self.assertEqual(CreditBalance.objects.get_count(self.user), price_policy.credit_count * 2)
+        self.assertEqual(CreditBalance.objects.get_count(self.admin), 0)
+
+        year_ago = self.today - datetime.timedelta(365)
+        self.user.buy_credit(price_policy, year_ago)
+        self.user.expire_credit()
+        self.assertEqual(CreditBalance.objects.get_count(self.user), price_policy.credit_count * 2)
+        self.assertEqual(CreditBalance.objects.get_ledger_counts()[self.user.id], price_policy.credit_count * 2)
+
+    def test_ledger_is_append_only(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        lesson = Lesson.objects.create(**CreditArchiveTestCase.lesson_data)
+        reservation: Reservation = Reservation.objects.reserve(self.user, lesson)
+        # 사용 내역이 있는 예약과 수업은 지울 수 없으므로 잔고가 원장과 어긋나지 않는다.
+        self.assertRaises(RestrictedError, reservation.delete)
+        self.assertRaises(RestrictedError, lesson.delete)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        credit_admin = admin.site._registry[Credit]
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        self.assertFalse(credit_admin.has_add_permission(request))
+        self.assertFalse(credit_admin.has_change_permission(request, reservation.credits.first()))
+        self.assertFalse(credit_admin.has_delete_permission(request, reservation.credits.first()))
+
+        # 유저를 지우면 원장과 잔고를 함께 지운다.
+        self.user.delete()
+        self.assertFalse(Credit.objects.exists())
+        self.assertFalse(CreditBalance.objects.exists())
+
+    def test_rebuild_credit_balance_command(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        CreditBalance.objects.filter(user=self.user).update(count=0)
+        self.assertRaises(CommandError, call_command, 'rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        call_command('rebuild_credit_balance', stdout=StringIO())
+        self.assertEqual(CreditBalance.objects.get_count(self.user), price_policy.credit_count)
+
+        CreditBalance.objects.filter(user=self.user).delete()
+        call_command('rebuild_credit_balance', stdout=StringIO())
+        self.assertEqual(CreditBalance.objects.get_count(self.user), price_policy.credit_count)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+    def test_rebuild_remaining_count_command(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        purchase_credit = self.user.buy_credit(price_policy, self.today)
+        PurchaseCredit.objects.filter(pk=purchase_credit.pk).update(remaining_count=0)
+        self.assertRaises(CommandError, call_command, 'rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        call_command('rebuild_credit_balance', stdout=StringIO())
+        purchase_credit.refresh_from_db()
+        self.assertEqual(purchase_credit.remaining_count, price_policy.credit_count)
+
+
+class PurchaseCreditTestCase(BaseTest):
+    lesson_data = {
+        'gym': Gym.SEOUL,
+        'type': LessonType.YOGA,
+        'credit_count': 100,
+        'max_capacity': 10,
+        'start_date': BaseTest.ten_day_later,
+        'start_time': datetime.time(13, 0),
+        'end_time': datetime.time(15, 0),
+    }
+
+    def test_remaining_count_follows_use_and_refund(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        purchase_credit = self.user.buy_credit(price_policy, self.today)
+        self.assertEqual(purchase_credit.remaining_count, price_policy.credit_count)
+
+        reservation = Reservation.objects.reserve(self.user, lesson)
+        purchase_credit.refresh_from_db()
+        self.assertEqual(purchase_credit.remaining_count, price_policy.credit_count - lesson.credit_count)
+
+        reservation.cancel(self.user)
+        purchase_credit.refresh_from_db()
+        self.assertEqual(purchase_credit.remaining_count, price_policy.credit_count)
+
+        ledger_credit = PurchaseCredit.objects.filter(pk=purchase_credit.pk).annotate_ledger_remaining_count().get()
+        self.assertEqual(ledger_credit.ledger_remaining_count, purchase_credit.remaining_count)
+
+    def test_get_remaining_credits_query_count(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        with CaptureQueriesContext(connection) as expected_num_queries:
+            self.assertEqual(len(PurchaseCredit.objects.get_remaining_credits(self.user)), 1)
+
+        for _ in range(10):
+            self.user.buy_credit(price_policy, self.today)
+
+        with CaptureQueriesContext(connection) as checked_num_queries:
+            self.assertEqual(len(PurchaseCredit.objects.get_remaining_credits(self.user)), 11)
+        self.assertEqual(len(expected_num_queries), len(checked_num_queries))
+
+
+class CreditExpiryTestCase(BaseTest):
+    year_ago: datetime.date = BaseTest.today - datetime.timedelta(365)
+
+    def test_expire_credits_command(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        for user in (self.user, self.admin):
+            user.buy_credit(price_policy, self.year_ago)
+            user.buy_credit(price_policy, self.year_ago)
+            user.buy_credit(price_policy, self.today)
+        self.assertFalse(CreditExpiryWatermark.objects.is_current())
+
+        call_command('expire_credits', '--chunk-size', '1', stdout=StringIO())
+
+        self.assertTrue(CreditExpiryWatermark.objects.is_current())
+        for user in (self.user, self.admin):
+            self.assertEqual(CreditBalance.objects.get_count(user), price_policy.credit_count)
+            self.assertEqual(PurchaseCredit.objects.filter(user=user, is_expired=True).count(), 2)
+        self.assertEqual(Credit.objects.filter(type=CreditType.EXPIRED).count(), 4)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        call_command('expire_credits', stdout=StringIO())
+        self.assertEqual(Credit.objects.filter(type=CreditType.EXPIRED).count(), 4)
+
+    def test_expire_in_batches(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        for _ in range(5):
+            self.user.buy_credit(price_policy, self.year_ago)
+        self.user.buy_credit(price_policy, self.today)
+
+        with mock.patch.object(PurchaseCreditQuerySet, 'expire_batch_size', 2):
+            expired_count: int = PurchaseCredit.objects.filter(
+                user=self.user, end_date__lt=self.today, is_expired=False).expire()
+        self.assertEqual(expired_count, 5)
+        self.assertEqual(Credit.objects.filter(type=CreditType.EXPIRED).count(), 5)
+        self.assertEqual(CreditBalance.objects.get_count(self.user), price_policy.credit_count)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+    @override_settings(CREDIT_EXPIRE_ON_READ=False)
+    def test_expire_on_read_disabled(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.year_ago)
+        self.assertEqual(self.user.credit_count, 0)
+
+        call_command('expire_credits', stdout=StringIO())
+        self.user.buy_credit(price_policy, self.year_ago)
+        with CaptureQueriesContext(connection) as num_queries:
+            self.assertEqual(self.user.credit_count, price_policy.credit_count)
+        self.assertEqual(len(num_queries), 1)
+
+        call_command('expire_credits', stdout=StringIO())
+        self.assertEqual(self.user.credit_count, 0)
+
+    def test_expire_queries_indexed(self):
+        unexpired_purchase = Q(type=CreditType.PURCHASE, is_expired=False)
+        self.assertIndexed(Credit, 'credit_unexpired_purchase_idx', ['user', 'end_date'], unexpired_purchase)
+        self.assertIndexed(Credit, 'credit_expiry_due_idx', ['end_date', 'id'], unexpired_purchase)
+        self.assertIndexed(Credit, 'credit_open_purchase_idx', ['user', 'start_date'],
+                           Q(type=CreditType.PURCHASE, is_expired=False, remaining_count__gt=0))
+
+    @skipUnless(connection.vendor == 'sqlite', '실행 계획은 DB마다 다르다')
+    def test_expire_queries_use_index(self):
+        expired_credits = PurchaseCredit.objects.filter(user=self.user, end_date__lt=self.today, is_expired=False)
+        self.assertIn('credit_unexpired_purchase_idx', expired_credits.explain())
+        due_credits = (PurchaseCredit.objects
+                       .filter(Q(end_date__gt=self.year_ago) | Q(end_date=self.year_ago, id__gt=1),
+                               is_expired=False, end_date__lt=self.today)
+                       .order_by('end_date', 'id').values_list('id', 'end_date'))
+        self.assertIn('credit_expiry_due_idx', due_credits.explain())
+        remaining_credits = PurchaseCredit.objects.get_queryset().remaining().filter(user=self.user)
+        self.assertIn('credit_open_purchase_idx', remaining_credits.explain())
+
+
+
+class CreditArchiveTestCase(BaseTest):
+    year_ago: datetime.date = BaseTest.today - datetime.timedelta(365)
+    lesson_data = {
+        'gym': Gym.SEOUL,
+        'type': LessonType.YOGA,
+        'credit_count': 100,
+        'max_capacity': 10,
+        'start_date': BaseTest.ten_day_later,
+        'start_time': datetime.time(13, 0),
+        'end_time': datetime.time(15, 0),
+    }
+
+    def _buy_and_reserve(self, price_policy: PricePolicy) -> tuple[PurchaseCredit, Lesson]:
+        purchase_credit: PurchaseCredit = self.user.buy_credit(price_policy, self.today)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        Reservation.objects.reserve(self.user, lesson)
+        Credit.objects.filter(pk=purchase_credit.pk).update(end_date=self.year_ago)
+        return purchase_credit, lesson
+
+    def test_archive_credits_command(self):
+        price_policy = PricePolicy.objects.create(**{**self.policy_data, 'credit_count': 100})
+        # 모두 사용했고 수업도 끝난 구매 크레딧
+        used_credit, past_lesson = self._buy_and_reserve(price_policy)
+        Lesson.objects.filter(pk=past_lesson.pk).update(start_date=self.ten_day_ago)
+        # 모두 사용했지만 아직 취소할 수 있는 수업에 쓴 구매 크레딧
+        cancelable_credit, future_lesson = self._buy_and_reserve(price_policy)
+        expired_credit: PurchaseCredit = self.user.buy_credit(price_policy, self.year_ago)
+        live_credit: PurchaseCredit = self.user.buy_credit(price_policy, self.today)
+        call_command('expire_credits', stdout=StringIO())
+        credit_count: int = self.user.credit_count
+        ledger: list[dict] = list(Credit.objects.order_by('id').values())
+
+        archived_ids: set[int] = {
+            used_credit.id, expired_credit.id,
+            *Credit.objects.filter(purchased_credit=used_credit).values_list('id', flat=True),
+            *Credit.objects.filter(expired_credit=expired_credit).values_list('id', flat=True)}
+
+        out = StringIO()
+        call_command('archive_credits', '--days', '30', '--chunk-size', '1', stdout=out)
+        self.assertIn('4 credit(s) archived', out.getvalue())
+        self.assertEqual(set(CreditArchive.objects.values_list('id', flat=True)), archived_ids)
+        self.assertFalse(Credit.objects.filter(id__in=archived_ids).exists())
+        self.assertEqual(PurchaseCredit.objects.filter(id__in=[cancelable_credit.id, live_credit.id]).count(), 2)
+        for row in ledger:
+            if row['id'] in archived_ids:
+                archived: dict = CreditArchive.objects.filter(id=row['id']).values(*row.keys()).get()
+                self.assertEqual(archived, row)
+
+        self.assertEqual(self.user.credit_count, credit_count)
+        self.assertEqual(CreditBalance.objects.get(user=self.user).archived_count,
+                         sum(CreditArchive.objects.values_list('count', flat=True)))
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+        future_lesson.reservations.get().cancel(self.user)
+        self.assertEqual(self.user.credit_count, credit_count + future_lesson.get_cancel_credit())
+        call_command('archive_credits', '--days', '30', stdout=out)
+        self.assertIn('0 credit(s) archived', out.getvalue())
+
+    def test_archive_keeps_reservation_credits_together(self):
+        price_policy = PricePolicy.objects.create(**{**self.policy_data, 'credit_count': 100})
+        first_credit: PurchaseCredit = self.user.buy_credit(price_policy, self.today)
+        second_credit: PurchaseCredit = self.user.buy_credit(price_policy, self.today)
+        # 첫 구매 크레딧 100개와 두 번째 구매 크레딧 50개로 결제한 예약
+        split_lesson = self.create_lesson(self.lesson_data, credit_count=150)
+        split_reservation: Reservation = Reservation.objects.reserve(self.user, split_lesson)
+        # 남은 50개를 모두 쓴 예약. 수업이 오늘이라 아직 끝나지 않았다.
+        live_lesson = self.create_lesson(self.lesson_data, credit_count=50)
+        live_reservation: Reservation = Reservation.objects.reserve(self.user, live_lesson)
+        Lesson.objects.filter(pk=split_lesson.pk).update(start_date=self.ten_day_ago)
+        Lesson.objects.filter(pk=live_lesson.pk).update(start_date=self.today)
+        Credit.objects.filter(pk=first_credit.pk).update(end_date=self.year_ago)
+        self.assertEqual(split_reservation.credits.count(), 2)
+
+        # 두 번째 구매 크레딧이 오늘 수업 예약에 쓰였으므로 같은 예약을 결제한 첫 구매 크레딧도 남긴다.
+        out = StringIO()
+        call_command('archive_credits', '--days', '30', '--chunk-size', '1', stdout=out)
+        self.assertIn('0 credit(s) archived', out.getvalue())
+        self.assertEqual(split_reservation.credits.count(), 2)
+        self.assertEqual(live_reservation.credits.count(), 1)
+
+        Lesson.objects.filter(pk=live_lesson.pk).update(start_date=self.ten_day_ago)
+        Credit.objects.filter(pk=second_credit.pk).update(end_date=self.year_ago)
+        credit_count: int = self.user.credit_count
+        call_command('archive_credits', '--days', '30', '--chunk-size', '1', stdout=out)
+        self.assertIn('5 credit(s) archived', out.getvalue())
+        self.assertFalse(Credit.objects.filter(user=self.user).exists())
+        self.assertEqual(CreditArchive.objects.filter(reservation=split_reservation).count(), 2)
+        self.assertEqual(self.user.credit_count, credit_count)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+    def test_rebuild_archived_count(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.year_ago)
+        call_command('expire_credits', stdout=StringIO())
+        call_command('archive_credits', '--days', '30', stdout=StringIO())
+        CreditBalance.objects.filter(user=self.user).update(archived_count=10)
+
+        self.assertRaises(CommandError, call_command, 'rebuild_credit_balance', '--verify', stdout=StringIO())
+        call_command('rebuild_credit_balance', stdout=StringIO())
+        self.assertEqual(CreditBalance.objects.get(user=self.user).archived_count, 0)
+        call_command('rebuild_credit_balance', '--verify', stdout=StringIO())
+
+    def test_archived_credit_export_view(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.year_ago)
+        call_command('expire_credits', stdout=StringIO())
+        call_command('archive_credits', '--days', '30', stdout=StringIO())
+
+        archive_admin = admin.site._registry[CreditArchive]
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        self.assertFalse(archive_admin.has_delete_permission(request, CreditArchive.objects.first()))
+
+        response = self.admin_client.get(reverse('credit-ledger-export'), data={'archived': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows: list[dict] = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['type'] for row in rows], [CreditType.PURCHASE, CreditType.EXPIRED])
+        self.assertEqual(rows[0]['user'], self.user.id)
+
+        response = self.admin_client.get(reverse('credit-ledger-export'))
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+class CreditLedgerTestCase(BaseTest):
+    def _buy_credits(self, count: int) -> PricePolicy:
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        for _ in range(count):
+            self.user.buy_credit(price_policy, self.today)
+        self.admin.buy_credit(price_policy, self.today)
+        return price_policy
+
+    def test_credit_ledger_view(self):
+        self._buy_credits(5)
+        response: Response = self.user_client.get(reverse('credit-ledger'), data={'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page: list[dict] = response.data['results']
+        self.assertEqual(len(first_page), 3)
+
+        response: Response = self.user_client.get(response.data['next'])
+        second_page: list[dict] = response.data['results']
+        self.assertEqual(len(second_page), 2)
+
+        credit_ids: list[int] = [credit['id'] for credit in first_page + second_page]
+        self.assertEqual(credit_ids, list(
+            Credit.objects.filter(user=self.user).order_by('-created', '-id').values_list('id', flat=True)))
+
+    def test_credit_ledger_view_same_created(self):
+        self._buy_credits(5)
+        # 한 번에 bulk_create한 사용 내역처럼 created가 모두 같아도 id로 이어 읽는다.
+        Credit.objects.filter(user=self.user).update(created=timezone.now())
+        credit_ids: list[int] = []
+        response: Response = self.user_client.get(reverse('credit-ledger'), data={'page_size': 2})
+        credit_ids += [credit['id'] for credit in response.data['results']]
+        while response.data['next']:
+            response = self.user_client.get(response.data['next'])
+            credit_ids += [credit['id'] for credit in response.data['results']]
+        self.assertEqual(credit_ids, list(
+            Credit.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True)))
+
+    def test_credit_ledger_view_filter(self):
+        self._buy_credits(2)
+        response: Response = self.user_client.get(reverse('credit-ledger'), data={'type': CreditType.USE})
+        self.assertEqual(len(response.data['results']), 0)
+
+        response: Response = self.user_client.get(
+            reverse('credit-ledger'), data={'created_from': self.today, 'created_to': self.today})
+        self.assertEqual(len(response.data['results']), 2)
+
+        response: Response = self.user_client.get(
+            reverse('credit-ledger'), data={'created_to': self.ten_day_ago})
+        self.assertEqual(len(response.data['results']), 0)
+
+        response: Response = APIClient().get(reverse('credit-ledger'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_credit_ledger_view_not_modified(self):
+        price_policy: PricePolicy = self._buy_credits(1)
+        etag: str = self.user_client.get(reverse('credit-ledger'))['ETag']
+        response: Response = self.user_client.get(reverse('credit-ledger'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.query_stats.count, 3)
+
+        self.admin.buy_credit(price_policy, self.today)
+        response: Response = self.user_client.get(reverse('credit-ledger'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.buy_credit(price_policy, self.today)
+        response: Response = self.user_client.get(reverse('credit-ledger'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_credit_ledger_export_view(self):
+        self._buy_credits(3)
+        credit_ids: list[int] = list(Credit.objects.order_by('id').values_list('id', flat=True))
+        response = self.admin_client.get(reverse('credit-ledger-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows: list[dict] = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], credit_ids)
+        self.assertEqual(rows[0]['start_date'], str(self.today))
+
+        response = self.admin_client.get(
+            reverse('credit-ledger-export'), data={'export_format': 'csv', 'after': credit_ids[1]})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines: list[str] = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([int(line.split(',')[1]) for line in lines], credit_ids[2:])
+
+        response = self.admin_client.get(reverse('credit-ledger-export'), data={'export_format': 'csv'})
+        lines: list[str] = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(CreditLedgerExportAPIView.fields))
+        self.assertEqual(len(lines), len(credit_ids) + 1)
 
+        CustomUser.objects.create_user('member', password='member')
+        member_client = APIClient()
+        member_client.login(username='member', password='member')
+        response: Response = member_client.get(reverse('credit-ledger-export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -5,4 +5,6 @@ from credit import views
 urlpatterns = [
     path('', views.CreditAPIView.as_view(), name='credit'),
     path('price-policy/', views.PricePolicyAPIView.as_view(), name='price-policy'),
+    path('ledger/', views.CreditLedgerAPIView.as_view(), name='credit-ledger'),
+    path('ledger/export/', views.CreditLedgerExportAPIView.as_view(), name='credit-ledger-export'),
 ]
@@ -1,3 +1,5 @@
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import generics
 from rest_framework.request import Request
@@ -5,11 +7,17 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 
-from credit.models import Credit, PricePolicy
-from credit.serializers import CreditBuySerializer, CreditSerializer, PricePolicySerializer
+from core.conditional import conditional_get
+from core.exports import RowExporter
+from credit.models import Credit, CreditArchive, PricePolicy, price_policy_cache
+from credit.pagination import CreditLedgerCursorPagination
+from credit.serializers import CreditBuySerializer, CreditSerializer, PricePolicySerializer, CreditLedgerSerializer, \
+    CreditLedgerFilterSerializer, CreditLedgerExportQuerySerializer
 
 
 class PricePolicyAPIView(generics.ListCreateAPIView):
+    query_budget = {'GET': 3, 'POST': 3}
+    read_from_replica = True
     serializer_class = PricePolicySerializer
     queryset = PricePolicy.objects.all()
 
@@ -19,6 +27,11 @@ class PricePolicyAPIView(generics.ListCreateAPIView):
     def get(self, request, *args, **kwargs):
         return super(PricePolicyAPIView, self).get(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        data: list = price_policy_cache.get_or_set(
+            'list', 'list', lambda: list(super(PricePolicyAPIView, self).list(request, *args, **kwargs).data))
+        return Response(data)
+
     @swagger_auto_schema(
         operation_summary="가격 정책(회원권) 생성",
         operation_description="크레딧을 만들기 위한 선조건입니다."
@@ -29,6 +42,8 @@ class PricePolicyAPIView(generics.ListCreateAPIView):
 
 
 class CreditAPIView(APIView):
+    query_budget = {'GET': 3, 'POST': 11}
+
     @swagger_auto_schema(
         operation_summary="크레딧 목록 보기",
         responses={status.HTTP_200_OK: CreditSerializer(many=True)},
@@ -49,3 +64,52 @@ class CreditAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         credit: Credit = serializer.save(user=request.user)
         return Response(status=status.HTTP_201_CREATED, data=CreditSerializer(credit).data)
+
+
+def get_credit_ledger_version(request) -> tuple | None:
+    return Credit.objects.get_ledger_version(request.user) + (timezone.now().date(), )
+
+
+class CreditLedgerAPIView(generics.ListAPIView):
+    query_budget = 4
+    permission_classes = [IsAuthenticated]
+    serializer_class = CreditLedgerSerializer
+    pagination_class = CreditLedgerCursorPagination
+
+    def get_queryset(self):
+        filter_serializer = CreditLedgerFilterSerializer(data=self.request.query_params)
+        filter_serializer.is_valid(raise_exception=True)
+        return filter_serializer.filter_queryset(Credit.objects.filter(user=self.request.user))
+
+    @swagger_auto_schema(
+        operation_summary="내 크레딧 원장 보기",
+        operation_description="요청한 사용자의 크레딧 내역을 최신순 커서 페이지로 반환합니다. "
+                              "응답의 ETag를 If-None-Match로 보내면 바뀐 내용이 없을 때 304를 반환합니다.",
+        query_serializer=CreditLedgerFilterSerializer,
+    )
+    @conditional_get(get_credit_ledger_version)
+    def get(self, request, *args, **kwargs):
+        return super(CreditLedgerAPIView, self).get(request, *args, **kwargs)
+
+
+class CreditLedgerExportAPIView(APIView):
+    query_budget = 2
+    permission_classes = [IsAdminUser]
+    fields: tuple[str, ...] = ('user', ) + CreditLedgerSerializer.Meta.fields
+
+    @swagger_auto_schema(
+        operation_summary="전체 크레딧 원장 내보내기(관리자)",
+        operation_description="모든 사용자의 크레딧 내역을 id 순서의 CSV/NDJSON 스트림으로 반환합니다. "
+                              "after에 마지막으로 받은 id를 넣으면 이어서 받습니다. "
+                              "archived=true면 원장에서 보관 테이블로 옮긴 내역을 반환합니다.",
+        query_serializer=CreditLedgerExportQuerySerializer,
+    )
+    def get(self, request: Request):
+        query_serializer = CreditLedgerExportQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        queryset = CreditArchive.objects.all() if query_serializer.validated_data['archived'] else Credit.objects.all()
+        exporter = RowExporter(
+            query_serializer.filter_queryset(queryset), self.fields,
+            export_format=query_serializer.validated_data['export_format'],
+            after=query_serializer.validated_data['after'])
+        return exporter.as_response('credit-ledger')
@@ -0,0 +1,83 @@
+"""gunicorn 설정. start 스크립트가 실행하는 디렉터리(/app)에서 자동으로 읽힌다.
+
+모든 값은 환경 변수로 바꿀 수 있다.
+ - SERVER_MODE : wsgi(기본, gthread 워커) / asgi(uvicorn 워커)
+ - WEB_CONCURRENCY : 워커 수 (기본 wsgi CPU * 2 + 1, asgi CPU 수)
+ - GUNICORN_THREADS : gthread 워커당 스레드 수 (기본 4)
+ - GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE : 초 단위
+ - GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER : 워커 재시작 주기 (0이면 재시작하지 않음)
+ - GUNICORN_PRELOAD : 1이면 마스터에서 앱을 읽고 fork
+ - SQL_MAX_CONNECTIONS : 인스턴스 하나가 쓸 수 있는 DB 연결 수 (기본 100, Postgres max_connections 기본값)
+
+DB 연결을 유지하면(CONN_MAX_AGE > 0) 스레드마다 연결을 하나씩 붙잡으므로 인스턴스 하나가
+워커 × 스레드 × DB alias(default + replica) 수만큼 연결을 쓴다. pgbouncer(SQL_PGBOUNCER=1) 없이
+이 값이 SQL_MAX_CONNECTIONS를 넘으면 시작할 때 경고한다. 인스턴스가 여러 대면 SQL_MAX_CONNECTIONS를 나눠 준다.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+server_mode: str = os.environ.get('SERVER_MODE', 'wsgi')
+cpu_count: int = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+if server_mode == 'asgi':
+    # 이벤트 루프 워커는 하나가 여러 요청을 동시에 처리하므로 CPU 수만큼만 띄운다.
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = env_int('WEB_CONCURRENCY', cpu_count)
+else:
+    # ORM 호출이 대부분 DB 대기이므로 워커마다 스레드를 두어 대기 중에도 다른 요청을 처리한다.
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    workers = env_int('WEB_CONCURRENCY', cpu_count * 2 + 1)
+    threads = env_int('GUNICORN_THREADS', 4)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# nginx가 upstream 연결을 다시 쓰므로 nginx keepalive_timeout보다 조금 길게 둔다.
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# 메모리가 조금씩 늘어나는 워커를 주기적으로 교체하고, 워커들이 동시에 재시작하지 않게 jitter를 준다.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+# 컨테이너의 /tmp가 디스크일 때 heartbeat 파일 쓰기로 워커가 멈추는 것을 막는다.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # preload 중에 연 DB 연결을 워커끼리 나눠 쓰지 않도록 fork 직후 닫는다.
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    connections.close_all()
+
+
+
+def get_db_connection_count(workers: int, threads: int, databases: dict, pgbouncer: bool) -> int | None:
+    """pgbouncer 없이 연결을 유지할 때 인스턴스 하나가 붙잡는 DB 연결 수. 연결을 유지하지 않거나 pgbouncer를 거치면 None."""
+    if pgbouncer or not databases['default'].get('CONN_MAX_AGE'):
+        return None
+    return workers * threads * len(databases)
+
+
+def when_ready(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gym.settings')
+    from django.conf import settings
+    connection_count: int | None = get_db_connection_count(
+        server.cfg.workers, server.cfg.threads, settings.DATABASES, settings.SQL_PGBOUNCER)
+    max_connections: int = env_int('SQL_MAX_CONNECTIONS', 100)
+    if connection_count is not None and connection_count > max_connections:
+        server.log.warning(
+            'persistent DB connections (%s workers x %s threads x DB aliases = %s) exceed SQL_MAX_CONNECTIONS %s; '
+            'set SQL_PGBOUNCER=1 behind pgbouncer, lower SQL_CONN_MAX_AGE or reduce workers/threads',
+            server.cfg.workers, server.cfg.threads, connection_count, max_connections)
@@ -0,0 +1,18 @@
+"""SERVER_MODE=asgi일 때의 ROOT_URLCONF.
+
+자주 읽는 GET API를 같은 경로와 이름의 async view로 먼저 연결하고, 나머지는 gym.urls를 그대로 쓴다.
+async view의 GET 이외 요청은 원래 DRF view가 처리한다.
+"""
+from django.urls import path
+
+from credit.async_views import PricePolicyAsyncView
+from gym import urls
+from lesson.async_views import LessonAsyncView, LessonDetailAsyncView
+from user.async_views import UserDetailAsyncView
+
+urlpatterns = [
+    path('credit/price-policy/', PricePolicyAsyncView.as_view(), name='price-policy'),
+    path('lesson/', LessonAsyncView.as_view(), name='lesson'),
+    path('lesson/<int:pk>/', LessonDetailAsyncView.as_view(), name='lesson-detail'),
+    path('user/<int:pk>/', UserDetailAsyncView.as_view(), name='user-detail'),
+] + urls.urlpatterns
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryCountMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,7 +41,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'gym.urls'
+# wsgi: gunicorn sync worker, asgi: uvicorn worker와 async 조회 view(gym.asgi_urls)
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+
+ROOT_URLCONF = 'gym.asgi_urls' if SERVER_MODE == 'asgi' else 'gym.urls'
 
 TEMPLATES = [
     {
@@ -59,6 +64,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'gym.wsgi.application'
 
+# 1이면 pgbouncer를 거쳐 연결한다. 실제 Postgres 연결 수는 pgbouncer의 pool 크기로 제한된다.
+SQL_PGBOUNCER = os.environ.get("SQL_PGBOUNCER", "0") == "1"
+
 DATABASES = {
     "default": {
         "ENGINE": os.environ.get("SQL_ENGINE", "django.db.backends.sqlite3"),
@@ -67,6 +75,52 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        # 요청마다 새로 연결하지 않고 워커(스레드)별 연결을 SQL_CONN_MAX_AGE초 동안 다시 쓴다. 0이면 요청마다 닫는다.
+        # 연결을 유지하면 인스턴스마다 워커 × 스레드 × DB alias 수만큼 연결을 붙잡아 Postgres max_connections를 넘을 수 있으므로,
+        # 기본값은 pgbouncer를 거칠 때만 60초로 둔다. 직접 연결하면서 값을 주면 gunicorn.conf.py가 시작할 때 연결 수를 검사한다.
+        # ASGI에서는 요청이 끝나도 연결이 정리되지 않을 수 있어 기본값을 0으로 둔다.
+        "CONN_MAX_AGE": int(os.environ.get(
+            "SQL_CONN_MAX_AGE", 60 if SQL_PGBOUNCER and SERVER_MODE != 'asgi' else 0)),
+        # 다시 쓰기 전에 끊긴 연결인지 확인해서, DB 재시작 뒤 첫 요청이 실패하지 않게 한다.
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "1") == "1",
+        # pgbouncer transaction pooling에서는 트랜잭션 밖의 서버 사이드 커서(.iterator())를 쓸 수 없다.
+        "DISABLE_SERVER_SIDE_CURSORS": os.environ.get(
+            "SQL_DISABLE_SERVER_SIDE_CURSORS", "1" if SQL_PGBOUNCER else "0") == "1",
+    }
+}
+
+# 읽기 전용 replica. SQL_REPLICA_HOSTS(host:port)와 SQL_REPLICA_DATABASES(DB 이름, SQLite면 파일 경로)를
+# 쉼표로 구분해 순서대로 짝지어 replica1, replica2...로 등록한다. 비어 있는 값은 default 설정을 그대로 쓴다.
+# read_from_replica = True인 view의 GET 요청만 replica에서 읽는다(core.routers.ReplicaRouter).
+REPLICA_DATABASES = []
+_replica_hosts = [host for host in os.environ.get("SQL_REPLICA_HOSTS", "").split(",") if host]
+_replica_names = [name for name in os.environ.get("SQL_REPLICA_DATABASES", "").split(",") if name]
+for _index in range(max(len(_replica_hosts), len(_replica_names))):
+    _host, _, _port = _replica_hosts[_index].partition(":") if _index < len(_replica_hosts) else ("", "", "")
+    DATABASES[f"replica{_index + 1}"] = {
+        **DATABASES["default"],
+        "HOST": _host or DATABASES["default"]["HOST"],
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "NAME": _replica_names[_index] if _index < len(_replica_names) else DATABASES["default"]["NAME"],
+        # 테스트에서는 default 테스트 DB를 그대로 읽는다.
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica{_index + 1}")
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# 쓰기 요청(예약, 취소, 크레딧 구매 등)이 성공한 클라이언트는 이 시간(초) 동안 replica 대신 default에서 읽는다.
+# replica에서 읽어 만든 캐시 값도 이 시간 동안만 유지한다. replica 복제 지연보다 길게 설정한다.
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+REPLICA_PIN_COOKIE = "primary_pin"
+
+# 가격 정책/수업 목록 캐시. 여러 프로세스가 함께 쓰려면 redis/memcached 등 공유 백엔드로 설정합니다.
+# 예) CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://redis:6379/0
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", 60 * 60)),
     }
 }
 
@@ -111,6 +165,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "user.CustomUser"
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # 요청별 SQL 개수/시간 로그. 모든 요청을 보려면 QUERY_LOG_LEVEL=INFO
+        'gym.queries': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# 만료 배치(python manage.py expire_credits)를 매일 실행한다면 0으로 설정해 조회 시점 만료 처리를 끕니다.
+# 배치가 오늘 실행되지 않았다면 조회 시점 만료 처리로 돌아갑니다.
+CREDIT_EXPIRE_ON_READ = os.environ.get("CREDIT_EXPIRE_ON_READ", "1") == "1"
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -118,4 +194,14 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication'
     ],
+    # orjson이 있으면 orjson으로, 없으면 DRF 기본 JSONRenderer/JSONParser와 같이 stdlib json으로 처리한다.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
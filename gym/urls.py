@@ -23,4 +23,5 @@ urlpatterns = [
     path('credit/', include('credit.urls')),
     path('lesson/', include('lesson.urls')),
     path('user/', include('user.urls')),
+    path('health/', include('core.urls')),
 ]
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from rangefilter.filters import DateRangeFilter
 
-from lesson.models import Lesson, Reservation
+from lesson.models import Lesson, Reservation, ScheduleTemplate, Waitlist
 
 models = [Lesson]
 for model in models:
@@ -14,3 +14,18 @@ class ReservationAdmin(admin.ModelAdmin):
         ('lesson', admin.RelatedOnlyFieldListFilter),
         ('created', DateRangeFilter),
     )
+
+
+@admin.register(ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ('gym', 'type', 'weekday', 'start_time', 'end_time', 'max_capacity', 'credit_count', 'is_active')
+    list_filter = ('gym', 'type', 'weekday', 'is_active')
+
+
+@admin.register(Waitlist)
+class WaitlistAdmin(admin.ModelAdmin):
+    list_display = ('lesson', 'user', 'status', 'reservation', 'created')
+    list_filter = (
+        'status',
+        ('lesson', admin.RelatedOnlyFieldListFilter),
+    )
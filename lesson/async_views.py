@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from core.async_views import AsyncReadView, set_prefetched
+from core.conditional import aconditional_get
+from lesson.models import Lesson, Reservation, lesson_cache
+from lesson.pagination import LessonCursorPagination
+from lesson.serializers import LessonFilterSerializer, LessonDetailQuerySerializer, LessonDetailSerializer, \
+    lesson_values_serializer
+from lesson.views import LessonAPIView, LessonDetailAPIView
+
+
+class LessonAsyncView(AsyncReadView):
+    query_budget = LessonAPIView.query_budget
+    read_from_replica = LessonAPIView.read_from_replica
+    sync_view_class = LessonAPIView
+
+    async def get(self, request) -> HttpResponse:
+        filter_serializer = LessonFilterSerializer(data=request.GET)
+        filter_serializer.is_valid(raise_exception=True)
+
+        async def paginate() -> dict:
+            # 커서 페이지네이션은 DRF 코드를 그대로 쓰므로 캐시가 없을 때만 스레드에서 실행한다.
+            paginator = LessonCursorPagination()
+            rows: list[dict] = await sync_to_async(paginator.paginate_queryset)(
+                filter_serializer.filter_queryset(Lesson.objects.values(*lesson_values_serializer.value_fields)),
+                Request(request))
+            return paginator.get_paginated_response(lesson_values_serializer.to_representation_many(rows)).data
+
+        data: dict = await lesson_cache.aget_or_set(
+            Lesson.get_cache_namespace(filter_serializer.get_start_date()), request.build_absolute_uri(), paginate)
+        return self.json_response(data)
+
+
+class LessonDetailAsyncView(AsyncReadView):
+    query_budget = LessonDetailAPIView.query_budget
+    sync_view_class = LessonDetailAPIView
+
+    async def get(self, request, pk: int) -> HttpResponse:
+        version: tuple | None = await Lesson.objects.aget_detail_version(pk)
+        if version is None:
+            raise NotFound()
+
+        async def get_response() -> HttpResponse:
+            query_serializer = LessonDetailQuerySerializer(data=request.GET)
+            query_serializer.is_valid(raise_exception=True)
+            lesson: Lesson | None = await Lesson.objects.filter(pk=pk).afirst()
+            if lesson is None:
+                raise NotFound()
+            reservations: list[Reservation] = [
+                reservation async for reservation in query_serializer.get_reservation_queryset(pk)]
+            set_prefetched(lesson, 'reservations', reservations)
+            serializer = LessonDetailSerializer(lesson, context={**query_serializer.validated_data})
+            return self.json_response(serializer.data)
+
+        return await aconditional_get(request, version, get_response)
@@ -44,3 +44,33 @@ class NotYourReservation(APIException):
 class InvalidReservationType(APIException):
     status_code = 400
     default_detail = "예약 취소건은 취소 불가"
+
+
+class InvalidBulkReservation(APIException):
+    status_code = 400
+    default_detail = "lesson_ids와 recurrence 중 하나만 입력"
+
+
+class InvalidScheduleRange(APIException):
+    status_code = 400
+    default_detail = "시간표 생성 기간은 시작일부터 92일 이내"
+
+
+class LessonNotFull(APIException):
+    status_code = 400
+    default_detail = "정원이 남은 수업은 바로 예약 가능"
+
+
+class AlreadyWaiting(APIException):
+    status_code = 400
+    default_detail = "이미 대기 중인 수업"
+
+
+class AlreadyScheduled(APIException):
+    status_code = 400
+    default_detail = "같은 장소, 수업종류, 시간에 이미 있는 수업"
+
+
+class NotWaiting(APIException):
+    status_code = 404
+    default_detail = "대기 중인 수업이 아님"
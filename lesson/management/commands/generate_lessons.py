@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lesson.models import ScheduleTemplate
+
+
+class Command(BaseCommand):
+    help = '사용 중인 수업 시간표로 기간 안의 수업을 생성합니다. 이미 있는 수업은 건너뜁니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start_date', type=datetime.date.fromisoformat, required=True,
+                            help='수업날짜 시작일(YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end_date', type=datetime.date.fromisoformat, required=True,
+                            help='수업날짜 종료일(YYYY-MM-DD)')
+        parser.add_argument('--dry-run', action='store_true', help='생성하지 않고 결과만 출력')
+
+    def handle(self, *args, **kwargs):
+        start_date: datetime.date = kwargs['start_date']
+        end_date: datetime.date = kwargs['end_date']
+        dry_run: bool = kwargs['dry_run']
+        if end_date < start_date:
+            raise CommandError('--to must not be before --from')
+
+        lessons, conflicts = ScheduleTemplate.objects.materialize(start_date, end_date, commit=not dry_run)
+        for conflict in conflicts:
+            self.stdout.write(f'skip {conflict} {conflict.start_time}')
+
+        message: str = f'{len(lessons)} lesson(s) {"to create" if dry_run else "created"}, {len(conflicts)} skipped'
+        self.stdout.write(self.style.SUCCESS(message))
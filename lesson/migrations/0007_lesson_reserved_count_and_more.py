@@ -0,0 +1,83 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:00
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Q
+
+logger = logging.getLogger('gym.migrations')
+
+
+def cancel_duplicate_reservations(apps, schema_editor):
+    """(수업, 유저)마다 가장 먼저 한 예약만 남기고 나머지 유효한 예약은 취소하고 쓴 크레딧을 환불한다.
+
+    예약 중복 확인과 생성 사이의 경쟁으로 생긴 중복 예약이 있으면 unique_active_reservation을 만들 수 없다.
+    """
+    Reservation = apps.get_model('lesson', 'Reservation')
+    Credit = apps.get_model('credit', 'Credit')
+    CreditBalance = apps.get_model('credit', 'CreditBalance')
+    active_reservations = Reservation.objects.filter(type='예약', cancel_reservation__isnull=True)
+    duplicates = (active_reservations
+                  .values('lesson', 'user')
+                  .annotate(reservation_count=Count('id'), first_id=Min('id'))
+                  .filter(reservation_count__gt=1)
+                  .order_by())
+    for duplicate in duplicates:
+        reservations = (active_reservations
+                        .filter(lesson=duplicate['lesson'], user=duplicate['user'])
+                        .exclude(id=duplicate['first_id'])
+                        .select_related('lesson'))
+        for reservation in reservations:
+            cancel_reservation = Reservation.objects.create(
+                type='취소', user_id=reservation.user_id, lesson_id=reservation.lesson_id)
+            reservation.cancel_reservation = cancel_reservation
+            reservation.save(update_fields=['cancel_reservation'])
+            use_credits = Credit.objects.filter(reservation=reservation, type='사용').select_related('purchased_credit')
+            for use_credit in use_credits:
+                purchased_credit = use_credit.purchased_credit
+                Credit.objects.create(
+                    type='환불', user_id=reservation.user_id, purchased_credit=purchased_credit,
+                    count=-use_credit.count, start_date=purchased_credit.start_date,
+                    price_policy_id=purchased_credit.price_policy_id, reservation=cancel_reservation,
+                    message=f'{reservation.lesson.type} 수업 중복 예약 취소')
+                Credit.objects.filter(pk=purchased_credit.pk).update(
+                    remaining_count=F('remaining_count') - use_credit.count)
+                balance, _ = CreditBalance.objects.get_or_create(user_id=reservation.user_id)
+                CreditBalance.objects.filter(pk=balance.pk).update(count=F('count') - use_credit.count)
+            logger.warning('canceled duplicate reservation %s (lesson %s, user %s)',
+                           reservation.id, reservation.lesson_id, reservation.user_id)
+
+
+def fill_reserved_count(apps, schema_editor):
+    Lesson = apps.get_model('lesson', 'Lesson')
+    lessons = list(Lesson.objects.annotate(active_reservation_count=Count(
+        'reservations', filter=Q(reservations__type='예약', reservations__cancel_reservation__isnull=True))))
+    for lesson in lessons:
+        lesson.reserved_count = lesson.active_reservation_count
+        # 잠금 없이 정원을 확인하던 때 초과 예약된 수업은 그대로 두되 정원이 다시 날 때까지 예약을 받지 않는다.
+        if lesson.reserved_count > lesson.max_capacity:
+            logger.warning('lesson %s has %s active reservations over max_capacity %s',
+                           lesson.id, lesson.reserved_count, lesson.max_capacity)
+    Lesson.objects.bulk_update(lessons, ['reserved_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0006_alter_reservation_cancel_reservation'),
+        ('credit', '0016_credit_remaining_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='reserved_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='예약 인원'),
+        ),
+        migrations.RunPython(cancel_duplicate_reservations, migrations.RunPython.noop),
+        migrations.RunPython(fill_reserved_count, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('cancel_reservation__isnull', True), ('type', '예약')), fields=('lesson', 'user'), name='unique_active_reservation'),
+        ),
+    ]
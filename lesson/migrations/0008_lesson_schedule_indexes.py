@@ -0,0 +1,29 @@
+# Generated by Django 4.1.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0007_lesson_reserved_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['start_date', 'start_time', 'id'], name='lesson_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['gym', 'start_date', 'start_time', 'id'], name='lesson_gym_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['type', 'start_date', 'start_time', 'id'], name='lesson_type_schedule_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['gym', 'type', 'start_date', 'start_time', 'id'], name='lesson_gym_type_schedule_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.1 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0008_lesson_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='생성시간')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='수정시간')),
+                ('gym', models.CharField(choices=[('서울', '서울'), ('부산', '부산')], default='서울', max_length=16, verbose_name='장소')),
+                ('type', models.CharField(choices=[('웨이트', '웨이트'), ('크로스핏', '크로스핏'), ('수영', '수영'), ('요가', '요가')], default='웨이트', max_length=16, verbose_name='수업종류')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(1, '월'), (2, '화'), (3, '수'), (4, '목'), (5, '금'), (6, '토'), (7, '일')], verbose_name='요일')),
+                ('start_time', models.TimeField(verbose_name='시작시간')),
+                ('end_time', models.TimeField(verbose_name='종료시간')),
+                ('credit_count', models.PositiveIntegerField(verbose_name='크레딧 개수')),
+                ('max_capacity', models.PositiveIntegerField(verbose_name='정원')),
+                ('is_active', models.BooleanField(default=True, verbose_name='사용 여부')),
+            ],
+            options={
+                'verbose_name': '수업 시간표',
+            },
+        ),
+    ]
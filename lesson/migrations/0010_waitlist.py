@@ -0,0 +1,40 @@
+# Generated by Django 4.1.1 on 2026-10-18 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lesson', '0009_scheduletemplate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Waitlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='생성시간')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='수정시간')),
+                ('status', models.CharField(choices=[('대기', '대기'), ('예약', '예약됨'), ('취소', '취소'), ('실패', '예약 실패')], default='대기', max_length=8, verbose_name='대기 상태')),
+                ('detail', models.CharField(blank=True, max_length=64, verbose_name='예약 실패 사유')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlists', to='lesson.lesson', verbose_name='수업')),
+                ('reservation', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist', to='lesson.reservation', verbose_name='예약')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlists', to=settings.AUTH_USER_MODEL, verbose_name='대기자')),
+            ],
+            options={
+                'verbose_name': '예약 대기',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(condition=models.Q(('status', '대기')), fields=['lesson', 'id'], name='waitlist_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlist',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', '대기')), fields=('lesson', 'user'), name='unique_waiting_waitlist'),
+        ),
+    ]
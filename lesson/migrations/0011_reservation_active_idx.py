@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0010_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('cancel_reservation__isnull', True), ('type', '예약')), fields=['lesson', 'id'], name='reservation_active_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.1.1 on 2026-10-18 18:00
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count
+
+logger = logging.getLogger('gym.migrations')
+
+
+def delete_duplicate_lessons(apps, schema_editor):
+    """(장소, 수업종류, 수업날짜, 시작시간)마다 예약이나 대기가 있는 수업, 없으면 가장 먼저 만든 수업만 남기고 지운다.
+
+    중복 확인과 생성 사이의 경쟁으로 생긴 같은 시간의 수업이 있으면 unique_lesson_schedule을 만들 수 없다.
+    예약이나 대기가 있는 수업이 둘 이상이면 어느 쪽을 남길지 정할 수 없으므로 마이그레이션을 멈춘다.
+    """
+    Lesson = apps.get_model('lesson', 'Lesson')
+    schedule_fields = ('gym', 'type', 'start_date', 'start_time')
+    duplicates = (Lesson.objects
+                  .values(*schedule_fields)
+                  .annotate(lesson_count=Count('id'))
+                  .filter(lesson_count__gt=1)
+                  .order_by())
+    for duplicate in duplicates:
+        lessons = list(Lesson.objects
+                       .filter(**{field: duplicate[field] for field in schedule_fields})
+                       .annotate(reservation_count=Count('reservations', distinct=True),
+                                 waitlist_count=Count('waitlists', distinct=True))
+                       .order_by('id'))
+        used_lessons = [lesson for lesson in lessons if lesson.reservation_count or lesson.waitlist_count]
+        if len(used_lessons) > 1:
+            raise RuntimeError(f'lessons {[lesson.id for lesson in used_lessons]} share a schedule '
+                               f'and all have reservations; merge them before migrating')
+        kept_lesson = used_lessons[0] if used_lessons else lessons[0]
+        for lesson in lessons:
+            if lesson.id == kept_lesson.id:
+                continue
+            logger.warning('deleted duplicate lesson %s (kept lesson %s)', lesson.id, kept_lesson.id)
+            lesson.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0011_reservation_active_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_lessons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lesson',
+            constraint=models.UniqueConstraint(fields=('gym', 'type', 'start_date', 'start_time'), name='unique_lesson_schedule'),
+        ),
+    ]
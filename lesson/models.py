@@ -1,13 +1,19 @@
 import datetime
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Max, Count
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from rest_framework.exceptions import APIException, NotFound
 
 from gym import settings
+from core.cache import VersionedCache
+from core.conditional import latest
 from core.models import TimeStampedModel
+
 from lesson.exceptions import NotEnoughCredit, ExceedMaxCapacity, AlreadyRegistered, NotYourReservation, \
-    InvalidCancelDate, AlreadyCanceled, ExceedLessonTime, InvalidReservationType
+    InvalidCancelDate, AlreadyCanceled, ExceedLessonTime, InvalidReservationType, LessonNotFull, AlreadyWaiting, \
+    NotWaiting
 
 
 class Gym(models.TextChoices):
@@ -27,6 +33,88 @@ class ReservationType(models.TextChoices):
     CANCEL = '취소', _('취소')
 
 
+lesson_cache = VersionedCache('lesson')
+
+
+class WaitlistStatus(models.TextChoices):
+    WAITING = '대기', _('대기')
+    PROMOTED = '예약', _('예약됨')
+    CANCELED = '취소', _('취소')
+    FAILED = '실패', _('예약 실패')
+
+
+class LessonQuerySet(models.QuerySet):
+    def has_free_seats(self):
+        return self.filter(reserved_count__lt=F('max_capacity'))
+
+    def full(self):
+        return self.filter(reserved_count__gte=F('max_capacity'))
+
+    def split_conflicts(self, lessons: list['Lesson']) -> tuple[list['Lesson'], list['Lesson']]:
+        """이미 있거나 lessons 안에서 겹치는 수업을 한 번의 조회로 골라 (새 수업, 겹치는 수업)으로 나눈다."""
+        schedule_keys: set[tuple] = set(
+            self.filter(start_date__in={lesson.start_date for lesson in lessons},
+                        gym__in={lesson.gym for lesson in lessons})
+            .values_list('gym', 'type', 'start_date', 'start_time'))
+        new_lessons: list[Lesson] = []
+        conflicts: list[Lesson] = []
+        for lesson in lessons:
+            if lesson.schedule_key in schedule_keys:
+                conflicts.append(lesson)
+                continue
+            schedule_keys.add(lesson.schedule_key)
+            new_lessons.append(lesson)
+        return new_lessons, conflicts
+
+    def bulk_create_without_conflicts(self, lessons: list['Lesson'],
+                                      attempts: int = 3) -> tuple[list['Lesson'], list['Lesson']]:
+        """겹치지 않는 수업만 만들고 겹치는 수업은 conflicts로 돌려준다.
+
+        중복은 unique_lesson_schedule이 막는다. split_conflicts와 생성 사이에 같은 수업이 먼저 만들어지면
+        생성이 통째로 취소되므로, 다시 나누어 attempts번까지 생성한다.
+        """
+        for attempt in range(attempts):
+            new_lessons, conflicts = self.split_conflicts(lessons)
+            try:
+                with transaction.atomic():
+                    new_lessons = self.bulk_create(new_lessons, batch_size=500)
+                break
+            except IntegrityError:
+                for lesson in new_lessons:
+                    lesson.pk = None
+                    lesson._state.adding = True
+                if attempt == attempts - 1:
+                    raise
+        Lesson.invalidate_cache(*{lesson.start_date for lesson in new_lessons})
+        return new_lessons, conflicts
+
+    def detail_version(self, pk: int):
+        return (self
+                .filter(pk=pk)
+                .annotate(reservation_modified=Max('reservations__modified'), reservation_count=Count('reservations'))
+                .values_list('modified', 'reservation_modified', 'reservation_count'))
+
+    def get_detail_version(self, pk: int) -> tuple | None:
+        return self._to_detail_version(self.detail_version(pk).first())
+
+    async def aget_detail_version(self, pk: int) -> tuple | None:
+        return self._to_detail_version(await self.detail_version(pk).afirst())
+
+    @staticmethod
+    def _to_detail_version(version: tuple | None) -> tuple | None:
+        if version is None:
+            return None
+        modified, reservation_modified, reservation_count = version
+        return latest(modified, reservation_modified), reservation_count
+
+    def recurring(self, gym: str, type: str, weekday: int, start_time: datetime.time,
+                  start_date_from: datetime.date, start_date_to: datetime.date):
+        return (self
+                .filter(gym=gym, type=type, start_date__iso_week_day=weekday, start_time=start_time,
+                        start_date__gte=start_date_from, start_date__lte=start_date_to)
+                .order_by('start_date', 'start_time', 'id'))
+
+
 class Lesson(TimeStampedModel):
     gym = models.CharField(
         verbose_name=_("장소"), max_length=16, choices=Gym.choices, default=Gym.SEOUL)
@@ -37,17 +125,47 @@ class Lesson(TimeStampedModel):
     start_date = models.DateField(verbose_name=_("수업날짜"))
     start_time = models.TimeField(verbose_name=_("시작시간"))
     end_time = models.TimeField(verbose_name=_("종료시간"))
+    reserved_count = models.PositiveIntegerField(verbose_name=_("예약 인원"), default=0, editable=False)
+    objects = LessonQuerySet.as_manager()
 
     class Meta:
         verbose_name = '수업'
+        # 장소, 수업종류, 수업날짜, 시작시간이 같은 수업은 하나만 둔다. 동시에 만들어도 DB가 막는다.
+        constraints = [
+            models.UniqueConstraint(fields=['gym', 'type', 'start_date', 'start_time'], name='unique_lesson_schedule'),
+        ]
+        indexes = [
+            models.Index(fields=['start_date', 'start_time', 'id'], name='lesson_schedule_idx'),
+            models.Index(fields=['gym', 'start_date', 'start_time', 'id'], name='lesson_gym_schedule_idx'),
+            models.Index(fields=['type', 'start_date', 'start_time', 'id'], name='lesson_type_schedule_idx'),
+            models.Index(fields=['gym', 'type', 'start_date', 'start_time', 'id'], name='lesson_gym_type_schedule_idx'),
+        ]
 
     def __str__(self):
         return f'[{self.gym}] {self.type} {self.start_date}'
 
+    @staticmethod
+    def get_cache_namespace(start_date: datetime.date | None = None) -> str:
+        return str(start_date) if start_date else 'all'
+
+    @staticmethod
+    def invalidate_cache(*start_dates: datetime.date) -> None:
+        lesson_cache.bump(Lesson.get_cache_namespace(), *[Lesson.get_cache_namespace(date) for date in start_dates])
+
+    @property
+    def schedule_key(self) -> tuple:
+        return self.gym, self.type, self.start_date, self.start_time
+
+    @property
+    def available_seats(self) -> int:
+        return self.get_available_seats(self.max_capacity, self.reserved_count)
+
+    @staticmethod
+    def get_available_seats(max_capacity: int, reserved_count: int) -> int:
+        return max(max_capacity - reserved_count, 0)
+
     def is_full(self) -> bool:
-        return (Reservation.objects
-                .filter(lesson=self, type=ReservationType.RESERVATION, cancel_reservation__isnull=True)
-                .count() >= self.max_capacity)
+        return self.reserved_count >= self.max_capacity
 
     def is_close(self) -> bool:
         now = timezone.now()
@@ -69,15 +187,70 @@ class Lesson(TimeStampedModel):
         raise InvalidCancelDate
 
 
+class Weekday(models.IntegerChoices):
+    MONDAY = 1, _('월')
+    TUESDAY = 2, _('화')
+    WEDNESDAY = 3, _('수')
+    THURSDAY = 4, _('목')
+    FRIDAY = 5, _('금')
+    SATURDAY = 6, _('토')
+    SUNDAY = 7, _('일')
+
+
+class ScheduleTemplateManager(models.Manager):
+    def materialize(self, start_date: datetime.date, end_date: datetime.date,
+                    commit: bool = True) -> tuple[list[Lesson], list[Lesson]]:
+        templates: dict[int, list[ScheduleTemplate]] = {}
+        for template in self.filter(is_active=True):
+            templates.setdefault(template.weekday, []).append(template)
+
+        lessons: list[Lesson] = []
+        for day in range((end_date - start_date).days + 1):
+            lesson_date: datetime.date = start_date + datetime.timedelta(day)
+            for template in templates.get(lesson_date.isoweekday(), []):
+                lessons.append(template.build_lesson(lesson_date))
+
+        if not commit:
+            return Lesson.objects.split_conflicts(lessons)
+        return Lesson.objects.bulk_create_without_conflicts(lessons)
+
+
+class ScheduleTemplate(TimeStampedModel):
+    gym = models.CharField(
+        verbose_name=_("장소"), max_length=16, choices=Gym.choices, default=Gym.SEOUL)
+    type = models.CharField(
+        verbose_name=_("수업종류"), max_length=16, choices=LessonType.choices, default=LessonType.WEIGHT)
+    weekday = models.PositiveSmallIntegerField(verbose_name=_("요일"), choices=Weekday.choices)
+    start_time = models.TimeField(verbose_name=_("시작시간"))
+    end_time = models.TimeField(verbose_name=_("종료시간"))
+    credit_count = models.PositiveIntegerField(verbose_name=_("크레딧 개수"))
+    max_capacity = models.PositiveIntegerField(verbose_name=_("정원"))
+    is_active = models.BooleanField(verbose_name=_("사용 여부"), default=True)
+    objects = ScheduleTemplateManager()
+
+    class Meta:
+        verbose_name = '수업 시간표'
+
+    def __str__(self):
+        return f'[{self.gym}] {self.type} {self.get_weekday_display()} {self.start_time}'
+
+    def build_lesson(self, start_date: datetime.date) -> Lesson:
+        return Lesson(gym=self.gym, type=self.type, credit_count=self.credit_count, max_capacity=self.max_capacity,
+                      start_date=start_date, start_time=self.start_time, end_time=self.end_time)
+
+
 class ReservationManager(models.Manager):
+    @transaction.atomic
     def reserve(self, user, lesson: Lesson) -> 'Reservation':
         from user.models import CustomUser
         user: CustomUser
 
-        if lesson.is_full():
+        locked_lesson: Lesson = Lesson.objects.select_for_update().get(pk=lesson.pk)
+
+        if locked_lesson.is_full():
             raise ExceedMaxCapacity
 
-        if lesson.is_close():
+        if locked_lesson.is_close():
             raise ExceedLessonTime
 
         if (Reservation
@@ -87,13 +260,68 @@ class ReservationManager(models.Manager):
                 .exists()):
             raise AlreadyRegistered
 
-        if not user.has_enough_credit(lesson):
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(lesson=lesson, user=user)
+        except IntegrityError:
+            raise AlreadyRegistered
+
+        if not user.use_credit(reservation):
             raise NotEnoughCredit
 
-        reservation = Reservation.objects.create(lesson=lesson, user=user)
-        user.use_credit(reservation)
+        Lesson.objects.filter(pk=lesson.pk).update(reserved_count=F('reserved_count') + 1, modified=timezone.now())
+        lesson.reserved_count = locked_lesson.reserved_count + 1
+        Lesson.invalidate_cache(lesson.start_date)
         return reservation
 
+    @transaction.atomic
+    def bulk_reserve(self, user, lesson_ids: list[int]) -> list[dict]:
+        from user.models import CustomUser
+        from credit.models import PurchaseCredit
+        user: CustomUser
+
+        lesson_ids = list(dict.fromkeys(lesson_ids))
+        lessons: dict[int, Lesson] = {
+            lesson.id: lesson for lesson in Lesson.objects.select_for_update().filter(id__in=lesson_ids).order_by('id')}
+        registered_lesson_ids: set[int] = set(
+            Reservation.objects
+            .filter(lesson_id__in=lessons.keys(), user=user, type=ReservationType.RESERVATION,
+                    cancel_reservation__isnull=True)
+            .values_list('lesson_id', flat=True))
+        purchase_credits: list[PurchaseCredit] = user.lock_remaining_credits()
+        remaining_count: int = sum(purchase_credit.remaining_count for purchase_credit in purchase_credits)
+
+        results: dict[int, dict] = {}
+        reservations: list[Reservation] = []
+        for lesson_id in lesson_ids:
+            lesson: Lesson | None = lessons.get(lesson_id)
+            error = None
+            if lesson is None:
+                error = NotFound
+            elif lesson.is_full():
+                error = ExceedMaxCapacity
+            elif lesson.is_close():
+                error = ExceedLessonTime
+            elif lesson_id in registered_lesson_ids:
+                error = AlreadyRegistered
+            elif lesson.credit_count > remaining_count:
+                error = NotEnoughCredit
+            else:
+                remaining_count -= lesson.credit_count
+                reservations.append(Reservation(user=user, lesson=lesson))
+            results[lesson_id] = {'lesson': lesson_id, 'reservation': None,
+                                  'detail': str(error.default_detail) if error else None}
+
+        reservations = Reservation.objects.bulk_create(reservations)
+        user.charge_credits(purchase_credits, reservations)
+        Lesson.objects.filter(id__in=[reservation.lesson_id for reservation in reservations]).update(
+            reserved_count=F('reserved_count') + 1, modified=timezone.now())
+        Lesson.invalidate_cache(*{reservation.lesson.start_date for reservation in reservations})
+        for reservation in reservations:
+            reservation.lesson.reserved_count += 1
+            results[reservation.lesson_id]['reservation'] = reservation.id
+        return list(results.values())
+
 
 class Reservation(TimeStampedModel):
     user = models.ForeignKey(
@@ -108,6 +336,16 @@ class Reservation(TimeStampedModel):
 
     class Meta:
         verbose_name = '예약'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['lesson', 'user'], name='unique_active_reservation',
+                condition=Q(type=ReservationType.RESERVATION, cancel_reservation__isnull=True)),
+        ]
+        # (lesson, user)로 찾는 예약 중복 확인은 unique_active_reservation을 쓴다.
+        indexes = [
+            models.Index(fields=['lesson', 'id'], name='reservation_active_idx',
+                         condition=Q(type=ReservationType.RESERVATION, cancel_reservation__isnull=True)),
+        ]
 
     def __str__(self):
         return f'{self.created.strftime("%Y-%m-%d %H:%M")} / [{self.type}]건'
@@ -119,6 +357,7 @@ class Reservation(TimeStampedModel):
             message = f'{self.lesson.type} 수업 예약 취소'
         return message
 
+    @transaction.atomic
     def cancel(self, user) -> 'Reservation':
         from user.models import CustomUser
         from credit.models import UseCredit
@@ -131,7 +370,9 @@ class Reservation(TimeStampedModel):
         if self.user != user:
             raise NotYourReservation
 
-        if self.cancel_reservation is not None:
+        locked_lesson: Lesson = Lesson.objects.select_for_update().get(pk=self.lesson_id)
+        locked_reservation: Reservation = Reservation.objects.select_for_update().get(pk=self.pk)
+        if self.cancel_reservation is not None or locked_reservation.cancel_reservation_id is not None:
             raise AlreadyCanceled
 
         if not self.lesson.is_cancelable():
@@ -144,4 +385,115 @@ class Reservation(TimeStampedModel):
         self.user.refund_credit(cancel_reservation, refund_credit_count, use_credit.purchased_credit)
         self.cancel_reservation = cancel_reservation
         self.save()
+        Lesson.objects.filter(pk=self.lesson_id).update(
+            reserved_count=F('reserved_count') - 1, modified=timezone.now())
+        self.lesson.reserved_count = locked_lesson.reserved_count - 1
+        Lesson.invalidate_cache(self.lesson.start_date)
+        Waitlist.objects.promote(self.lesson)
         return cancel_reservation
+
+
+class WaitlistManager(models.Manager):
+    @transaction.atomic
+    def join(self, user, lesson: Lesson) -> 'Waitlist':
+        from user.models import CustomUser
+        user: CustomUser
+
+        locked_lesson: Lesson = Lesson.objects.select_for_update().get(pk=lesson.pk)
+
+        if not locked_lesson.is_full():
+            raise LessonNotFull
+
+        if locked_lesson.is_close():
+            raise ExceedLessonTime
+
+        if (Reservation
+                .objects
+                .filter(lesson=lesson, user=user, type=ReservationType.RESERVATION,
+                        cancel_reservation__isnull=True)
+                .exists()):
+            raise AlreadyRegistered
+
+        if not user.has_enough_credit(lesson):
+            raise NotEnoughCredit
+
+        try:
+            with transaction.atomic():
+                return self.create(lesson=lesson, user=user)
+        except IntegrityError:
+            raise AlreadyWaiting
+
+    # 취소 요청 하나에서 예약을 시도할 최대 대기자 수. 실패한 대기자가 길게 쌓여 있어도 취소 비용이 늘지 않게 한다.
+    max_promotion_attempts = 3
+
+    def promote(self, lesson: Lesson) -> list['Waitlist']:
+        """빈자리에 대기 순서대로 예약한다. 예약에 실패한 대기는 FAILED로 바꾸고 다음 대기자를 시도한다.
+
+        max_promotion_attempts명까지만 시도하고, 나머지 대기는 WAITING으로 남겨 다음 취소 때 이어서 시도한다.
+        """
+        promoted: list[Waitlist] = []
+        waitlists: list[Waitlist] = list(self
+                                         .select_for_update()
+                                         .filter(lesson=lesson, status=WaitlistStatus.WAITING)
+                                         .select_related('user')
+                                         .order_by('id')[:self.max_promotion_attempts])
+        for waitlist in waitlists:
+            if lesson.is_full() or lesson.is_close():
+                break
+
+            try:
+                # 크레딧이 모자란 대기자는 예약을 만들었다 되돌리기 전에 잔고만 보고 건너뛴다.
+                if not waitlist.user.has_enough_credit(lesson):
+                    raise NotEnoughCredit
+                waitlist.reservation = Reservation.objects.reserve(waitlist.user, lesson)
+                waitlist.status = WaitlistStatus.PROMOTED
+                promoted.append(waitlist)
+            except APIException as e:
+                waitlist.status = WaitlistStatus.FAILED
+                waitlist.detail = str(e.detail)
+            waitlist.save(update_fields=['status', 'reservation', 'detail', 'modified'])
+        return promoted
+
+
+class Waitlist(TimeStampedModel):
+    lesson = models.ForeignKey(
+        verbose_name=_("수업"), to=Lesson, on_delete=models.CASCADE, related_name="waitlists")
+    user = models.ForeignKey(
+        verbose_name=_('대기자'), to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="waitlists")
+    status = models.CharField(
+        verbose_name=_("대기 상태"), max_length=8, choices=WaitlistStatus.choices, default=WaitlistStatus.WAITING)
+    reservation = models.OneToOneField(
+        verbose_name=_("예약"), to=Reservation, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="waitlist")
+    detail = models.CharField(verbose_name=_("예약 실패 사유"), max_length=64, blank=True)
+    objects = WaitlistManager()
+
+    class Meta:
+        verbose_name = '예약 대기'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['lesson', 'user'], name='unique_waiting_waitlist',
+                condition=Q(status=WaitlistStatus.WAITING)),
+        ]
+        indexes = [
+            models.Index(fields=['lesson', 'id'], name='waitlist_queue_idx',
+                         condition=Q(status=WaitlistStatus.WAITING)),
+        ]
+
+    def __str__(self):
+        return f'[{self.user}] {self.lesson} {self.status}'
+
+    @property
+    def position(self) -> int | None:
+        if self.status != WaitlistStatus.WAITING:
+            return None
+        return Waitlist.objects.filter(lesson_id=self.lesson_id, status=WaitlistStatus.WAITING, id__lte=self.id).count()
+
+    @transaction.atomic
+    def leave(self) -> None:
+        Lesson.objects.select_for_update().get(pk=self.lesson_id)
+        updated: int = Waitlist.objects.filter(pk=self.pk, status=WaitlistStatus.WAITING).update(
+            status=WaitlistStatus.CANCELED, modified=timezone.now())
+        if not updated:
+            raise NotWaiting
+        self.status = WaitlistStatus.CANCELED
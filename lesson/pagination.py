@@ -0,0 +1,9 @@
+from core.pagination import KeysetCursorPagination
+
+
+class LessonCursorPagination(KeysetCursorPagination):
+    # lesson_schedule_idx(start_date, start_time, id) 순서로 읽는다.
+    ordering = ('start_date', 'start_time', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,9 +1,12 @@
 import datetime
 
+from django.db import transaction, IntegrityError
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from lesson.exceptions import InvalidEndTime
-from lesson.models import Lesson, Reservation
+from core.serializers import ValuesSerializer
+from lesson.exceptions import InvalidEndTime, InvalidBulkReservation, InvalidScheduleRange, AlreadyScheduled
+from lesson.models import Lesson, Reservation, Gym, LessonType, ReservationType, Weekday, Waitlist
 from user.models import CustomUser
 
 
@@ -22,6 +25,8 @@ class ReservationSerializer(serializers.ModelSerializer):
 
 
 class LessonSerializer(serializers.ModelSerializer):
+    available_seats = serializers.IntegerField(read_only=True, label="잔여석")
+
     class Meta:
         model = Lesson
         fields = '__all__'
@@ -33,19 +38,122 @@ class LessonSerializer(serializers.ModelSerializer):
             raise InvalidEndTime
         return attrs
 
+    def save(self, **kwargs) -> Lesson:
+        # 같은 시간의 수업은 미리 조회하지 않고 저장할 때 unique_lesson_schedule 위반으로 확인한다.
+        try:
+            with transaction.atomic():
+                return super(LessonSerializer, self).save(**kwargs)
+        except IntegrityError:
+            raise AlreadyScheduled
+
+
+lesson_values_serializer = ValuesSerializer(LessonSerializer, computed_values={
+    'available_seats': lambda get: Lesson.get_available_seats(get('max_capacity'), get('reserved_count')),
+})
+
+
+class BulkLessonSerializer(serializers.Serializer):
+    lessons = LessonSerializer(many=True, allow_empty=False, max_length=1000, label="수업 목록")
+
+    def get_lessons(self) -> list[Lesson]:
+        return [Lesson(**attrs) for attrs in self.validated_data['lessons']]
+
+
+class BulkLessonResultSerializer(serializers.Serializer):
+    lessons = LessonSerializer(many=True, label="생성된 수업 목록")
+    conflicts = LessonSerializer(many=True, label="이미 있어서 건너뛴 수업 목록")
+
+
+class ScheduleGenerateSerializer(serializers.Serializer):
+    max_days = 92
+
+    start_date = serializers.DateField(label="수업날짜 시작일")
+    end_date = serializers.DateField(label="수업날짜 종료일")
+    dry_run = serializers.BooleanField(default=False, label="생성하지 않고 결과만 보기")
+
+    def validate(self, attrs: dict):
+        days: int = (attrs['end_date'] - attrs['start_date']).days
+        if days < 0 or days >= self.max_days:
+            raise InvalidScheduleRange
+        return attrs
+
+
+class LessonFilterSerializer(serializers.Serializer):
+    gym = serializers.ChoiceField(choices=Gym.choices, required=False, label="장소")
+    type = serializers.ChoiceField(choices=LessonType.choices, required=False, label="수업종류")
+    start_date_from = serializers.DateField(required=False, label="수업날짜 시작일")
+    start_date_to = serializers.DateField(required=False, label="수업날짜 종료일")
+    has_free_seats = serializers.BooleanField(default=None, allow_null=True, label="예약 가능 여부")
+
+    def filter_queryset(self, queryset):
+        gym: str = self.validated_data.get('gym')
+        lesson_type: str = self.validated_data.get('type')
+        start_date_from: datetime.date = self.validated_data.get('start_date_from')
+        start_date_to: datetime.date = self.validated_data.get('start_date_to')
+        has_free_seats: bool = self.validated_data.get('has_free_seats')
+
+        if gym:
+            queryset = queryset.filter(gym=gym)
+        if lesson_type:
+            queryset = queryset.filter(type=lesson_type)
+        if start_date_from:
+            queryset = queryset.filter(start_date__gte=start_date_from)
+        if start_date_to:
+            queryset = queryset.filter(start_date__lte=start_date_to)
+        if has_free_seats is not None:
+            queryset = queryset.has_free_seats() if has_free_seats else queryset.full()
+        return queryset
+
+    def get_start_date(self) -> datetime.date | None:
+        start_date_from: datetime.date = self.validated_data.get('start_date_from')
+        if start_date_from and start_date_from == self.validated_data.get('start_date_to'):
+            return start_date_from
+        return None
+
+
+class LessonDetailQuerySerializer(serializers.Serializer):
+    active = serializers.BooleanField(default=False, label="취소되지 않은 예약만 보기")
+    reservation_limit = serializers.IntegerField(min_value=1, max_value=500, default=100, label="예약 목록 개수")
+    reservation_offset = serializers.IntegerField(min_value=0, default=0, label="예약 목록 시작 위치")
+
+    def get_reservation_queryset(self, lesson_id: int):
+        active: bool = self.validated_data['active']
+        reservation_limit: int = self.validated_data['reservation_limit']
+        reservation_offset: int = self.validated_data['reservation_offset']
+
+        queryset = Reservation.objects.filter(lesson_id=lesson_id)
+        if active:
+            queryset = queryset.filter(type=ReservationType.RESERVATION, cancel_reservation__isnull=True)
+        page_ids = queryset.order_by('id').values('id')[reservation_offset:reservation_offset + reservation_limit + 1]
+        return Reservation.objects.filter(id__in=page_ids).select_related('user').order_by('id')
+
+    def get_reservation_prefetch(self, lesson_id: int) -> Prefetch:
+        return Prefetch('reservations', queryset=self.get_reservation_queryset(lesson_id))
+
 
 class LessonDetailSerializer(serializers.ModelSerializer):
+    available_seats = serializers.IntegerField(read_only=True, label="잔여석")
     reservations = serializers.SerializerMethodField()
+    reservations_next_offset = serializers.SerializerMethodField()
 
     class Meta:
         model = Lesson
         fields = '__all__'
 
     def get_reservations(self, lesson: Lesson) -> ReservationSerializer(many=True):
-        queryset = Reservation.objects.filter(lesson=lesson).select_related('user')
-        s = ReservationSerializer(queryset, many=True, read_only=True, context=self.context)
+        reservations: list[Reservation] = list(lesson.reservations.all())
+        reservation_limit: int = self.context.get('reservation_limit')
+        if reservation_limit is not None:
+            reservations = reservations[:reservation_limit]
+        s = ReservationSerializer(reservations, many=True, read_only=True, context=self.context)
         return s.data
 
+    def get_reservations_next_offset(self, lesson: Lesson) -> int | None:
+        reservation_limit: int = self.context.get('reservation_limit')
+        if reservation_limit is None or len(lesson.reservations.all()) <= reservation_limit:
+            return None
+        return self.context.get('reservation_offset', 0) + reservation_limit
+
 
 class ReservationDetailSerializer(serializers.ModelSerializer):
     lesson = LessonSerializer()
@@ -54,3 +162,45 @@ class ReservationDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = '__all__'
+
+
+class WaitlistSerializer(serializers.ModelSerializer):
+    position = serializers.IntegerField(read_only=True, allow_null=True, label="대기 순번")
+
+    class Meta:
+        model = Waitlist
+        exclude = ('user', 'modified', )
+
+
+class RecurrenceSerializer(serializers.Serializer):
+    gym = serializers.ChoiceField(choices=Gym.choices, label="장소")
+    type = serializers.ChoiceField(choices=LessonType.choices, label="수업종류")
+    weekday = serializers.ChoiceField(choices=Weekday.choices, label="요일")
+    start_time = serializers.TimeField(label="시작시간")
+    start_date_from = serializers.DateField(label="수업날짜 시작일")
+    start_date_to = serializers.DateField(label="수업날짜 종료일")
+
+
+class BulkReservationSerializer(serializers.Serializer):
+    max_lesson_count = 100
+
+    lesson_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=max_lesson_count, label="수업 id 목록")
+    recurrence = RecurrenceSerializer(required=False, label="반복 수업 조건")
+
+    def validate(self, attrs: dict):
+        if ('lesson_ids' in attrs) == ('recurrence' in attrs):
+            raise InvalidBulkReservation
+        return attrs
+
+    def get_lesson_ids(self) -> list[int]:
+        if 'lesson_ids' in self.validated_data:
+            return self.validated_data['lesson_ids']
+        lessons = Lesson.objects.recurring(**self.validated_data['recurrence'])
+        return list(lessons.values_list('id', flat=True)[:self.max_lesson_count])
+
+
+class BulkReservationResultSerializer(serializers.Serializer):
+    lesson = serializers.IntegerField(label="수업 id")
+    reservation = serializers.IntegerField(allow_null=True, label="예약 id")
+    detail = serializers.CharField(allow_null=True, label="예약 실패 사유")
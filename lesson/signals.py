@@ -0,0 +1,32 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from lesson.models import Lesson, Reservation, ReservationType
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_start_date(sender, instance: Lesson, **kwargs):
+    if instance.pk is not None:
+        instance._saved_start_date = Lesson.objects.filter(pk=instance.pk).values_list('start_date', flat=True).first()
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_cache(sender, instance: Lesson, **kwargs):
+    start_dates = {instance.start_date, getattr(instance, '_saved_start_date', None)} - {None}
+    Lesson.invalidate_cache(*start_dates)
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reserved_seat(sender, instance: Reservation, **kwargs):
+    # 관리자 화면이나 CASCADE로 유효한 예약을 지우면 cancel을 거치지 않으므로 여기서 예약 인원을 줄인다.
+    if instance.type != ReservationType.RESERVATION or instance.cancel_reservation_id is not None:
+        return
+    start_date = Lesson.objects.filter(pk=instance.lesson_id).values_list('start_date', flat=True).first()
+    if start_date is None:
+        return
+    Lesson.objects.filter(pk=instance.lesson_id, reserved_count__gt=0).update(
+        reserved_count=F('reserved_count') - 1, modified=timezone.now())
+    Lesson.invalidate_cache(start_date)
@@ -1,18 +1,32 @@
 import datetime
-
-from django.db import connection
+import itertools
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection, IntegrityError, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.test import TransactionTestCase
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
 from core.tests import BaseTest
-from credit.models import PricePolicy
+from credit.models import PricePolicy, PurchaseCredit, CreditBalance
 from lesson.exceptions import NotEnoughCredit, ExceedMaxCapacity, AlreadyRegistered, InvalidCancelDate, \
-    AlreadyCanceled, NotYourReservation, InvalidEndTime, InvalidReservationType
-from lesson.models import Lesson, Gym, LessonType, Reservation
-from lesson.serializers import LessonSerializer
+    AlreadyCanceled, NotYourReservation, InvalidEndTime, InvalidReservationType, LessonNotFull, AlreadyWaiting, \
+    NotWaiting, AlreadyScheduled
+from lesson.models import Lesson, Gym, LessonType, Reservation, ScheduleTemplate, Waitlist, WaitlistStatus, \
+    ReservationType, LessonQuerySet, lesson_cache
+from lesson.serializers import LessonSerializer, LessonDetailQuerySerializer, lesson_values_serializer
+from user.models import CustomUser
 
 
 class LessonTestCase(BaseTest):
@@ -46,6 +60,17 @@ class LessonTestCase(BaseTest):
         for key in self.lesson_data:
             self.assertEqual(expected[key], serializer.data[key])
 
+    def test_lesson_values_serializer(self):
+        Lesson.objects.create(**self.lesson_data)
+        lesson = Lesson.objects.create(**{**self.lesson_data, 'start_time': datetime.time(16, 0), 'max_capacity': 1})
+        Lesson.objects.filter(id=lesson.id).update(reserved_count=2)
+
+        queryset = Lesson.objects.order_by('id')
+        rows: list[dict] = lesson_values_serializer.to_representation_many(
+            queryset.values(*lesson_values_serializer.value_fields))
+        self.assertEqual(rows, LessonSerializer(queryset, many=True).data)
+        self.assertEqual(rows[1]['available_seats'], 0)
+
     def test_lesson_create_serializer(self):
         serializer = LessonSerializer(data=self.lesson_data)
         serializer.is_valid(raise_exception=True)
@@ -69,7 +94,157 @@ class LessonTestCase(BaseTest):
 
         response: Response = self.admin_client.get(reverse('lesson'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_lesson_unique_schedule(self):
+        Lesson.objects.create(**self.lesson_data)
+        with transaction.atomic():
+            self.assertRaises(IntegrityError, Lesson.objects.create, **self.lesson_data)
+        Lesson.objects.create(**{**self.lesson_data, 'type': LessonType.SWIM})
+
+        response: Response = self.admin_client.post(reverse('lesson'), data=self.lesson_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], AlreadyScheduled.default_detail)
+        self.assertEqual(Lesson.objects.count(), 2)
+
+    def test_bulk_create_without_conflicts_race(self):
+        split_conflicts = LessonQuerySet.split_conflicts
+
+        def split_then_create_concurrently(queryset, lessons: list[Lesson]):
+            # 겹치는 수업을 고른 뒤 생성하기 전에 다른 요청이 같은 수업을 먼저 만든다.
+            new_lessons, conflicts = split_conflicts(queryset, lessons)
+            if not Lesson.objects.exists():
+                Lesson.objects.create(**self.lesson_data)
+            return new_lessons, conflicts
+
+        lessons: list[Lesson] = [Lesson(**self.lesson_data), Lesson(**{**self.lesson_data, 'gym': Gym.BUSAN})]
+        with mock.patch.object(LessonQuerySet, 'split_conflicts', autospec=True,
+                               side_effect=split_then_create_concurrently) as mocked_split_conflicts:
+            new_lessons, conflicts = Lesson.objects.bulk_create_without_conflicts(lessons)
+        self.assertEqual(mocked_split_conflicts.call_count, 2)
+        self.assertEqual([lesson.gym for lesson in new_lessons], [Gym.BUSAN])
+        self.assertEqual([lesson.gym for lesson in conflicts], [Gym.SEOUL])
+        self.assertIsNotNone(new_lessons[0].pk)
+        self.assertEqual(Lesson.objects.count(), 2)
+
+    def test_lesson_view_pagination(self):
+        for day in range(5):
+            Lesson.objects.create(**{**self.lesson_data, 'start_date': self.today + datetime.timedelta(5 - day)})
+
+        response: Response = self.user_client.get(reverse('lesson'), data={'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page: list[dict] = response.data['results']
+        self.assertEqual(len(first_page), 3)
+        self.assertEqual([lesson['start_date'] for lesson in first_page],
+                         sorted(lesson['start_date'] for lesson in first_page))
+
+        response: Response = self.user_client.get(response.data['next'])
+        second_page: list[dict] = response.data['results']
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertLess(first_page[-1]['start_date'], second_page[0]['start_date'])
+
+    def test_lesson_view_pagination_same_schedule(self):
+        # 수업날짜와 시작시간이 같아도 장소나 수업종류가 다르면 같은 시간에 열 수 있다.
+        lesson_ids: list[int] = [Lesson.objects.create(**{**self.lesson_data, 'gym': gym, 'type': lesson_type}).id
+                                 for gym, lesson_type in itertools.islice(itertools.product(Gym, LessonType), 5)]
+        response: Response = self.user_client.get(reverse('lesson'), data={'page_size': 2})
+        pages: list[list[int]] = [[lesson['id'] for lesson in response.data['results']]]
+        while response.data['next']:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.user_client.get(response.data['next'])
+            # 같은 시간의 수업이 많아도 offset 없이 (start_date, start_time, id) 위치 다음부터 읽는다.
+            self.assertNotIn('OFFSET', ' '.join(query['sql'] for query in queries))
+            pages.append([lesson['id'] for lesson in response.data['results']])
+        self.assertEqual(pages, [lesson_ids[0:2], lesson_ids[2:4], lesson_ids[4:]])
+
+        response = self.user_client.get(response.data['previous'])
+        self.assertEqual([lesson['id'] for lesson in response.data['results']], lesson_ids[2:4])
+        response = self.user_client.get(response.data['previous'])
+        self.assertEqual([lesson['id'] for lesson in response.data['results']], lesson_ids[0:2])
+        self.assertIsNone(response.data['previous'])
+
+        response = self.user_client.get(reverse('lesson'), data={'cursor': 'cD0x'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lesson_view_available_seats(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        lesson = Lesson.objects.create(**{**self.lesson_data, 'max_capacity': 3})
+        Reservation.objects.reserve(self.user, lesson)
+
+        response: Response = self.user_client.get(reverse('lesson'))
+        self.assertEqual(response.data['results'][0]['reserved_count'], 1)
+        self.assertEqual(response.data['results'][0]['available_seats'], 2)
+
+        response: Response = self.user_client.get(reverse('lesson-detail', kwargs={'pk': lesson.id}))
+        self.assertEqual(response.data['reserved_count'], 1)
+        self.assertEqual(response.data['available_seats'], 2)
+
+    def test_lesson_view_cache(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        url: str = reverse('lesson')
+        params: dict = {'start_date_from': str(lesson.start_date), 'start_date_to': str(lesson.start_date)}
+        hits: int = lesson_cache.get_stats()['hits']
+
+        self.user_client.get(url, params)
+        response: Response = self.user_client.get(url, params)
+        self.assertEqual(response.query_stats.count, 2)
+        self.assertEqual(lesson_cache.get_stats()['hits'], hits + 1)
+        self.assertEqual(response.data['results'][0]['available_seats'], 10)
+
+        Reservation.objects.reserve(self.user, lesson)
+        response: Response = self.user_client.get(url, params)
+        self.assertEqual(response.data['results'][0]['available_seats'], 9)
+
+        lesson.start_date += datetime.timedelta(1)
+        lesson.save()
+        response: Response = self.user_client.get(url, params)
+        self.assertEqual(response.data['results'], [])
+
+        Lesson.objects.bulk_create_without_conflicts([Lesson(**self.lesson_data)])
+        response: Response = self.user_client.get(url, params)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_lesson_view_N_Plus_1(self):
+        Lesson.objects.create(**self.lesson_data)
+        with CaptureQueriesContext(connection) as expected_num_queries:
+            self.user_client.get(reverse('lesson'), data={'page_size': 100})
+
+        for _ in range(99):
+            self.create_lesson(self.lesson_data)
+
+        with CaptureQueriesContext(connection) as checked_num_queries:
+            response: Response = self.user_client.get(reverse('lesson'), data={'page_size': 100})
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(len(expected_num_queries), len(checked_num_queries))
+
+    def test_lesson_view_filter(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        full_lesson = Lesson.objects.create(**{**self.lesson_data, 'max_capacity': 1})
+        Reservation.objects.reserve(self.user, full_lesson)
+        Lesson.objects.create(**{**self.lesson_data, 'gym': Gym.BUSAN})
+        Lesson.objects.create(**{**self.lesson_data, 'type': LessonType.SWIM})
+        Lesson.objects.create(**{**self.lesson_data, 'start_date': self.today + datetime.timedelta(20)})
+
+        def get_lesson_ids(**params) -> list[int]:
+            response: Response = self.user_client.get(reverse('lesson'), data=params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [lesson['id'] for lesson in response.data['results']]
+
+        self.assertEqual(len(get_lesson_ids()), 4)
+        self.assertEqual(len(get_lesson_ids(gym=Gym.BUSAN)), 1)
+        self.assertEqual(len(get_lesson_ids(type=LessonType.SWIM)), 1)
+        self.assertEqual(len(get_lesson_ids(start_date_from=self.today + datetime.timedelta(15))), 1)
+        self.assertEqual(len(get_lesson_ids(start_date_to=self.ten_day_later)), 3)
+        self.assertEqual(get_lesson_ids(has_free_seats=False), [full_lesson.id])
+        self.assertNotIn(full_lesson.id, get_lesson_ids(has_free_seats=True))
+
+        response: Response = self.user_client.get(reverse('lesson'), data={'gym': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_lesson_detail_view(self):
         # Given
@@ -111,6 +286,56 @@ class LessonTestCase(BaseTest):
 
         self.assertEqual(len(expected_num_queries), len(checked_num_queries))
 
+    def test_lesson_detail_view_reservation_page(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        self.user.buy_credit(price_policy, self.today)
+        for _ in range(2):
+            Reservation.objects.reserve(self.user, lesson).cancel(self.user)
+        active_reservation = Reservation.objects.reserve(self.user, lesson)
+        reservation_ids: list[int] = list(Reservation.objects.order_by('id').values_list('id', flat=True))
+
+        url: str = reverse('lesson-detail', kwargs={'pk': lesson.id})
+        response: Response = self.user_client.get(url, data={'active': True})
+        self.assertEqual([reservation['id'] for reservation in response.data['reservations']],
+                         [active_reservation.id])
+        self.assertIsNone(response.data['reservations_next_offset'])
+
+        response: Response = self.user_client.get(url, data={'reservation_limit': 3})
+        self.assertEqual([reservation['id'] for reservation in response.data['reservations']], reservation_ids[:3])
+        self.assertEqual(response.data['reservations_next_offset'], 3)
+
+        response: Response = self.user_client.get(url, data={'reservation_limit': 3, 'reservation_offset': 3})
+        self.assertEqual([reservation['id'] for reservation in response.data['reservations']], reservation_ids[3:])
+        self.assertIsNone(response.data['reservations_next_offset'])
+
+    def test_lesson_detail_view_not_modified(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        url: str = reverse('lesson-detail', kwargs={'pk': lesson.id})
+        etag: str = self.user_client.get(url)['ETag']
+
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.query_stats.count, 3)
+
+        response: Response = self.user_client.get(url, {'active': True}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reservation = Reservation.objects.reserve(self.user, lesson)
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        reservation.cancel(self.user)
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reserved_count'], 0)
+
+        response: Response = self.user_client.get(reverse('lesson-detail', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_lesson_is_close(self):
         PricePolicy.objects.create(**self.policy_data)
         future_lesson = Lesson.objects.create(**{**self.lesson_data, 'max_capacity': 1})
@@ -142,6 +367,31 @@ class LessonTestCase(BaseTest):
         Reservation.objects.reserve(self.admin, lesson)
         self.assertTrue(lesson.is_full())
 
+    def test_lesson_reserved_count(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = Lesson.objects.create(**{**self.lesson_data, 'max_capacity': 2})
+        self.user.buy_credit(price_policy, self.today)
+        self.admin.buy_credit(price_policy, self.today)
+
+        user_reservation = Reservation.objects.reserve(self.user, lesson)
+        Reservation.objects.reserve(self.admin, lesson)
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.reserved_count, 2)
+        with CaptureQueriesContext(connection) as num_queries:
+            self.assertTrue(lesson.is_full())
+        self.assertEqual(len(num_queries), 0)
+
+        user_reservation.cancel(self.user)
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.reserved_count, 1)
+        self.assertFalse(lesson.is_full())
+
+    def test_lesson_reserved_count_read_only(self):
+        serializer = LessonSerializer(data={**self.lesson_data, 'reserved_count': 5})
+        serializer.is_valid(raise_exception=True)
+        lesson = serializer.save()
+        self.assertEqual(lesson.reserved_count, 0)
+
     def test_lesson_is_cancelable(self):
         PricePolicy.objects.create(**self.policy_data)
         lesson = Lesson.objects.create(**self.lesson_data)
@@ -176,6 +426,65 @@ class LessonTestCase(BaseTest):
             **{**self.lesson_data, 'start_date': today + datetime.timedelta(4)})
         self.assertEqual(four_day_later_lesson.get_cancel_credit(), lesson.credit_count)
 
+    def test_bulk_lesson_view(self):
+        existing_lesson = Lesson.objects.create(**self.lesson_data)
+        lesson_data: dict = {**self.lesson_data, 'start_date': str(self.ten_day_later),
+                             'start_time': '13:00:00', 'end_time': '15:00:00'}
+        lessons: list[dict] = [lesson_data, {**lesson_data, 'gym': Gym.BUSAN}] + [
+            {**lesson_data, 'start_date': str(self.ten_day_later + datetime.timedelta(day))} for day in range(1, 30)]
+        lessons.append(lessons[-1])
+
+        response: Response = self.user_client.post(reverse('lesson-bulk'), data={'lessons': lessons}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['lessons']), 30)
+        self.assertEqual(len(response.data['conflicts']), 2)
+        self.assertEqual(Lesson.objects.count(), 31)
+        self.assertEqual(Lesson.objects.filter(start_date=existing_lesson.start_date, gym=Gym.SEOUL).count(), 1)
+        self.assertWithinQueryBudget(response)
+
+        response: Response = self.user_client.post(
+            reverse('lesson-bulk'), data={'lessons': [{**lesson_data, 'end_time': '12:00:00'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_generate_lessons_command(self):
+        start_date: datetime.date = self.ten_day_later
+        end_date: datetime.date = start_date + datetime.timedelta(27)
+        template_data: dict = {key: self.lesson_data[key] for key in (
+            'gym', 'type', 'credit_count', 'max_capacity', 'start_time', 'end_time')}
+        for weekday in (1, 3, 5):
+            ScheduleTemplate.objects.create(**template_data, weekday=weekday)
+        ScheduleTemplate.objects.create(**template_data, weekday=2, is_active=False)
+        Lesson.objects.create(**{**self.lesson_data, 'start_date': start_date + datetime.timedelta(
+            (1 - start_date.isoweekday()) % 7)})
+
+        stdout = StringIO()
+        call_command('generate_lessons', '--from', str(start_date), '--to', str(end_date), '--dry-run', stdout=stdout)
+        self.assertIn('11 lesson(s) to create, 1 skipped', stdout.getvalue())
+        self.assertEqual(Lesson.objects.count(), 1)
+
+        call_command('generate_lessons', '--from', str(start_date), '--to', str(end_date), stdout=StringIO())
+        self.assertEqual(Lesson.objects.count(), 12)
+        self.assertEqual({lesson.start_date.isoweekday() for lesson in Lesson.objects.all()}, {1, 3, 5})
+
+        call_command('generate_lessons', '--from', str(start_date), '--to', str(end_date), stdout=StringIO())
+        self.assertEqual(Lesson.objects.count(), 12)
+
+    def test_schedule_generate_view(self):
+        ScheduleTemplate.objects.create(
+            gym=Gym.SEOUL, type=LessonType.SWIM, weekday=self.ten_day_later.isoweekday(), credit_count=10,
+            max_capacity=5, start_time=datetime.time(9, 0), end_time=datetime.time(10, 0))
+        data: dict = {'start_date': str(self.ten_day_later), 'end_date': str(self.ten_day_later + datetime.timedelta(13))}
+
+        response: Response = self.user_client.post(reverse('lesson-schedule-generate'), data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([lesson['start_date'] for lesson in response.data['lessons']],
+                         [str(self.ten_day_later), str(self.ten_day_later + datetime.timedelta(7))])
+        self.assertWithinQueryBudget(response)
+
+        data['end_date'] = str(self.ten_day_later + datetime.timedelta(100))
+        response: Response = self.user_client.post(reverse('lesson-schedule-generate'), data=data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ReservationTestCase(BaseTest):
     lesson_data = {
@@ -214,6 +523,15 @@ class ReservationTestCase(BaseTest):
         self.assertTrue(Reservation.objects.reserve(self.user, lesson) is not None)
         self.assertRaises(AlreadyRegistered, Reservation.objects.reserve, self.user, lesson)
 
+    def test_reservation_unique_active_reservation(self):
+        lesson = self._buy_credit_create_lesson(self.lesson_data)
+        reservation = Reservation.objects.reserve(self.user, lesson)
+        with transaction.atomic():
+            self.assertRaises(IntegrityError, Reservation.objects.create, user=self.user, lesson=lesson)
+
+        reservation.cancel(self.user)
+        self.assertIsNotNone(Reservation.objects.reserve(self.user, lesson))
+
     def test_reservation_cancel_NotYourReservation(self):
         lesson = self._buy_credit_create_lesson(self.lesson_data)
         reservation = Reservation.objects.reserve(self.user, lesson)
@@ -268,6 +586,8 @@ class ReservationTestCase(BaseTest):
         admin_reservation = Reservation.objects.reserve(self.admin, lesson)
 
         # Then
+        user_remaining_credits[0].refresh_from_db()
+        admin_remaining_credits[0].refresh_from_db()
         self.assertEqual(self.user.credit_count, init_user_credit_count - lesson.credit_count)
         self.assertEqual(user_remaining_credits[0].remaining_count,
                          user_remaining_credits[0].count - lesson.credit_count)
@@ -280,6 +600,8 @@ class ReservationTestCase(BaseTest):
         admin_reservation.cancel(self.admin)
 
         # Then
+        user_remaining_credits[0].refresh_from_db()
+        admin_remaining_credits[0].refresh_from_db()
         self.assertEqual(self.user.credit_count, init_user_credit_count)
         self.assertEqual(user_remaining_credits[0].remaining_count, user_remaining_credits[0].count)
         self.assertEqual(self.admin.credit_count, init_admin_credit_count)
@@ -289,3 +611,304 @@ class ReservationTestCase(BaseTest):
         user_reservation.cancel(self.user)
 
         self.assertEqual(self.user.credit_count, init_user_credit_count)
+
+    def test_bulk_reserve(self):
+        lesson = self._buy_credit_create_lesson(self.lesson_data)
+        lessons: list[Lesson] = [self.create_lesson(self.lesson_data) for _ in range(3)]
+        full_lesson = self.create_lesson(self.lesson_data, max_capacity=0)
+        expensive_lesson = self.create_lesson(self.lesson_data, credit_count=800)
+        Reservation.objects.reserve(self.user, lesson)
+        lesson_ids: list[int] = [lesson.id, full_lesson.id, 0] + [lesson.id for lesson in lessons] + [
+            expensive_lesson.id, lessons[0].id]
+
+        results: list[dict] = Reservation.objects.bulk_reserve(self.user, lesson_ids)
+
+        self.assertEqual([result['lesson'] for result in results],
+                         [lesson.id, full_lesson.id, 0] + [lesson.id for lesson in lessons] + [expensive_lesson.id])
+        self.assertEqual([result['detail'] for result in results[:3]],
+                         [AlreadyRegistered.default_detail, ExceedMaxCapacity.default_detail, NotFound.default_detail])
+        self.assertEqual(results[-1]['detail'], NotEnoughCredit.default_detail)
+        for lesson, result in zip(lessons, results[3:6]):
+            lesson.refresh_from_db()
+            self.assertEqual(lesson.reserved_count, 1)
+            reservation = Reservation.objects.get(pk=result['reservation'])
+            self.assertEqual(reservation.lesson, lesson)
+            self.assertEqual(reservation.credits.get().count, -lesson.credit_count)
+        self.assertEqual(self.user.credit_count, self.policy_data['credit_count'] - lesson.credit_count * 4)
+
+    def test_bulk_reserve_view(self):
+        self._buy_credit_create_lesson(self.lesson_data)
+        lesson_date: datetime.date = self.today + datetime.timedelta(1)
+        weekly_lessons: list[Lesson] = [
+            Lesson.objects.create(**{**self.lesson_data, 'start_date': lesson_date + datetime.timedelta(7 * week)})
+            for week in range(3)]
+        Lesson.objects.create(**{**self.lesson_data, 'start_date': lesson_date + datetime.timedelta(1)})
+        Lesson.objects.create(**{**self.lesson_data, 'start_date': lesson_date, 'gym': Gym.BUSAN})
+        recurrence: dict = {
+            'gym': Gym.SEOUL,
+            'type': LessonType.YOGA,
+            'weekday': lesson_date.isoweekday(),
+            'start_time': str(self.lesson_data['start_time']),
+            'start_date_from': str(self.today),
+            'start_date_to': str(self.today + datetime.timedelta(30)),
+        }
+
+        response: Response = self.user_client.post(
+            reverse('reservation-bulk'), data={'recurrence': recurrence}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([result['lesson'] for result in response.data], [lesson.id for lesson in weekly_lessons])
+        self.assertTrue(all(result['reservation'] for result in response.data))
+        self.assertWithinQueryBudget(response)
+
+        response: Response = self.user_client.post(
+            reverse('reservation-bulk'), data={'lesson_ids': [weekly_lessons[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]['detail'], AlreadyRegistered.default_detail)
+
+        response: Response = self.user_client.post(
+            reverse('reservation-bulk'), data={'lesson_ids': [weekly_lessons[0].id], 'recurrence': recurrence},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_reserve_query_count(self):
+        self._buy_credit_create_lesson(self.lesson_data)
+        lesson_ids: list[int] = [self.create_lesson(self.lesson_data).id for _ in range(2)]
+        with CaptureQueriesContext(connection) as expected_num_queries:
+            Reservation.objects.bulk_reserve(self.user, lesson_ids)
+
+        lesson_ids: list[int] = [self.create_lesson(self.lesson_data, credit_count=10).id for _ in range(10)]
+        with CaptureQueriesContext(connection) as checked_num_queries:
+            Reservation.objects.bulk_reserve(self.user, lesson_ids)
+        self.assertEqual(len(expected_num_queries), len(checked_num_queries))
+
+    def test_waitlist_join(self):
+        lesson = self._buy_credit_create_lesson({**self.lesson_data, 'max_capacity': 1})
+        self.assertRaises(LessonNotFull, Waitlist.objects.join, self.user, lesson)
+
+        Reservation.objects.reserve(self.user, lesson)
+        self.assertRaises(AlreadyRegistered, Waitlist.objects.join, self.user, lesson)
+        self.assertRaises(NotEnoughCredit, Waitlist.objects.join, self.admin, lesson)
+
+        self.admin.buy_credit(PricePolicy.objects.get(), self.today)
+        waitlist: Waitlist = Waitlist.objects.join(self.admin, lesson)
+        self.assertEqual(waitlist.position, 1)
+        self.assertRaises(AlreadyWaiting, Waitlist.objects.join, self.admin, lesson)
+
+        waitlist.leave()
+        self.assertIsNone(waitlist.position)
+        self.assertRaises(NotWaiting, waitlist.leave)
+
+    def test_waitlist_promote_on_cancel(self):
+        lesson = self._buy_credit_create_lesson({**self.lesson_data, 'max_capacity': 1})
+        reservation = Reservation.objects.reserve(self.user, lesson)
+        price_policy = PricePolicy.objects.get()
+        members: list[CustomUser] = [CustomUser.objects.create_user(f'member{index}') for index in range(3)]
+        for member in members:
+            member.buy_credit(price_policy, self.today)
+        waitlists: list[Waitlist] = [Waitlist.objects.join(member, lesson) for member in members]
+        self.assertEqual([waitlist.position for waitlist in waitlists], [1, 2, 3])
+        PurchaseCredit.objects.filter(user=members[0]).update(remaining_count=0)
+
+        reservation.cancel(self.user)
+
+        for waitlist in waitlists:
+            waitlist.refresh_from_db()
+        self.assertEqual([waitlist.status for waitlist in waitlists],
+                         [WaitlistStatus.FAILED, WaitlistStatus.PROMOTED, WaitlistStatus.WAITING])
+        self.assertEqual(waitlists[0].detail, NotEnoughCredit.default_detail)
+        self.assertEqual(waitlists[1].reservation.user, members[1])
+        self.assertEqual(waitlists[1].reservation.credits.get().count, -lesson.credit_count)
+        self.assertEqual(waitlists[2].position, 1)
+        self.assertEqual(members[1].credit_count, self.policy_data['credit_count'] - lesson.credit_count)
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.reserved_count, 1)
+
+    def test_waitlist_promote_attempts_capped(self):
+        lesson = self._buy_credit_create_lesson({**self.lesson_data, 'max_capacity': 1})
+        price_policy = PricePolicy.objects.get()
+        max_attempts: int = Waitlist.objects.max_promotion_attempts
+
+        def cancel_with_waitlists(failing_count: int) -> tuple[list[Waitlist], Response]:
+            reservation = Reservation.objects.reserve(self.user, lesson)
+            members: list[CustomUser] = [
+                CustomUser.objects.create_user(f'member{Waitlist.objects.count()}-{index}')
+                for index in range(failing_count + 1)]
+            for member in members:
+                member.buy_credit(price_policy, self.today)
+            waitlists: list[Waitlist] = [Waitlist.objects.join(member, lesson) for member in members]
+            # 대기한 뒤 다른 수업에 크레딧을 모두 쓴 대기자
+            PurchaseCredit.objects.filter(user__in=members[:failing_count]).update(remaining_count=0)
+            CreditBalance.objects.filter(user__in=members[:failing_count]).update(count=0)
+
+            response: Response = self.user_client.delete(reverse('reservation-detail', kwargs={'pk': reservation.id}))
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            self.assertWithinQueryBudget(response)
+            for waitlist in waitlists:
+                waitlist.refresh_from_db()
+            return waitlists, response
+
+        # 실패할 대기자 뒤에 있는 대기자도 같은 취소에서 예약된다.
+        waitlists, response = cancel_with_waitlists(max_attempts - 1)
+        self.assertEqual([waitlist.status for waitlist in waitlists],
+                         [WaitlistStatus.FAILED] * (max_attempts - 1) + [WaitlistStatus.PROMOTED])
+        self.assertEqual(waitlists[0].detail, NotEnoughCredit.default_detail)
+        promoted_query_count: int = response.query_stats.count
+
+        waitlists[-1].reservation.cancel(waitlists[-1].user)
+        # 시도 횟수를 넘는 대기는 WAITING으로 남고, 대기열이 길어도 취소 쿼리 수가 늘지 않는다.
+        waitlists, response = cancel_with_waitlists(max_attempts * 2)
+        self.assertEqual([waitlist.status for waitlist in waitlists],
+                         [WaitlistStatus.FAILED] * max_attempts + [WaitlistStatus.WAITING] * (max_attempts + 1))
+        self.assertLessEqual(response.query_stats.count, promoted_query_count)
+
+    def test_waitlist_view(self):
+        lesson = self._buy_credit_create_lesson({**self.lesson_data, 'max_capacity': 1})
+        url: str = reverse('waitlist', kwargs={'pk': lesson.id})
+        response: Response = self.user_client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.admin.buy_credit(PricePolicy.objects.get(), self.today)
+        reservation = Reservation.objects.reserve(self.admin, lesson)
+        response: Response = self.user_client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['position'], 1)
+        self.assertWithinQueryBudget(response)
+
+        response: Response = self.admin_client.delete(reverse('reservation-detail', kwargs={'pk': reservation.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertWithinQueryBudget(response)
+
+        response: Response = self.user_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], WaitlistStatus.PROMOTED)
+        self.assertIsNotNone(response.data['reservation'])
+        self.assertWithinQueryBudget(response)
+
+        response: Response = self.user_client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reservation_export_view(self):
+        lesson = self._buy_credit_create_lesson(self.lesson_data)
+        reservation = Reservation.objects.reserve(self.user, lesson)
+        reservation.cancel(self.user)
+        response = self.admin_client.get(reverse('reservation-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows: list[dict] = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [reservation.id, reservation.cancel_reservation_id])
+        self.assertEqual(rows[0]['cancel_reservation'], reservation.cancel_reservation_id)
+        self.assertEqual(rows[0]['lesson__start_date'], str(lesson.start_date))
+
+    def test_export_ledger_command(self):
+        lesson = self._buy_credit_create_lesson(self.lesson_data)
+        for _ in range(3):
+            Reservation.objects.reserve(self.user, lesson).cancel(self.user)
+        reservation_ids: list[int] = list(Reservation.objects.order_by('id').values_list('id', flat=True))
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_path: str = os.path.join(directory, 'reservations.csv')
+            call_command('export_ledger', 'reservation', '--format', 'csv', '--output', output_path, stderr=StringIO())
+            with open(output_path, encoding='utf-8') as output:
+                lines: list[str] = output.read().splitlines()
+            self.assertEqual(len(lines), len(reservation_ids) + 1)
+
+            with open(output_path, 'w', encoding='utf-8') as output:
+                output.write('\n'.join(lines[:3]) + '\n')
+            call_command('export_ledger', 'reservation', '--format', 'csv', '--output', output_path,
+                         '--after', str(reservation_ids[1]), stderr=StringIO())
+            with open(output_path, encoding='utf-8') as output:
+                self.assertEqual(output.read().splitlines(), lines)
+
+    def test_reservation_queries_indexed(self):
+        self.assertIndexed(Reservation, 'reservation_active_idx', ['lesson', 'id'],
+                           Q(type=ReservationType.RESERVATION, cancel_reservation__isnull=True))
+
+    def test_delete_reservation_releases_seat(self):
+        lesson = Lesson.objects.create(**{**self.lesson_data, 'credit_count': 0, 'max_capacity': 1})
+        reservation: Reservation = Reservation.objects.reserve(self.user, lesson)
+        lesson.refresh_from_db()
+        self.assertTrue(lesson.is_full())
+
+        reservation.delete()
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.reserved_count, 0)
+        Reservation.objects.reserve(self.admin, lesson)
+        lesson.refresh_from_db()
+        self.assertEqual(lesson.reserved_count, 1)
+
+    @skipUnless(connection.vendor == 'sqlite', '실행 계획은 DB마다 다르다')
+    def test_reservation_queries_use_index(self):
+        query_serializer = LessonDetailQuerySerializer(data={'active': True})
+        query_serializer.is_valid(raise_exception=True)
+        active_reservations = Reservation.objects.filter(
+            lesson_id=1, type=ReservationType.RESERVATION, cancel_reservation__isnull=True).order_by('id')
+        self.assertIn('reservation_active_idx', active_reservations.values('id').explain())
+        self.assertIn('reservation_active_idx', query_serializer.get_reservation_queryset(1).explain())
+        self.assertIn('unique_active_reservation', active_reservations.filter(user=self.user).explain())
+
+
+class ReservationMigrationTestCase(TransactionTestCase):
+    """0007 이전 스키마에 중복 예약을 만들고 0007을 적용한다. 0012의 중복 수업 정리도 같은 방식으로 확인한다."""
+    migrate_from = [('lesson', '0006_alter_reservation_cancel_reservation'), ('credit', '0016_credit_remaining_count')]
+    migrate_to = [('lesson', '0007_lesson_reserved_count_and_more')]
+
+    def migrate(self, targets: list[tuple[str, str]]):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_cancel_duplicate_reservations(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('user', 'CustomUser')
+        Lesson = apps.get_model('lesson', 'Lesson')
+        Reservation = apps.get_model('lesson', 'Reservation')
+        Credit = apps.get_model('credit', 'Credit')
+        CreditBalance = apps.get_model('credit', 'CreditBalance')
+        user = User.objects.create(username='user', phone_number='01012345678')
+        lesson = Lesson.objects.create(**{**LessonTestCase.lesson_data, 'max_capacity': 1})
+        purchase_credit = Credit.objects.create(
+            user=user, type='구매', count=300, remaining_count=100, start_date=BaseTest.today, message='구매')
+        CreditBalance.objects.create(user=user, count=100)
+        reservations = [Reservation.objects.create(user=user, lesson=lesson) for _ in range(2)]
+        other_user = User.objects.create(username='other', phone_number='01012345678')
+        other_reservation = Reservation.objects.create(user=other_user, lesson=lesson)
+        for reservation in reservations:
+            Credit.objects.create(user=user, type='사용', count=-100, purchased_credit=purchase_credit,
+                                  reservation=reservation, start_date=BaseTest.today, message='예약')
+
+        with self.assertLogs('gym.migrations', level='WARNING') as logs:
+            apps = self.migrate(self.migrate_to)
+        self.assertIn(f'canceled duplicate reservation {reservations[1].id}', logs.output[0])
+        self.assertIn(f'lesson {lesson.id} has 2 active reservations over max_capacity 1', logs.output[1])
+        Lesson = apps.get_model('lesson', 'Lesson')
+        Reservation = apps.get_model('lesson', 'Reservation')
+        Credit = apps.get_model('credit', 'Credit')
+        CreditBalance = apps.get_model('credit', 'CreditBalance')
+        self.assertEqual(
+            list(Reservation.objects.filter(type='예약', cancel_reservation__isnull=True).values_list('id', flat=True)),
+            [reservations[0].id, other_reservation.id])
+        self.assertEqual(Lesson.objects.get().reserved_count, 2)
+        self.assertEqual(Credit.objects.get(type='환불').count, 100)
+        self.assertEqual(Credit.objects.get(pk=purchase_credit.pk).remaining_count, 200)
+        self.assertEqual(CreditBalance.objects.get(user_id=user.id).count, 200)
+
+    def test_delete_duplicate_lessons(self):
+        apps = self.migrate([('lesson', '0011_reservation_active_idx')])
+        User = apps.get_model('user', 'CustomUser')
+        Lesson = apps.get_model('lesson', 'Lesson')
+        Reservation = apps.get_model('lesson', 'Reservation')
+        user = User.objects.create(username='user', phone_number='01012345678')
+        lessons = [Lesson.objects.create(**LessonTestCase.lesson_data) for _ in range(3)]
+        Reservation.objects.create(user=user, lesson=lessons[1])
+        busan_lessons = [Lesson.objects.create(**{**LessonTestCase.lesson_data, 'gym': '부산'}) for _ in range(2)]
+
+        with self.assertLogs('gym.migrations', level='WARNING') as logs:
+            apps = self.migrate([('lesson', '0012_lesson_unique_lesson_schedule')])
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn(f'deleted duplicate lesson {lessons[0].id} (kept lesson {lessons[1].id})', '\n'.join(logs.output))
+        Lesson = apps.get_model('lesson', 'Lesson')
+        # 예약이 있는 수업, 없으면 가장 먼저 만든 수업이 남는다.
+        self.assertEqual(set(Lesson.objects.values_list('id', flat=True)), {lessons[1].id, busan_lessons[0].id})
@@ -4,7 +4,12 @@ from lesson import views
 
 urlpatterns = [
     path('', views.LessonAPIView.as_view(), name='lesson'),
+    path('bulk/', views.BulkLessonAPIView.as_view(), name='lesson-bulk'),
+    path('schedule/generate/', views.ScheduleGenerateAPIView.as_view(), name='lesson-schedule-generate'),
     path('<int:pk>/', views.LessonDetailAPIView.as_view(), name='lesson-detail'),
     path('<int:pk>/reservation/', views.ReservationAPIView.as_view(), name='reservation'),
+    path('<int:pk>/waitlist/', views.WaitlistAPIView.as_view(), name='waitlist'),
+    path('reservation/bulk/', views.BulkReservationAPIView.as_view(), name='reservation-bulk'),
     path('reservation/<int:pk>/', views.ReservationDetailAPIView.as_view(), name='reservation-detail'),
+    path('reservation/export/', views.ReservationExportAPIView.as_view(), name='reservation-export'),
 ]
@@ -2,20 +2,58 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics
 from rest_framework import status
 from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from lesson.serializers import LessonSerializer, ReservationDetailSerializer, LessonDetailSerializer
-from lesson.models import Reservation, Lesson
+from core.conditional import conditional_get
+from core.exports import ExportQuerySerializer, RowExporter
+from lesson.exceptions import NotWaiting
+from lesson.pagination import LessonCursorPagination
+from lesson.serializers import LessonSerializer, ReservationDetailSerializer, LessonDetailSerializer, \
+    LessonFilterSerializer, LessonDetailQuerySerializer, BulkReservationSerializer, BulkReservationResultSerializer, \
+    BulkLessonSerializer, BulkLessonResultSerializer, ScheduleGenerateSerializer, WaitlistSerializer, \
+    lesson_values_serializer
+from lesson.models import Reservation, Lesson, ScheduleTemplate, Waitlist, WaitlistStatus, lesson_cache
 
 
 class LessonAPIView(generics.ListCreateAPIView):
+    # POST는 unique_lesson_schedule 위반을 잡는 savepoint와 그 해제를 포함한다.
+    query_budget = {'GET': 3, 'POST': 5}
+    read_from_replica = True
     serializer_class = LessonSerializer
+    pagination_class = LessonCursorPagination
     queryset = Lesson.objects.all()
 
+    def get_queryset(self):
+        queryset = super(LessonAPIView, self).get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        return self.get_filter_serializer().filter_queryset(queryset)
+
+    def get_filter_serializer(self) -> LessonFilterSerializer:
+        filter_serializer = LessonFilterSerializer(data=self.request.query_params)
+        filter_serializer.is_valid(raise_exception=True)
+        return filter_serializer
+
+    def list(self, request, *args, **kwargs):
+        filter_serializer: LessonFilterSerializer = self.get_filter_serializer()
+        data: dict = lesson_cache.get_or_set(
+            Lesson.get_cache_namespace(filter_serializer.get_start_date()), request.build_absolute_uri(), self.list_values)
+        return Response(data)
+
+    def list_values(self) -> dict:
+        # 읽기 전용 목록은 모델 인스턴스 대신 .values() 행에서 바로 응답을 만든다.
+        rows: list[dict] = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset()).values(*lesson_values_serializer.value_fields))
+        return self.get_paginated_response(lesson_values_serializer.to_representation_many(rows)).data
+
     @swagger_auto_schema(
         operation_summary="수업 목록 가져오기",
+        operation_description="수업날짜, 시작시간 순으로 정렬된 커서 페이지를 반환합니다. "
+                              "start_date_from과 start_date_to가 같은 하루 단위 목록은 캐시됩니다.",
+        query_serializer=LessonFilterSerializer,
     )
     def get(self, request, *args, **kwargs):
         return super(LessonAPIView, self).get(request, *args, **kwargs)
@@ -27,18 +65,73 @@ class LessonAPIView(generics.ListCreateAPIView):
         return super(LessonAPIView, self).post(request, *args, **kwargs)
 
 
+class BulkLessonAPIView(APIView):
+    query_budget = 16
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        request_body=BulkLessonSerializer,
+        operation_summary="수업 여러 개 한 번에 생성(관리자)",
+        operation_description="장소, 수업종류, 수업날짜, 시작시간이 같은 수업이 이미 있으면 건너뛰고 conflicts로 반환합니다.",
+        responses={status.HTTP_201_CREATED: BulkLessonResultSerializer()},
+    )
+    def post(self, request: Request):
+        serializer = BulkLessonSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lessons, conflicts = Lesson.objects.bulk_create_without_conflicts(serializer.get_lessons())
+        return Response(status=status.HTTP_201_CREATED,
+                        data=BulkLessonResultSerializer({'lessons': lessons, 'conflicts': conflicts}).data)
+
+
+class ScheduleGenerateAPIView(APIView):
+    query_budget = 20
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        request_body=ScheduleGenerateSerializer,
+        operation_summary="수업 시간표로 수업 생성(관리자)",
+        operation_description="사용 중인 수업 시간표로 기간 안의 수업을 생성합니다. "
+                              "이미 있는 수업은 건너뛰고 conflicts로 반환합니다.",
+        responses={status.HTTP_201_CREATED: BulkLessonResultSerializer()},
+    )
+    def post(self, request: Request):
+        serializer = ScheduleGenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        lessons, conflicts = ScheduleTemplate.objects.materialize(
+            serializer.validated_data['start_date'], serializer.validated_data['end_date'],
+            commit=not serializer.validated_data['dry_run'])
+        return Response(status=status.HTTP_201_CREATED,
+                        data=BulkLessonResultSerializer({'lessons': lessons, 'conflicts': conflicts}).data)
+
+
+def get_lesson_detail_version(request, pk: int) -> tuple | None:
+    return Lesson.objects.get_detail_version(pk)
+
+
 class LessonDetailAPIView(APIView):
+    query_budget = 5
+
     @swagger_auto_schema(
         operation_summary="수업 예약 확인",
+        operation_description="예약 목록은 id 순서로 reservation_limit개씩 나누어 반환합니다. "
+                              "다음 목록은 reservations_next_offset을 reservation_offset으로 요청하세요. "
+                              "응답의 ETag를 If-None-Match로 보내면 바뀐 내용이 없을 때 304를 반환합니다.",
+        query_serializer=LessonDetailQuerySerializer,
         responses={status.HTTP_200_OK: LessonDetailSerializer()}
     )
+    @conditional_get(get_lesson_detail_version)
     def get(self, request: Request, pk: int):
-        lesson: Lesson = get_object_or_404(Lesson, pk=pk)
-        serializer = LessonDetailSerializer(lesson)
+        query_serializer = LessonDetailQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        queryset = Lesson.objects.prefetch_related(query_serializer.get_reservation_prefetch(pk))
+        lesson: Lesson = get_object_or_404(queryset, pk=pk)
+        serializer = LessonDetailSerializer(lesson, context={**query_serializer.validated_data})
         return Response(status=status.HTTP_200_OK, data=serializer.data)
 
 
 class ReservationAPIView(APIView):
+    query_budget = 22
+
     @swagger_auto_schema(
         operation_summary="수업 예약 하기",
         responses={status.HTTP_201_CREATED: ReservationDetailSerializer()},
@@ -50,12 +143,89 @@ class ReservationAPIView(APIView):
         return Response(status=status.HTTP_201_CREATED, data=serializer.data)
 
 
+class WaitlistAPIView(APIView):
+    query_budget = {'GET': 4, 'POST': 16, 'DELETE': 7}
+
+    @swagger_auto_schema(
+        operation_summary="수업 예약 대기 확인",
+        operation_description="가장 최근 대기 내역을 반환합니다. 취소된 예약이 생기면 대기 순서대로 자동 예약됩니다.",
+        responses={status.HTTP_200_OK: WaitlistSerializer()},
+    )
+    def get(self, request: Request, pk: int):
+        waitlist: Waitlist | None = Waitlist.objects.filter(lesson_id=pk, user=request.user).order_by('-id').first()
+        if waitlist is None:
+            raise NotWaiting
+        return Response(status=status.HTTP_200_OK, data=WaitlistSerializer(waitlist).data)
+
+    @swagger_auto_schema(
+        operation_summary="수업 예약 대기 하기",
+        operation_description="정원이 찬 수업에만 대기할 수 있습니다.",
+        responses={status.HTTP_201_CREATED: WaitlistSerializer()},
+    )
+    def post(self, request: Request, pk: int):
+        lesson: Lesson = get_object_or_404(Lesson, pk=pk)
+        waitlist: Waitlist = Waitlist.objects.join(request.user, lesson)
+        return Response(status=status.HTTP_201_CREATED, data=WaitlistSerializer(waitlist).data)
+
+    @swagger_auto_schema(
+        operation_summary="수업 예약 대기 취소 하기",
+        responses={status.HTTP_204_NO_CONTENT: ''},
+    )
+    def delete(self, request: Request, pk: int):
+        waitlist: Waitlist = get_object_or_404(
+            Waitlist, lesson_id=pk, user=request.user, status=WaitlistStatus.WAITING)
+        waitlist.leave()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BulkReservationAPIView(APIView):
+    query_budget = 20
+
+    @swagger_auto_schema(
+        request_body=BulkReservationSerializer,
+        operation_summary="수업 여러 개 한 번에 예약 하기",
+        operation_description="lesson_ids 또는 recurrence(매주 같은 요일/시간 수업) 중 하나를 입력하세요. "
+                              "예약할 수 있는 수업만 한 트랜잭션으로 예약하고 수업별 결과를 반환합니다.",
+        responses={status.HTTP_201_CREATED: BulkReservationResultSerializer(many=True)},
+    )
+    def post(self, request: Request):
+        serializer = BulkReservationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results: list[dict] = Reservation.objects.bulk_reserve(request.user, serializer.get_lesson_ids())
+        reserved: bool = any(result['reservation'] for result in results)
+        return Response(status=status.HTTP_201_CREATED if reserved else status.HTTP_400_BAD_REQUEST,
+                        data=BulkReservationResultSerializer(results, many=True).data)
+
+
 class ReservationDetailAPIView(APIView):
+    # 취소와 대기자 한 명 예약, 크레딧이 모자라 건너뛴 대기자 Waitlist.objects.max_promotion_attempts - 1명
+    query_budget = 55
+
     @swagger_auto_schema(
         operation_summary="수업 취소 하기",
+        operation_description="취소로 자리가 생기면 예약 대기자를 대기 순서대로 자동 예약합니다.",
         responses={status.HTTP_204_NO_CONTENT: ''},
     )
     def delete(self, request: Request, pk: int):
         reservation: Reservation = get_object_or_404(Reservation, pk=pk)
         reservation.cancel(request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ReservationExportAPIView(APIView):
+    query_budget = 2
+    permission_classes = [IsAdminUser]
+    fields: tuple[str, ...] = ('id', 'user', 'lesson', 'type', 'cancel_reservation', 'lesson__gym', 'lesson__type',
+                               'lesson__start_date', 'created', 'modified', )
+
+    @swagger_auto_schema(
+        operation_summary="전체 예약 내역 내보내기(관리자)",
+        operation_description="모든 예약/취소 내역을 id 순서의 CSV/NDJSON 스트림으로 반환합니다. "
+                              "after에 마지막으로 받은 id를 넣으면 이어서 받습니다.",
+        query_serializer=ExportQuerySerializer,
+    )
+    def get(self, request: Request):
+        query_serializer = ExportQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        exporter = RowExporter(Reservation.objects.all(), self.fields, **query_serializer.validated_data)
+        return exporter.as_response('reservations')
@@ -0,0 +1,36 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+
+from core.async_views import AsyncReadView
+from core.conditional import aconditional_get
+from credit.models import CreditBalance
+from user.models import CustomUser
+from user.serializers import user_detail_values_serializer
+from user.views import UserDetailAPIView
+
+
+class UserDetailAsyncView(AsyncReadView):
+    query_budget = UserDetailAPIView.query_budget
+    read_from_replica = UserDetailAPIView.read_from_replica
+    sync_view_class = UserDetailAPIView
+
+    async def get(self, request, pk: int) -> HttpResponse:
+        version: tuple | None = await CustomUser.objects.aget_detail_version(pk)
+        if version is None:
+            raise NotFound()
+
+        async def get_response() -> HttpResponse:
+            user: CustomUser | None = await CustomUser.objects.filter(pk=pk).afirst()
+            if user is None:
+                raise NotFound()
+            # 크레딧 만료는 트랜잭션 안에서 처리하므로 스레드에서 실행한다.
+            await sync_to_async(user.expire_credit)()
+            credit_count: int = await CreditBalance.objects.aget_count(user)
+            reservation_rows: list[dict] = [
+                row async for row in user_detail_values_serializer.get_reservation_queryset(user)]
+            credit_rows: list[dict] = [row async for row in user_detail_values_serializer.get_credit_queryset(user)]
+            return self.json_response(user_detail_values_serializer.to_representation(
+                user, credit_count, reservation_rows, credit_rows))
+
+        return await aconditional_get(request, version, get_response)
@@ -1,5 +1,36 @@
 from django.contrib.auth.models import UserManager
+from django.db.models import OuterRef, Subquery, Max
+from django.utils import timezone
+
+from core.conditional import latest
 
 
 class CustomUserManager(UserManager):
-    pass
+    def detail_version(self, pk: int):
+        from credit.models import Credit
+        from lesson.models import Reservation
+
+        def latest_modified(queryset, field: str = 'modified') -> Subquery:
+            return Subquery(queryset.filter(user=OuterRef('pk')).order_by().values('user').annotate(
+                latest_modified=Max(field)).values('latest_modified'))
+
+        return (self
+                .filter(pk=pk)
+                .annotate(credit_modified=latest_modified(Credit.objects.all()),
+                          reservation_modified=latest_modified(Reservation.objects.all()),
+                          lesson_modified=latest_modified(Reservation.objects.all(), 'lesson__modified'))
+                .values_list('modified', 'credit_balance__modified', 'credit_modified',
+                             'reservation_modified', 'lesson_modified'))
+
+    def get_detail_version(self, pk: int) -> tuple | None:
+        return self._to_detail_version(self.detail_version(pk).first())
+
+    async def aget_detail_version(self, pk: int) -> tuple | None:
+        return self._to_detail_version(await self.detail_version(pk).afirst())
+
+    @staticmethod
+    def _to_detail_version(version: tuple | None) -> tuple | None:
+        if version is None:
+            return None
+        # 크레딧 만료는 날짜가 바뀔 때만 생기므로 오늘 날짜를 넣어 만료 전후 응답을 구분한다.
+        return latest(*version), timezone.now().date()
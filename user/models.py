@@ -1,12 +1,14 @@
 from datetime import date
+from typing import Iterator
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models, transaction
-from django.db.models import QuerySet, Sum
 from django.utils import timezone
 
 from core.models import TimeStampedModel
-from credit.models import Credit, PricePolicy, PurchaseCredit, UseCredit, PurchaseCreditQuerySet, RefundCredit
+from credit.models import Credit, PricePolicy, PurchaseCredit, UseCredit, PurchaseCreditQuerySet, RefundCredit, \
+    CreditBalance, CreditExpiryWatermark
 from lesson.models import Reservation, Lesson
 from user.managers import CustomUserManager
 
@@ -34,31 +36,41 @@ class CustomUser(TimeStampedModel, AbstractUser):
 
     @transaction.atomic
     def use_credit(self, reservation: Reservation) -> bool:
-        if not self.has_enough_credit(reservation.lesson):
+        purchase_credits: list[PurchaseCredit] = self.lock_remaining_credits()
+        if sum(purchase_credit.remaining_count for purchase_credit in purchase_credits) < reservation.lesson.credit_count:
             return False
 
-        lesson_credit_count: int = reservation.lesson.credit_count
-
-        for purchase_credit in self.remaining_credits:
-            purchase_credit: PurchaseCredit
-            remaining_count = purchase_credit.remaining_count
-            use_credit = UseCredit.objects.create(
-                user=self,
-                purchased_credit=purchase_credit,
-                count=-remaining_count,
-                start_date=timezone.now().date(),
-                reservation=reservation,
-                message=f'{reservation.credit_message}'
-            )
-            if lesson_credit_count > remaining_count:
-                lesson_credit_count -= remaining_count
-            else:
-                use_credit.count = -lesson_credit_count
-                use_credit.save()
-                break
-
+        self.charge_credits(purchase_credits, [reservation])
         return True
 
+    def lock_remaining_credits(self) -> list[PurchaseCredit]:
+        self.expire_credit()
+        return list(
+            PurchaseCredit.objects.select_for_update().remaining().filter(user=self).order_by('start_date', 'id'))
+
+    def charge_credits(self, purchase_credits: list[PurchaseCredit], reservations: list[Reservation]) -> None:
+        purchase_credits: Iterator[PurchaseCredit] = iter(purchase_credits)
+        purchase_credit: PurchaseCredit | None = None
+        use_credits: list[UseCredit] = []
+        for reservation in reservations:
+            lesson_credit_count: int = reservation.lesson.credit_count
+            while lesson_credit_count > 0:
+                if purchase_credit is None or purchase_credit.remaining_count == 0:
+                    purchase_credit = next(purchase_credits)
+                use_count: int = min(purchase_credit.remaining_count, lesson_credit_count)
+                use_credits.append(UseCredit(
+                    user=self,
+                    purchased_credit=purchase_credit,
+                    count=-use_count,
+                    start_date=timezone.now().date(),
+                    reservation=reservation,
+                    message=f'{reservation.credit_message}'
+                ))
+                purchase_credit.remaining_count -= use_count
+                lesson_credit_count -= use_count
+
+        UseCredit.objects.bulk_create(use_credits)
+
     def refund_credit(self, cancel_reservation: Reservation, credit_count: int,
                       purchased_credit: PurchaseCredit) -> RefundCredit:
         return RefundCredit.objects.create(
@@ -77,17 +89,18 @@ class CustomUser(TimeStampedModel, AbstractUser):
         return True
 
     def expire_credit(self) -> None:
+        if not settings.CREDIT_EXPIRE_ON_READ and CreditExpiryWatermark.objects.is_current():
+            return
+
         now = timezone.now().date()
         expired_credits: PurchaseCreditQuerySet[Credit] = PurchaseCredit.objects.filter(
-            user=self, end_date__lt=now, is_expired=False).select_related('user')
+            user=self, end_date__lt=now, is_expired=False)
         expired_credits.expire()
 
     @property
     def credit_count(self) -> int:
         self.expire_credit()
-        queryset: QuerySet[Credit] = self.credits.all()
-        current_credit: dict = queryset.aggregate(Sum('count'))
-        return current_credit['count__sum'] if current_credit['count__sum'] else 0
+        return CreditBalance.objects.get_count(self)
 
     @property
     def remaining_credits(self) -> list['PurchaseCredit']:
@@ -1,8 +1,11 @@
+from collections import defaultdict
+
 from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 
+from core.serializers import ValuesSerializer
 from credit.models import Credit
-from lesson.serializers import LessonSerializer
+from lesson.serializers import LessonSerializer, lesson_values_serializer
 from lesson.models import Reservation
 from user.models import CustomUser
 
@@ -44,3 +47,35 @@ class UserDetailSerializer(UserSerializer):
 
     def get_credit_count(self, user: CustomUser) -> int:
         return user.credit_count
+
+
+class UserDetailValuesSerializer:
+    """UserDetailSerializer와 같은 응답을 유저 인스턴스와 예약/크레딧 .values() 행으로 만든다."""
+    user = ValuesSerializer(UserDetailSerializer)
+    reservation = ValuesSerializer(UserReservationSerializer, computed_values={
+        f'lesson__{name}': compute for name, compute in lesson_values_serializer.computed_values.items()})
+    credit = ValuesSerializer(ReservationCreditSerializer)
+
+    def get_reservation_queryset(self, user: CustomUser):
+        return Reservation.objects.filter(user=user).order_by('id').values('id', *self.reservation.value_fields)
+
+    def get_credit_queryset(self, user: CustomUser):
+        return (Credit.objects
+                .filter(reservation__user=user)
+                .order_by('id')
+                .values('reservation_id', *self.credit.value_fields))
+
+    def to_representation(self, user: CustomUser, credit_count: int, reservation_rows: list[dict],
+                          credit_rows: list[dict]) -> dict:
+        credits: dict[int, list[dict]] = defaultdict(list)
+        for credit_row in credit_rows:
+            credits[credit_row['reservation_id']].append(self.credit.to_representation(credit_row))
+        reservations: list[dict] = [
+            self.reservation.to_representation(reservation_row, credits=credits[reservation_row['id']])
+            for reservation_row in reservation_rows]
+        return self.user.to_representation(
+            {name: getattr(user, name) for name in self.user.value_fields},
+            credit_count=credit_count, reservations=reservations)
+
+
+user_detail_values_serializer = UserDetailValuesSerializer()
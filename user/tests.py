@@ -1,7 +1,9 @@
 import datetime
+import json
 from unittest import mock
 
 from django.db import connection
+from django.db.models import Prefetch
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
@@ -9,8 +11,10 @@ from rest_framework import status
 from rest_framework.response import Response
 
 from core.tests import BaseTest
-from credit.models import PricePolicy
+from credit.models import PricePolicy, Credit
 from lesson.models import Gym, LessonType, Lesson, Reservation
+from user.models import CustomUser
+from user.serializers import UserDetailSerializer, user_detail_values_serializer
 
 
 class UserTestCase(BaseTest):
@@ -41,6 +45,44 @@ class UserTestCase(BaseTest):
         self.assertTrue(self.user.use_credit(reservation))
         self.assertEqual(self.user.credit_count, price_policy.credit_count - lesson.credit_count)
 
+    def test_user_use_credit_fifo(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = Lesson.objects.create(**{**self.lesson_data, 'credit_count': price_policy.credit_count + 200})
+        first_credit = self.user.buy_credit(price_policy, self.ten_day_ago)
+        second_credit = self.user.buy_credit(price_policy, self.today)
+        third_credit = self.user.buy_credit(price_policy, self.today)
+        reservation = Reservation.objects.create(user=self.user, lesson=lesson)
+
+        self.assertTrue(self.user.use_credit(reservation))
+
+        use_counts: list[tuple[int, int]] = list(
+            reservation.credits.order_by('id').values_list('purchased_credit', 'count'))
+        self.assertEqual(use_counts, [(first_credit.id, -price_policy.credit_count), (second_credit.id, -200)])
+        for purchase_credit, remaining_count in ((first_credit, 0),
+                                                 (second_credit, price_policy.credit_count - 200),
+                                                 (third_credit, price_policy.credit_count)):
+            purchase_credit.refresh_from_db()
+            self.assertEqual(purchase_credit.remaining_count, remaining_count)
+        self.assertEqual(self.user.credit_count, price_policy.credit_count * 3 - lesson.credit_count)
+
+    def test_user_use_credit_query_count(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = self.create_lesson(self.lesson_data, credit_count=1)
+        self.user.buy_credit(price_policy, self.today)
+        reservation = Reservation.objects.create(user=self.user, lesson=lesson)
+        with CaptureQueriesContext(connection) as expected_num_queries:
+            self.assertTrue(self.user.use_credit(reservation))
+
+        small_policy = PricePolicy.objects.create(**{**self.policy_data, 'credit_count': 1})
+        for _ in range(10):
+            self.user.buy_credit(small_policy, self.ten_day_ago)
+        lesson = self.create_lesson(self.lesson_data, credit_count=10)
+        reservation = Reservation.objects.create(user=self.user, lesson=lesson)
+        with CaptureQueriesContext(connection) as checked_num_queries:
+            self.assertTrue(self.user.use_credit(reservation))
+        self.assertEqual(reservation.credits.count(), 10)
+        self.assertEqual(len(expected_num_queries), len(checked_num_queries))
+
     def test_expire_user_credit(self):
         year_ago = timezone.now().date() - datetime.timedelta(365)
         price_policy = PricePolicy.objects.create(**self.policy_data)
@@ -67,6 +109,19 @@ class UserTestCase(BaseTest):
         self.assertEqual(self.user.credit_count, 0)
         self.assertEqual(len(self.user.remaining_credits), 0)
 
+    def test_user_credit_count_query_count(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        with CaptureQueriesContext(connection) as expected_num_queries:
+            self.assertEqual(self.user.credit_count, price_policy.credit_count)
+
+        for _ in range(10):
+            self.user.buy_credit(price_policy, self.today)
+
+        with CaptureQueriesContext(connection) as checked_num_queries:
+            self.assertEqual(self.user.credit_count, price_policy.credit_count * 11)
+        self.assertEqual(len(expected_num_queries), len(checked_num_queries))
+
     def test_user_remaining_credit(self):
         year_ago = timezone.now().date() - datetime.timedelta(365)
         price_policy = PricePolicy.objects.create(**self.policy_data)
@@ -92,6 +147,48 @@ class UserTestCase(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data.get('reservations')), 3)
 
+    def test_user_detail_values_serializer(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        self.user.buy_credit(price_policy, self.today)
+        for start_time in (datetime.time(9, 0), datetime.time(13, 0)):
+            lesson = Lesson.objects.create(**{**self.lesson_data, 'start_time': start_time})
+            Reservation.objects.reserve(self.user, lesson).cancel(self.user)
+            Reservation.objects.reserve(self.user, lesson)
+
+        data: dict = user_detail_values_serializer.to_representation(
+            self.user, self.user.credit_count,
+            list(user_detail_values_serializer.get_reservation_queryset(self.user)),
+            list(user_detail_values_serializer.get_credit_queryset(self.user)))
+        user: CustomUser = CustomUser.objects.prefetch_related(
+            Prefetch('reservations', queryset=Reservation.objects.order_by('id').prefetch_related(
+                Prefetch('credits', queryset=Credit.objects.order_by('id'))))).get(id=self.user.id)
+        self.assertEqual(json.loads(json.dumps(data)), json.loads(json.dumps(UserDetailSerializer(user).data)))
+        self.assertEqual(len(data['reservations']), 6)
+
+    def test_user_detail_view_not_modified(self):
+        price_policy = PricePolicy.objects.create(**self.policy_data)
+        lesson = Lesson.objects.create(**self.lesson_data)
+        self.user.buy_credit(price_policy, self.today)
+        url: str = reverse('user-detail', kwargs={'pk': self.user.id})
+        response: Response = self.user_client.get(url)
+        self.assertIn('Last-Modified', response)
+
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.query_stats.count, 3)
+        etag: str = response['ETag']
+
+        Reservation.objects.reserve(self.user, lesson)
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        self.admin.buy_credit(price_policy, self.today)
+        Reservation.objects.reserve(self.admin, lesson)
+        response: Response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['reservations'][0]['lesson']['reserved_count'], 2)
+
     def test_user_detail_view_N_Plus_1(self):
         price_policy = PricePolicy.objects.create(**self.policy_data)
         lesson = Lesson.objects.create(**self.lesson_data)
@@ -1,14 +1,15 @@
-from django.db.models import Prefetch
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
-from lesson.models import Reservation
+from core.conditional import conditional_get
 from user.models import CustomUser
-from user.serializers import UserSerializer, UserDetailSerializer
+from user.serializers import UserSerializer, UserDetailSerializer, user_detail_values_serializer
 
 
 class UserAPIView(generics.ListCreateAPIView):
+    query_budget = {'GET': 3, 'POST': 4}
     permission_classes = [AllowAny]
     serializer_class = UserSerializer
     queryset = CustomUser.objects.all()
@@ -26,20 +27,43 @@ class UserAPIView(generics.ListCreateAPIView):
         return super(UserAPIView, self).post(request, *args, **kwargs)
 
 
+def get_user_detail_version(request, pk: int) -> tuple | None:
+    return CustomUser.objects.get_detail_version(pk)
+
+
 class UserDetailAPIView(generics.RetrieveAPIView):
+    # 다른 유저를 조회하면서 사용기간이 지난 크레딧을 만료 처리할 때(CREDIT_EXPIRE_ON_READ) 가장 많다.
+    query_budget = 13
+    read_from_replica = True
     serializer_class = UserDetailSerializer
-    queryset = CustomUser.objects.all().prefetch_related(
-        Prefetch('reservations', queryset=(Reservation.objects.select_related('lesson').prefetch_related('credits')))
-    )
+    queryset = CustomUser.objects.all()
 
     @swagger_auto_schema(
         operation_summary="유저 정보, 예약(취소)리스트 및 크레딧 조회",
+        operation_description="응답의 ETag를 If-None-Match로 보내면 바뀐 내용이 없을 때 304를 반환합니다.",
     )
+    @conditional_get(get_user_detail_version)
     def get(self, request, *args, **kwargs):
-        return super(UserDetailAPIView, self).retrieve(request, *args, **kwargs)
+        return self.retrieve(request, *args, **kwargs)
+
+    def get_object(self) -> CustomUser:
+        # 자기 정보를 조회하면 인증할 때 읽은 유저를 그대로 써서 같은 유저를 다시 읽지 않는다.
+        if str(self.request.user.pk) == str(self.kwargs[self.lookup_url_kwarg or self.lookup_field]):
+            self.check_object_permissions(self.request, self.request.user)
+            return self.request.user
+        return super(UserDetailAPIView, self).get_object()
+
+    def retrieve(self, request, *args, **kwargs):
+        # 읽기 전용 조회이므로 예약/크레딧을 모델 인스턴스 대신 .values() 행으로 읽어 응답을 만든다.
+        user: CustomUser = self.get_object()
+        return Response(user_detail_values_serializer.to_representation(
+            user, user.credit_count,
+            list(user_detail_values_serializer.get_reservation_queryset(user)),
+            list(user_detail_values_serializer.get_credit_queryset(user))))
 
 
 class UserReservationAPIView(generics.RetrieveAPIView):
+    query_budget = 9
     serializer_class = UserDetailSerializer
     queryset = CustomUser.objects.all()
 